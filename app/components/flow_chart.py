@@ -0,0 +1,135 @@
+import streamlit as st
+import streamlit.components.v1 as components
+import datetime
+import functools
+import json
+import os
+from typing import Dict, Any, List, Optional, Tuple
+
+from components.tour_card_component import CARD_COLORS
+from utils.itinerary import get_itinerary_version
+from utils.notifications import parse_item_time
+
+TEMPLATE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets', 'flow_chart.html')
+
+NODE_TYPES = ['attraction', 'meal', 'accommodation', 'transportation', 'other']
+
+# Edge kinds, in the order the client looks them up
+EDGE_SEQUENCE = 0   # next activity at the same place
+EDGE_TRANSFER = 1   # next activity somewhere else, or by transport
+EDGE_DAY = 2        # last activity of a day to the first of the next
+
+@functools.lru_cache(maxsize=1)
+def _read_template() -> str:
+    with open(TEMPLATE_FILE, encoding='utf-8') as f:
+        return f.read()
+
+def _sort_key(item: Dict[str, Any]) -> tuple:
+    item_date = item.get('date')
+    item_time = parse_item_time(item.get('time', ''))
+    return (item_date is None, item_date or datetime.date.min, item_time is None, item_time or datetime.time.min)
+
+def layout_flow_graph(itinerary: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], Dict[str, int]]:
+    """
+    Lay the itinerary out as a graph: one column per day, one row per activity
+
+    Args:
+        itinerary: List of itinerary items
+
+    Returns:
+        Tuple of the compact graph payload sent to the browser and a map
+        from item id to node index
+    """
+    # Chronological order; undated items go in a last column
+    ordered = sorted(itinerary, key=_sort_key)
+
+    columns = []
+    nodes = []
+    edges = []
+    node_index = {}
+    column_of_date = {}
+    rows = []
+    previous = None
+
+    for item in ordered:
+        item_date = item.get('date')
+        if item_date not in column_of_date:
+            column_of_date[item_date] = len(columns)
+            columns.append(item_date.strftime('%a %m/%d') if item_date else 'No date')
+            rows.append(0)
+        col = column_of_date[item_date]
+        row = rows[col]
+        rows[col] += 1
+
+        item_type = item.get('type', 'other')
+        type_index = NODE_TYPES.index(item_type) if item_type in NODE_TYPES else NODE_TYPES.index('other')
+        i = len(nodes)
+        nodes.append([
+            col, row, type_index,
+            item.get('time', ''),
+            item.get('activity', ''),
+            item.get('location', ''),
+            item.get('duration_minutes') or 0,
+        ])
+        if item.get('id'):
+            node_index[item['id']] = i
+
+        # Each consecutive pair gets exactly one edge
+        if previous is not None:
+            prev_i, prev_item, prev_col = previous
+            if prev_col != col:
+                kind = EDGE_DAY
+            elif (prev_item.get('location') or '') != (item.get('location') or '') \
+                    or prev_item.get('type') == 'transportation':
+                kind = EDGE_TRANSFER
+            else:
+                kind = EDGE_SEQUENCE
+            edges.append([prev_i, i, kind])
+        previous = (i, item, col)
+
+    graph = {
+        'cols': columns,
+        'types': NODE_TYPES,
+        'colors': [CARD_COLORS.get(t, CARD_COLORS['other']) for t in NODE_TYPES],
+        'n': nodes,
+        'e': edges,
+    }
+    return graph, node_index
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def flow_graph_payload(version: str, _itinerary: List[Dict[str, Any]]) -> Tuple[str, Dict[str, int]]:
+    """
+    Layout of an itinerary as JSON, computed once per itinerary version
+
+    Args:
+        version: Content hash of the itinerary (the cache key)
+        _itinerary: The itinerary itself (not hashed by the cache)
+
+    Returns:
+        Tuple of the JSON payload and the map from item id to node index
+    """
+    graph, node_index = layout_flow_graph(_itinerary)
+    # Compact JSON, safe to embed in a <script> block
+    payload = json.dumps(graph, separators=(',', ':')).replace('</', '<\\/')
+    return payload, node_index
+
+def render_flow_chart(itinerary: List[Dict[str, Any]], current_id: Optional[str] = None, height: int = 600):
+    """
+    Show the itinerary as an interactive flow chart
+
+    The chart is drawn in the browser from a single JSON payload, so
+    panning, zooming and hovering never rerun the script.
+
+    Args:
+        itinerary: The session's itinerary (see utils.itinerary.get_itinerary)
+        current_id: Id of the current item, highlighted and centred
+        height: Chart height in pixels
+    """
+    payload, node_index = flow_graph_payload(get_itinerary_version(), itinerary)
+    current = node_index.get(current_id) if current_id else None
+
+    html = (_read_template()
+            .replace('__HEIGHT__', str(height))
+            .replace('__CURRENT__', json.dumps(current))
+            .replace('__GRAPH__', payload))
+    components.html(html, height=height + 10)
@@ -0,0 +1,120 @@
+import streamlit as st
+import collections
+import contextlib
+import datetime
+import os
+from typing import List
+
+from utils.profiling import finish_rerun, start_rerun
+
+# Profiles of this many recent reruns are kept per session
+PERF_HISTORY = 20
+
+# Spans listed in the panel
+PERF_SLOWEST = 15
+
+def _admin_emails() -> List[str]:
+    """Admin accounts, from ADMIN_EMAILS (env or secrets), comma separated"""
+    emails = os.environ.get('ADMIN_EMAILS')
+    if not emails:
+        try:
+            emails = st.secrets.get('ADMIN_EMAILS')
+        except Exception:
+            emails = None
+    return [email.strip().lower() for email in (emails or '').split(',') if email.strip()]
+
+def is_admin() -> bool:
+    """Whether the signed-in user may see the performance panel"""
+    user = st.session_state.get('user_info') or {}
+    email = (user.get('email') or '').lower()
+    return bool(email) and email in _admin_emails()
+
+def _request_cprofile():
+    st.session_state._perf_cprofile_next = True
+
+@contextlib.contextmanager
+def profile_rerun(label: str = ''):
+    """
+    Record the spans of this script run if the session has profiling on
+
+    Profiling is on for admins who switched it on in the panel (PROFILING=1
+    switches it on by default). When it is off this only reads two
+    session state keys.
+
+    Args:
+        label: Description of the run
+    """
+    cprofile = st.session_state.pop('_perf_cprofile_next', False)
+    enabled = st.session_state.get('perf_enabled', os.environ.get('PROFILING') == '1')
+    if not (enabled or cprofile) or not is_admin():
+        yield
+        return
+
+    recorder = start_rerun(label, cprofile=cprofile)
+    try:
+        yield
+    finally:
+        finish_rerun(recorder)
+        # Labelled after the run, once the page it showed is known
+        recorder.label = label or st.session_state.get('page', '')
+        history = st.session_state.get('_perf_reruns')
+        if history is None:
+            history = st.session_state._perf_reruns = collections.deque(maxlen=PERF_HISTORY)
+        history.append(recorder)
+
+def render_perf_panel():
+    """Collapsible sidebar panel with the slowest spans of recent reruns (admins only)"""
+    if not is_admin():
+        return
+
+    with st.sidebar.expander("⏱️ Performance", expanded=False):
+        st.toggle("Record spans", key="perf_enabled", value=os.environ.get('PROFILING') == '1')
+        st.button("Profile next rerun (cProfile)", key="perf_cprofile_btn", on_click=_request_cprofile)
+
+        history = st.session_state.get('_perf_reruns')
+        if not history:
+            st.caption("No reruns recorded yet.")
+            return
+
+        latest = history[-1]
+        st.markdown(f"**Last rerun** ({latest.label or 'main'}): {latest.seconds * 1000:.1f} ms, "
+                    f"{len(latest.spans)} spans")
+        st.dataframe([
+            {
+                'span': '  ' * depth + name,
+                'ms': round(seconds * 1000, 2),
+                'starts at ms': round(start * 1000, 2),
+            }
+            for name, depth, start, seconds in latest.slowest(PERF_SLOWEST)
+        ], hide_index=True, use_container_width=True)
+
+        # Per span name over the recent reruns
+        totals = {}
+        for profile in history:
+            for name, entry in profile.totals().items():
+                total = totals.setdefault(name, {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+                total['calls'] += entry['calls']
+                total['seconds'] += entry['seconds']
+                total['max_seconds'] = max(total['max_seconds'], entry['max_seconds'])
+        st.markdown(f"**Last {len(history)} reruns**")
+        st.dataframe(sorted([
+            {
+                'span': name,
+                'calls': total['calls'],
+                'avg ms': round(total['seconds'] / total['calls'] * 1000, 2),
+                'max ms': round(total['max_seconds'] * 1000, 2),
+                'total ms': round(total['seconds'] * 1000, 2),
+            }
+            for name, total in totals.items()
+        ], key=lambda row: row['total ms'], reverse=True)[:PERF_SLOWEST], hide_index=True, use_container_width=True)
+
+        # Most recent cProfile run
+        profiled = next((profile for profile in reversed(history) if profile.stats_text), None)
+        if profiled is not None:
+            stamp = datetime.datetime.fromtimestamp(profiled.started_at).strftime('%H:%M:%S')
+            st.markdown(f"**cProfile** ({profiled.label or 'main'}, {stamp})")
+            st.code(profiled.stats_text, language=None)
+            if profiled.dump_file and os.path.exists(profiled.dump_file):
+                with open(profiled.dump_file, 'rb') as f:
+                    st.download_button("Download .prof", f.read(), file_name=os.path.basename(profiled.dump_file),
+                                       mime="application/octet-stream", key="perf_prof_download")
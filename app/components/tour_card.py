@@ -104,9 +104,9 @@ def render_current_activity(item: Dict[str, Any], insights: Dict[str, Any] = Non
         st.info("No current activity found")
         return
     
-    # Add insights to the item if provided
+    # Add insights to a copy of the item (itinerary items are shared)
     if insights:
-        item['insights'] = insights
+        item = dict(item, insights=insights)
     
     # Create columns for a better layout
     col1, col2 = st.columns([2, 1])
@@ -1,7 +1,17 @@
 import streamlit as st
-from typing import Dict, Any
+import collections
+import json
+import threading
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 
+from utils.profiling import profiled
+
+# Rendered card HTML kept per distinct (content, current, insights) combination
+CARD_CACHE_SIZE = 4096
+_card_cache: "collections.OrderedDict[tuple, str]" = collections.OrderedDict()
+_card_cache_lock = threading.Lock()
+
 # Define card colors based on activity type - using more subtle, premium colors
 CARD_COLORS = {
     'meal': '#FEF9C3',         # Subtle yellow
@@ -20,6 +30,48 @@ CARD_ICONS = {
     'other': '📌'
 }
 
+def _card_key(item: Dict[str, Any], is_current: bool, show_insights: bool) -> tuple:
+    """Cache key made of exactly the item fields the card HTML depends on"""
+    insights = None
+    if show_insights and is_current and item.get('insights'):
+        insights = json.dumps(item['insights'], sort_keys=True, default=str)
+    return (
+        item.get('type', 'other'),
+        item.get('time', 'No time specified'),
+        item.get('activity', 'No activity specified'),
+        item.get('location', ''),
+        item.get('duration_minutes', 0),
+        tuple(item.get('notes', [])),
+        insights,
+        is_current,
+    )
+
+def tour_card_html(item: Dict[str, Any], is_current: bool = False, show_insights: bool = False) -> str:
+    """
+    Get the HTML of a tour card, memoized by item content and current state
+    
+    Args:
+        item: Tour item dictionary
+        is_current: Whether this is the current item
+        show_insights: Whether to show AI insights
+        
+    Returns:
+        Card HTML
+    """
+    key = _card_key(item, is_current, show_insights)
+    with _card_cache_lock:
+        card_html = _card_cache.get(key)
+        if card_html is not None:
+            _card_cache.move_to_end(key)
+            return card_html
+    
+    card_html = build_tour_card_html(item, is_current, show_insights)
+    with _card_cache_lock:
+        _card_cache[key] = card_html
+        if len(_card_cache) > CARD_CACHE_SIZE:
+            _card_cache.popitem(last=False)
+    return card_html
+
 def render_tour_card(item: Dict[str, Any], is_current: bool = False, show_insights: bool = False):
     """
     Render a tour item as a premium card
@@ -29,6 +81,36 @@ def render_tour_card(item: Dict[str, Any], is_current: bool = False, show_insigh
         is_current: Whether this is the current item
         show_insights: Whether to show AI insights
     """
+    st.markdown(tour_card_html(item, is_current, show_insights), unsafe_allow_html=True)
+
+@profiled()
+def render_tour_cards(items: List[Dict[str, Any]], current_id: Optional[str] = None):
+    """
+    Render several tour cards with a single markdown element
+    
+    Args:
+        items: Tour item dictionaries
+        current_id: Id of the current item, if any
+    """
+    if items:
+        st.markdown(
+            "".join(tour_card_html(item, is_current=current_id is not None and item.get('id') == current_id)
+            for item in items),
+            unsafe_allow_html=True
+        )
+
+def build_tour_card_html(item: Dict[str, Any], is_current: bool = False, show_insights: bool = False) -> str:
+    """
+    Build the HTML of a tour card (uncached, see tour_card_html)
+    
+    Args:
+        item: Tour item dictionary
+        is_current: Whether this is the current item
+        show_insights: Whether to show AI insights
+        
+    Returns:
+        Card HTML
+    """
     # Get card color and icon based on activity type
     card_type = item.get('type', 'other')
     card_color = CARD_COLORS.get(card_type, CARD_COLORS['other'])
@@ -37,6 +119,7 @@ def render_tour_card(item: Dict[str, Any], is_current: bool = False, show_insigh
     # Add extra styling for current item
     border_style = "border-left: 4px solid #3b82f6;" if is_current else ""
     shadow_style = "box-shadow: 0 4px 12px rgba(0, 0, 0, 0.08);" if is_current else "box-shadow: 0 1px 3px rgba(0, 0, 0, 0.1);"
+    shadow_value = shadow_style.replace('box-shadow: ', '').rstrip(';')
     
     # Format time and activity
     time_str = item.get('time', 'No time specified')
@@ -62,7 +145,7 @@ def render_tour_card(item: Dict[str, Any], is_current: bool = False, show_insigh
     <div style="background-color: {card_color}; border-radius: 0.5rem; padding: 1.25rem; margin-bottom: 1rem; 
                 {border_style} {shadow_style} transition: transform 0.2s ease, box-shadow 0.2s ease;"
          onmouseover="this.style.transform='translateY(-2px)'; this.style.boxShadow='0 6px 16px rgba(0, 0, 0, 0.1)';" 
-         onmouseout="this.style.transform='translateY(0)'; this.style.boxShadow='{shadow_style.replace('style=', '').replace('\"', '')}'" 
+         onmouseout="this.style.transform='translateY(0)'; this.style.boxShadow='{shadow_value}'" 
          onclick="this.style.transform='scale(0.98)'; setTimeout(() => this.style.transform='translateY(0)', 100);">
         <div style="display: flex; justify-content: space-between; align-items: flex-start; margin-bottom: 0.75rem;">
             <div style="display: flex; align-items: center;">
@@ -151,19 +234,18 @@ def render_tour_card(item: Dict[str, Any], is_current: bool = False, show_insigh
     
     # Close the main div
     card_html += "</div>"
-    
-    # Render with streamlit
-    st.markdown(card_html, unsafe_allow_html=True)
+    return card_html
 
+@profiled()
 def render_current_activity(item: Dict[str, Any], insights: Dict[str, Any] = None):
     """Render the current activity card with additional details"""
     if not item:
         st.info("No current activity found")
         return
     
-    # Add insights to the item if provided
+    # Show insights on a copy so the stored itinerary item is left untouched
     if insights:
-        item['insights'] = insights
+        item = dict(item, insights=insights)
     
     # Create columns for a better layout
     col1, col2 = st.columns([3, 1])
@@ -212,6 +294,7 @@ def render_current_activity(item: Dict[str, Any], insights: Dict[str, Any] = Non
             
         st.markdown("</div>", unsafe_allow_html=True)
 
+@profiled()
 def render_next_activities(items: list, max_items: int = 3):
     """Render upcoming activities"""
     if not items:
@@ -239,15 +322,16 @@ def render_next_activities(items: list, max_items: int = 3):
     """, unsafe_allow_html=True)
     
     # Show only up to max_items
-    for i, item in enumerate(items[:max_items]):
-        render_tour_card(item, is_current=False)
+    render_tour_cards(items[:max_items])
 
+@profiled()
 def render_suggestion_card(suggestion: Dict[str, Any], key_prefix: str = "sugg"):
     """Render a suggestion card with premium styling"""
     name = suggestion.get('name', 'Unknown place')
     desc = suggestion.get('description', '')
     place_type = suggestion.get('type', suggestion.get('cuisine', ''))
     price_range = suggestion.get('price_range', '')
+    distance_km = suggestion.get('distance_km')
     
     # Create a unique key for this suggestion
     key = f"{key_prefix}_{name.replace(' ', '_').lower()}"
@@ -280,6 +364,13 @@ def render_suggestion_card(suggestion: Dict[str, Any], key_prefix: str = "sugg")
             </div>
         """, unsafe_allow_html=True)
     
+    if distance_km is not None:
+        st.markdown(f"""
+            <div style="font-size: 0.85rem; color: #64748b; margin-bottom: 1rem;">
+                <span style="font-weight: 500;">Distance:</span> {distance_km} km
+            </div>
+        """, unsafe_allow_html=True)
+    
     st.markdown("</div>", unsafe_allow_html=True)
     
     col1, col2 = st.columns(2)
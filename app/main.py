@@ -1,19 +1,36 @@
 import streamlit as st
+import importlib
 import os
 from dotenv import load_dotenv
 from streamlit_option_menu import option_menu
 
-from pages.login import login_page
-from pages.dashboard import dashboard_page
-from pages.upload import upload_page
-from pages.flow import flow_page
-from pages.suggestions import suggestions_page
-from pages.setup import setup_page
-from utils.auth import check_login_status
+from utils.auth import check_login_status, sign_out
+from utils.notifications import initialize_notifications, stop_notifications
+from utils.assets import inject_stylesheet, render_logo, render_avatar
+from utils.profiling import span
+from components.perf_panel import profile_rerun, render_perf_panel
 
 # Load environment variables
 load_dotenv()
 
+# Page name -> (module, function). Pages are imported the first time they are
+# shown, so a worker serving only the setup or login screen never loads the
+# AI, Google API or pandas modules the other pages pull in.
+PAGES = {
+    "Setup": ("pages.setup", "setup_page"),
+    "Login": ("pages.login", "login_page"),
+    "Dashboard": ("pages.dashboard", "dashboard_page"),
+    "Upload Plan": ("pages.upload", "upload_page"),
+    "Tour Flow": ("pages.flow", "flow_page"),
+    "Suggestions": ("pages.suggestions", "suggestions_page"),
+}
+
+def render_page(name: str):
+    """Import a page module on first use and render the page"""
+    module_name, function_name = PAGES[name]
+    with span(f"page:{name}"):
+        getattr(importlib.import_module(module_name), function_name)()
+
 # Function to check if necessary API keys are in session state
 def secrets_ready():
     # First check if they're in st.secrets (preferred)
@@ -49,148 +66,43 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Premium Modern UI CSS
-st.markdown("""
-<style>
-    /* Main styles */
-    .main {
-        background-color: #f8fafc;
-        color: #334155;
-        font-family: 'Inter', sans-serif;
-    }
-    
-    /* App container */
-    .stApp {
-        max-width: 1400px;
-        margin: 0 auto;
-    }
-    
-    /* Block container spacing */
-    .block-container {
-        padding: 1.5rem 1rem;
-    }
-    
-    /* Typography */
-    h1 {
-        color: #0f172a;
-        font-weight: 700;
-        font-size: 2.25rem;
-        margin-bottom: 1.5rem;
-    }
-    
-    h2 {
-        color: #1e293b;
-        font-weight: 600;
-        font-size: 1.75rem;
-        margin-bottom: 1rem;
-    }
-    
-    h3 {
-        color: #334155;
-        font-weight: 600;
-        font-size: 1.25rem;
-        margin-bottom: 0.75rem;
-    }
-    
-    p {
-        line-height: 1.6;
-    }
-    
-    /* Buttons */
-    .stButton button {
-        background-color: #3b82f6;
-        border: none;
-        color: white;
-        font-weight: 500;
-        padding: 0.5rem 1rem;
-        border-radius: 0.375rem;
-        transition: all 0.2s ease;
-    }
-    
-    .stButton button:hover {
-        background-color: #2563eb;
-        box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1), 0 2px 4px -1px rgba(0, 0, 0, 0.06);
-    }
-    
-    /* Form inputs */
-    .stTextInput input, .stTextArea textarea, .stSelectbox, .stMultiselect {
-        border-radius: 0.375rem;
-        border: 1px solid #cbd5e1;
-    }
-    
-    .stTextInput input:focus, .stTextArea textarea:focus {
-        border-color: #3b82f6;
-        box-shadow: 0 0 0 3px rgba(59, 130, 246, 0.1);
-    }
-    
-    /* Sidebar */
-    .css-1d391kg {
-        background-color: #ffffff;
-        border-right: 1px solid #e2e8f0;
-    }
-    
-    /* Cards and containers */
-    .card {
-        background-color: white;
-        border-radius: 0.5rem;
-        box-shadow: 0 1px 3px 0 rgba(0, 0, 0, 0.1), 0 1px 2px 0 rgba(0, 0, 0, 0.06);
-        padding: 1.5rem;
-        margin-bottom: 1.5rem;
-        transition: all 0.2s ease;
-    }
-    
-    .card:hover {
-        box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1), 0 2px 4px -1px rgba(0, 0, 0, 0.06);
-    }
-    
-    /* Success message */
-    .element-container .stAlert .alert {
-        border-radius: 0.375rem;
-    }
-    
-    /* Responsive adjustments */
-    @media (max-width: 768px) {
-        .card {
-            padding: 1rem;
-        }
-        
-        h1 {
-            font-size: 1.75rem;
-        }
-        
-        h2 {
-            font-size: 1.5rem;
-        }
-    }
-</style>
-""", unsafe_allow_html=True)
-
 def main():
+    # Premium Modern UI CSS (a small loader for the cached stylesheet)
+    with span("inject_stylesheet"):
+        inject_stylesheet()
+    
     # Require secrets before anything else
-    if not secrets_ready():
-        setup_page()
+    with span("secrets_ready"):
+        ready = secrets_ready()
+    if not ready:
+        render_page("Setup")
         return
 
     # Check if user is logged in
     if not check_login_status():
-        login_page()
+        render_page("Login")
         return
     
+    # Attach this session to the shared notification service
+    with span("initialize_notifications"):
+        initialize_notifications()
+    
     # Sidebar navigation with premium design
-    with st.sidebar:
-        try:
-            st.image("app/assets/logo.png", width=150, use_column_width=False)
-        except:
-            st.title("Tour Flow")
+    with st.sidebar, span("sidebar"):
+        render_logo(width=150)
         
         st.markdown("---")
         
+        # Pages switch the menu by setting st.session_state.page
+        menu_pages = ["Dashboard", "Upload Plan", "Tour Flow", "Suggestions"]
+        requested = st.session_state.get("page")
+        
         selected = option_menu(
             menu_title=None,
-            options=["Dashboard", "Upload Plan", "Tour Flow", "Suggestions"],
+            options=menu_pages,
             icons=["speedometer2", "cloud-upload", "map", "lightbulb"],
             menu_icon="cast",
-            default_index=0,
+            default_index=menu_pages.index(requested) if requested in menu_pages else 0,
             styles={
                 "container": {"padding": "0px", "background-color": "transparent"},
                 "icon": {"color": "#3b82f6", "font-size": "18px"},
@@ -218,7 +130,7 @@ def main():
             col1, col2 = st.columns([1, 3])
             with col1:
                 if user.get("picture"):
-                    st.image(user.get("picture"), width=40)
+                    render_avatar(user.get("picture"), width=40)
                 else:
                     st.markdown("👤")
             with col2:
@@ -227,21 +139,17 @@ def main():
         
         # Sign out button
         if st.button("Sign Out", key="sign_out_btn"):
-            st.session_state.logged_in = False
+            stop_notifications()
             # Don't clear API keys to avoid re-entering them
-            st.session_state.user_info = None
-            st.session_state.credentials = None
-            st.experimental_rerun()
+            sign_out()
+            st.rerun()
     
     # Page routing
-    if selected == "Dashboard":
-        dashboard_page()
-    elif selected == "Upload Plan":
-        upload_page()
-    elif selected == "Tour Flow":
-        flow_page()
-    elif selected == "Suggestions":
-        suggestions_page()
+    st.session_state.page = selected
+    render_page(selected)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    # Span timings of this rerun, for the admin performance panel
+    with profile_rerun():
+        main()
+    render_perf_panel()
@@ -1,16 +1,29 @@
 import streamlit as st
 import datetime
-from utils.notifications import display_notification_bell, get_all_notifications, mark_notification_as_read
-from utils.parser import find_current_item, generate_next_items
+from utils.notifications import (
+    display_notification_bell,
+    get_notification_count,
+    get_notifications_page,
+    get_unread_count,
+    mark_notification_as_read,
+    mark_all_notifications_as_read,
+)
+from utils.parser import generate_next_items
+from utils.itinerary import get_itinerary, find_current_item_id, get_item_position
+from utils.fragments import fragment
 from components.tour_card_component import render_current_activity, render_next_activities
 
+# Notifications shown per inbox page
+NOTIFICATIONS_PER_PAGE = 5
+
 def dashboard_page():
     """Display the dashboard page"""
     # Display notification bell
     display_notification_bell()
     
-    # Check if we have an itinerary in session state
-    if 'itinerary' not in st.session_state or not st.session_state.itinerary:
+    # Check if the user has an itinerary
+    itinerary = get_itinerary()
+    if not itinerary:
         # Show welcome message
         st.header("Welcome to Tour Flow!")
         
@@ -29,7 +42,7 @@ def dashboard_page():
         if st.button("➕ Create New Tour Plan"):
             # Switch to upload page
             st.session_state.page = "Upload Plan"
-            st.experimental_rerun()
+            st.rerun()
             
         # Display sample itinerary
         st.markdown("### Example Tour Flow")
@@ -56,28 +69,13 @@ def dashboard_page():
     st.subheader(f"Today: {today.strftime('%A, %B %d, %Y')}")
     
     # Get current and next activities
-    itinerary = st.session_state.itinerary
-    current_idx = find_current_item(itinerary)
-    current_item = itinerary[current_idx] if 0 <= current_idx < len(itinerary) else None
-    next_items = generate_next_items(itinerary, current_idx)
+    current_id = find_current_item_id()
+    current_idx = get_item_position(current_id) if current_id else None
+    current_item = itinerary[current_idx] if current_idx is not None else None
+    next_items = generate_next_items(itinerary, current_idx) if current_idx is not None else []
     
-    # Show notifications panel if there are any
-    notifications = get_all_notifications()
-    if notifications:
-        with st.expander("📬 Notifications", expanded=True):
-            for notification in notifications:
-                # Display each notification
-                with st.container():
-                    st.markdown(f"**{notification['title']}**")
-                    st.markdown(notification['message'])
-                    
-                    # Button to mark as read
-                    if not notification.get('is_read', False):
-                        if st.button("Mark as read", key=f"read_{notification['id']}"):
-                            mark_notification_as_read(notification['id'])
-                            st.experimental_rerun()
-                    
-                    st.markdown("---")
+    # Show notifications panel if there are any (reruns on its own)
+    render_notifications_panel()
     
     # Display current activity if available
     if current_item:
@@ -103,11 +101,61 @@ def dashboard_page():
         today_items = [item for item in itinerary if item.get('date') == today]
         
         if today_items:
+            # Simplified cards for overview, sent as one markdown element
+            lines = []
             for item in today_items:
-                # Simplified card for overview
-                st.markdown(f"**{item.get('time', '')}** - {item.get('activity', '')}")
+                lines.append(f"**{item.get('time', '')}** - {item.get('activity', '')}\n")
                 if item.get('location'):
-                    st.markdown(f"📍 {item['location']}")
-                st.markdown("---")
+                    lines.append(f"📍 {item['location']}\n")
+                lines.append("---\n")
+            st.markdown("\n".join(lines))
         else:
-            st.info("No activities scheduled for today") 
\ No newline at end of file
+            st.info("No activities scheduled for today") 
+
+def _set_notification_page(page: int):
+    st.session_state.notification_page = page
+
+@fragment
+def render_notifications_panel():
+    """Notifications expander; paging and mark-as-read only rerun this fragment"""
+    total_notifications = get_notification_count()
+    if total_notifications:
+        unread_count = get_unread_count()
+        title = f"📬 Notifications ({unread_count} unread)" if unread_count else "📬 Notifications"
+        with st.expander(title, expanded=unread_count > 0):
+            render_notification_inbox(total_notifications, unread_count)
+
+def render_notification_inbox(total: int, unread_count: int):
+    """Render one page of the notification inbox with paging controls"""
+    page_count = (total + NOTIFICATIONS_PER_PAGE - 1) // NOTIFICATIONS_PER_PAGE
+    page = min(st.session_state.get('notification_page', 0), page_count - 1)
+    
+    # Actions run as callbacks, so the fragment rerun already shows their result
+    if unread_count > 1:
+        st.button("Mark all as read", key="read_all_notifications", on_click=mark_all_notifications_as_read)
+    
+    # Only the current page is rendered, however long the history is
+    for notification in get_notifications_page(page, NOTIFICATIONS_PER_PAGE):
+        with st.container():
+            st.markdown(f"**{notification['title']}**")
+            st.markdown(notification['message'])
+            
+            # Button to mark as read
+            if not notification.get('is_read', False):
+                st.button("Mark as read", key=f"read_{notification['id']}",
+                          on_click=mark_notification_as_read, args=(notification['id'],))
+            
+            st.markdown("---")
+    
+    if page_count > 1:
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            st.button("◀ Newer", key="notifications_newer", disabled=page == 0,
+                      on_click=_set_notification_page, args=(page - 1,))
+        with col2:
+            first = page * NOTIFICATIONS_PER_PAGE + 1
+            last = min(total, first + NOTIFICATIONS_PER_PAGE - 1)
+            st.markdown(f"<div style='text-align: center;'>{first}–{last} of {total}</div>", unsafe_allow_html=True)
+        with col3:
+            st.button("Older ▶", key="notifications_older", disabled=page >= page_count - 1,
+                      on_click=_set_notification_page, args=(page + 1,))
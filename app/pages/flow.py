@@ -1,31 +1,131 @@
 import streamlit as st
-import pandas as pd
-from utils.parser import find_current_item, generate_next_items
-from components.tour_card_component import render_tour_card
+from utils.itinerary import (
+    get_itinerary, find_current_item_id, is_itinerary_shared, get_itinerary_version, move_item, remove_item,
+    reset_itinerary
+)
+from components.tour_card_component import render_tour_cards
+from components.flow_chart import render_flow_chart
+from utils.export import EXPORT_FORMATS, available_formats, export_itinerary
+from utils.calendar_export import export_calendar
 from utils.notifications import display_notification_bell
+from utils.fragments import fragment
 
-def flow_page():
-    """Display the tour flow page"""
-    # Display notification bell
-    display_notification_bell()
+# Cards shown per page of the timeline
+TIMELINE_PAGE_SIZES = [10, 25, 50]
+
+def group_by_day(items):
+    """
+    Group items by date, keeping their positions in the list
     
-    st.header("Your Tour Flow")
+    Args:
+        items: Itinerary items in display order
+        
+    Returns:
+        List of (date, [(position, item), ...]) tuples in date order, undated items last
+    """
+    days = {}
+    for i, item in enumerate(items):
+        days.setdefault(item.get('date'), []).append((i, item))
+    return sorted(days.items(), key=lambda day: (day[0] is None, day[0] or 0))
+
+def _step_timeline(key, delta, count):
+    st.session_state[key] = min(max(st.session_state.get(key, 0) + delta, 0), count - 1)
+
+def _render_timeline_nav(key, count, format_func):
+    """Previous/next buttons around a jump selector bound to st.session_state[key]"""
+    if st.session_state.get(key, 0) >= count:
+        st.session_state[key] = count - 1
     
-    # Check if we have an itinerary in session state
-    if 'itinerary' not in st.session_state or not st.session_state.itinerary:
-        # Show empty state
-        st.info("You don't have a tour plan yet. Please upload or create one in the Upload Plan page.")
+    col1, col2, col3 = st.columns([1, 3, 1])
+    with col1:
+        st.button("⬅️ Previous", key=f"{key}_prev", on_click=_step_timeline, args=(key, -1, count),
+                  disabled=st.session_state.get(key, 0) <= 0, use_container_width=True)
+    with col2:
+        st.selectbox("Jump to", options=range(count), format_func=format_func, key=key,
+                     label_visibility="collapsed")
+    with col3:
+        st.button("Next ➡️", key=f"{key}_next", on_click=_step_timeline, args=(key, 1, count),
+                  disabled=st.session_state.get(key, 0) >= count - 1, use_container_width=True)
+
+def render_timeline_window(items, filters):
+    """
+    Render the timeline controls and pick the slice of items to show
+    
+    Args:
+        items: Filtered itinerary items
+        filters: Current filter values (the window resets when they change)
         
-        # Quick action button
-        if st.button("➕ Create New Tour Plan"):
-            # Switch to upload page
-            st.session_state.page = "Upload Plan"
-            st.experimental_rerun()
-            
-        return
+    Returns:
+        List of (position in ``items``, item) pairs to render
+    """
+    # Start from the first page again whenever the filters change
+    if st.session_state.get('timeline_filters') != filters:
+        st.session_state.timeline_filters = filters
+        st.session_state.timeline_page = 0
+        st.session_state.timeline_day = 0
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        view = st.radio("Show", options=["By page", "By day"], horizontal=True, key="timeline_view")
+    with col2:
+        page_size = st.selectbox("Per page", options=TIMELINE_PAGE_SIZES, key="timeline_page_size",
+                                 disabled=view == "By day")
+    
+    if view == "By day":
+        days = group_by_day(items)
+        _render_timeline_nav(
+            "timeline_day", len(days),
+            lambda i: f"{days[i][0].strftime('%A, %m/%d/%Y') if days[i][0] else 'No date'} ({len(days[i][1])})"
+        )
+        return days[st.session_state.timeline_day][1]
+    
+    page_count = (len(items) + page_size - 1) // page_size
+    _render_timeline_nav(
+        "timeline_page", page_count,
+        lambda i: f"Page {i + 1} of {page_count} · items {i * page_size + 1}–{min((i + 1) * page_size, len(items))}"
+    )
+    offset = st.session_state.timeline_page * page_size
+    return list(enumerate(items[offset:offset + page_size], start=offset))
+
+def render_card_actions(window, total):
+    """
+    Action buttons for the activity picked from the current window
+    
+    Args:
+        window: List of (position, item) pairs being shown
+        total: Number of items in the filtered timeline
+    """
+    positions = {item['id']: i for i, item in window}
+    items = {item['id']: item for _, item in window}
+    
+    if st.session_state.get('flow_selected_item') not in positions:
+        st.session_state.pop('flow_selected_item', None)
     
-    # User has an itinerary, display the flow
-    itinerary = st.session_state.itinerary
+    col1, col2 = st.columns([2, 3])
+    with col1:
+        item_id = st.selectbox(
+            "Activity",
+            options=list(positions),
+            format_func=lambda item_id: f"{items[item_id].get('time', '')} {items[item_id].get('activity', '')}",
+            key="flow_selected_item",
+            label_visibility="collapsed"
+        )
+    with col2:
+        i = positions[item_id]
+        cols = st.columns(4)
+        cols[0].button("✏️ Edit", key=f"edit_{item_id}", use_container_width=True)
+        # Edits only change this traveller's copy of the shared tour
+        cols[1].button("🗑️ Delete", key=f"delete_{item_id}", use_container_width=True,
+                       on_click=remove_item, args=(item_id,))
+        cols[2].button("⬆️ Move Up", key=f"up_{item_id}", disabled=i == 0, use_container_width=True,
+                       on_click=move_item, args=(item_id, -1))
+        cols[3].button("⬇️ Move Down", key=f"down_{item_id}", disabled=i >= total - 1, use_container_width=True,
+                       on_click=move_item, args=(item_id, 1))
+
+@fragment
+def render_timeline():
+    """Filters, the timeline window and the card action bar (reruns as a fragment)"""
+    itinerary = get_itinerary()
     
     # Filter options
     st.markdown("### Filter Your Tour Flow")
@@ -75,39 +175,73 @@ def flow_page():
     st.markdown("### Tour Timeline")
     
     # Find current activity
-    current_idx = find_current_item(itinerary)
+    current_id = find_current_item_id()
     
     # If we have no items after filtering
     if not filtered_itinerary:
         st.info("No activities match your filter criteria.")
         return
     
-    # Create the flow visualization
-    for i, item in enumerate(filtered_itinerary):
-        # Check if this is the current item in the original itinerary
-        original_idx = itinerary.index(item)
-        is_current = (original_idx == current_idx)
-        
-        # Create columns for the card and actions
-        col1, col2 = st.columns([3, 1])
-        
-        with col1:
-            # Render the card
-            render_tour_card(item, is_current=is_current)
+    # Only one window of the timeline is rendered, so the widget count per
+    # rerun stays the same however long the itinerary is
+    window = render_timeline_window(filtered_itinerary, (selected_date, selected_type, search_term))
+    
+    # Cards go out as one markdown element per day of the window
+    for day, day_items in group_by_day([item for _, item in window]):
+        if day:
+            st.markdown(f"#### {day.strftime('%A, %m/%d/%Y')}")
+        render_tour_cards([item for _, item in day_items], current_id=current_id)
+    
+    # One action bar for the window instead of buttons beside every card
+    render_card_actions(window, len(filtered_itinerary))
+
+def _prepare_export():
+    st.session_state._itinerary_export = (get_itinerary_version(), st.session_state.export_format)
+
+def _discard_itinerary_export():
+    st.session_state.pop('_itinerary_export', None)
+
+def _prepare_calendar():
+    # Only events added or changed since the last export are serialized again
+    st.session_state._calendar_export = (get_itinerary_version(), export_calendar(get_itinerary()))
+
+def _discard_calendar_export():
+    st.session_state.pop('_calendar_export', None)
+
+def flow_page():
+    """Display the tour flow page"""
+    # Display notification bell
+    display_notification_bell()
+    
+    st.header("Your Tour Flow")
+    
+    # Check if the user has an itinerary
+    itinerary = get_itinerary()
+    if not itinerary:
+        # Show empty state
+        st.info("You don't have a tour plan yet. Please upload or create one in the Upload Plan page.")
         
-        with col2:
-            # Action buttons
-            st.button("✏️ Edit", key=f"edit_{i}")
-            st.button("🗑️ Delete", key=f"delete_{i}")
-            
-            # Spacer
-            st.markdown("<div style='height: 20px;'></div>", unsafe_allow_html=True)
+        # Quick action button
+        if st.button("➕ Create New Tour Plan"):
+            # Switch to upload page
+            st.session_state.page = "Upload Plan"
+            st.rerun()
             
-            # Move buttons
-            if i > 0:
-                st.button("⬆️ Move Up", key=f"up_{i}")
-            if i < len(filtered_itinerary) - 1:
-                st.button("⬇️ Move Down", key=f"down_{i}")
+        return
+    
+    view = st.radio("View", ["Timeline", "Flow Chart"], horizontal=True, key="flow_view")
+    
+    if view == "Flow Chart":
+        # Drawn in the browser; panning and zooming cost no reruns
+        st.markdown("### Tour Flow Chart")
+        render_flow_chart(itinerary, current_id=find_current_item_id())
+    else:
+        # Filters, timeline and card actions rerun on their own
+        render_timeline()
+    
+    if not is_itinerary_shared():
+        st.caption("You have made personal changes to your group's tour plan.")
+        st.button("↩️ Reset to Group Plan", on_click=reset_itinerary)
     
     # Edit modal (in a real app, this would be a proper modal)
     st.markdown("### Edit Activity")
@@ -117,7 +251,7 @@ def flow_page():
     if st.button("➕ Add New Activity"):
         # Redirect to the upload page's manual creation tab
         st.session_state.create_new = True
-        st.experimental_rerun()
+        st.rerun()
     
     # Export options
     st.markdown("### Export Options")
@@ -125,13 +259,33 @@ def flow_page():
     col1, col2 = st.columns(2)
     
     with col1:
-        if st.button("📤 Export as CSV"):
-            # Convert to DataFrame for export
-            df = pd.DataFrame(itinerary)
-            # In a real app, this would download a CSV file
-            st.success("In a real app, this would download a CSV file.")
+        export_format = st.selectbox("Format", available_formats(), key="export_format")
+        extension, mime = EXPORT_FORMATS[export_format]
+        # Built only when asked for, once per itinerary version and format
+        version = get_itinerary_version()
+        if st.session_state.get('_itinerary_export') == (version, export_format):
+            st.download_button(
+                f"📤 Download {export_format}",
+                data=export_itinerary(version, export_format, itinerary),
+                file_name=f"tour_itinerary.{extension}",
+                mime=mime,
+                key="export_download",
+                on_click=_discard_itinerary_export
+            )
+        else:
+            st.button(f"📤 Prepare {export_format} Export", key="prepare_export", on_click=_prepare_export)
     
     with col2:
-        if st.button("📱 Export to Calendar"):
-            # In a real app, this would export to calendar
-            st.success("In a real app, this would export to your calendar app.") 
\ No newline at end of file
+        # Built only when asked for, and kept until downloaded or the itinerary changes
+        prepared = st.session_state.get('_calendar_export')
+        if prepared and prepared[0] == get_itinerary_version():
+            st.download_button(
+                "📱 Download Calendar (.ics)",
+                data=prepared[1],
+                file_name="tour_itinerary.ics",
+                mime="text/calendar",
+                key="export_calendar",
+                on_click=_discard_calendar_export
+            )
+        else:
+            st.button("📅 Prepare Calendar", key="prepare_calendar", on_click=_prepare_calendar) 
\ No newline at end of file
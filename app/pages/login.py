@@ -1,4 +1,5 @@
 import streamlit as st
+import uuid
 from utils.auth import sign_in_with_google
 
 def login_page():
@@ -41,7 +42,7 @@ def login_page():
                         <p>Redirecting to dashboard...</p>
                     </div>
                 """, unsafe_allow_html=True)
-                st.experimental_rerun()
+                st.rerun()
         
         # Quick demo login option
         st.markdown("<div style='margin-top: 1.5rem; text-align: center;'>", unsafe_allow_html=True)
@@ -54,7 +55,9 @@ def login_page():
             st.session_state.user_info = {
                 "name": "Demo User",
                 "email": "demo@example.com",
-                "picture": ""
+                "picture": "",
+                # Shared account: data is kept per demo sign-in, not per email
+                "demo": uuid.uuid4().hex[:12]
             }
             
             # Make sure Gemini API key is set to avoid redirect to setup
@@ -70,7 +73,7 @@ def login_page():
             if "GOOGLE_CLIENT_SECRET" not in st.session_state:
                 st.session_state["GOOGLE_CLIENT_SECRET"] = "demo_client_secret"
                 
-            st.experimental_rerun()
+            st.rerun()
             
         st.markdown("</div>", unsafe_allow_html=True)
         
@@ -133,7 +133,7 @@ def setup_page():
                 </style>
                 """, unsafe_allow_html=True)
                 
-                st.experimental_rerun()
+                st.rerun()
     
     # Close the form container
     st.markdown("</div>", unsafe_allow_html=True)
@@ -1,9 +1,191 @@
 import streamlit as st
 import datetime
-from utils.parser import find_current_item
-from utils.ai_suggestions import get_nearby_suggestions, get_meal_suggestions
+from utils.itinerary import get_itinerary, find_current_item_id, get_item, get_tour
+from utils.ai_suggestions import get_nearby_suggestions, get_meal_suggestions, rank_suggestions
+from utils.poi import get_poi_store
 from components.tour_card_component import render_suggestion_card
 from utils.notifications import display_notification_bell, add_notification
+from utils.fragments import fragment
+from utils.session_store import session_get, session_set
+
+def find_local_suggestions(item, category, limit=5):
+    """Find nearby places for an itinerary item in the offline POI store"""
+    store = get_poi_store()
+    if store is None:
+        return []
+    
+    # Prefer geocoded coordinates, then match the text against known places
+    if item.get('lat') is not None and item.get('lon') is not None:
+        coords = (item['lat'], item['lon'])
+    else:
+        coords = store.locate(item.get('location', '')) or store.locate(item.get('activity', ''))
+    if not coords:
+        return []
+    
+    return store.nearby(coords[0], coords[1], category=category, limit=limit)
+
+@fragment
+def render_attraction_suggestions(current_item):
+    """Nearby attractions tab (reruns as a fragment)"""
+    current_location = current_item.get('location', 'Unknown location')
+    
+    st.markdown("### Nearby Attractions")
+    
+    # Suggestions are shared by everyone on the tour, per itinerary item
+    tour = get_tour()
+    nearby_attractions = tour.get_suggestions(current_item['id'], 'attraction')
+    
+    # Button to get suggestions (refreshing only reruns this tab)
+    find = st.button("🔍 Find Nearby Attractions")
+    if nearby_attractions and st.button("🔄 Refresh", key="refresh_attractions"):
+        nearby_attractions = None
+        find = True
+    
+    if find or nearby_attractions:
+        if not nearby_attractions:
+            with st.spinner("Finding nearby attractions..."):
+                # Get suggestions from the local dataset (AI only ranks them)
+                try:
+                    local = find_local_suggestions(current_item, 'attraction')
+                    if local:
+                        suggestions = rank_suggestions(current_location, local, 'attraction')
+                    else:
+                        suggestions = get_nearby_suggestions(current_location, 'attraction')
+                    nearby_attractions = suggestions
+                    tour.set_suggestions(current_item['id'], 'attraction', nearby_attractions)
+                except Exception as e:
+                    st.error(f"Error getting suggestions: {e}")
+    
+                    # For demo, provide sample suggestions if API fails
+                    # (only for this run; they are not shared with the tour)
+                    nearby_attractions = [
+                        {
+                            "name": "Central Park",
+                            "type": "Park",
+                            "description": "Iconic urban park with walking paths, lakes, and open spaces.",
+                            "estimated_time": "2-3 hours"
+                        },
+                        {
+                            "name": "Metropolitan Museum of Art",
+                            "type": "Museum",
+                            "description": "World-class art museum with extensive collections.",
+                            "estimated_time": "3-4 hours"
+                        },
+                        {
+                            "name": "Top of the Rock",
+                            "type": "Observation Deck",
+                            "description": "Spectacular views of Manhattan from Rockefeller Center.",
+                            "estimated_time": "1 hour"
+                        }
+                    ]
+    
+        # Display suggestions
+        for suggestion in nearby_attractions:
+            render_suggestion_card(suggestion, "attr")
+
+@fragment
+def render_restaurant_suggestions(current_item):
+    """Restaurants tab (reruns as a fragment)"""
+    current_location = current_item.get('location', 'Unknown location')
+    
+    st.markdown("### Restaurant Suggestions")
+    
+    # Check time of day for meal type suggestion
+    now = datetime.datetime.now()
+    hour = now.hour
+    
+    if 6 <= hour < 11:
+        meal_type = "breakfast"
+    elif 11 <= hour < 15:
+        meal_type = "lunch"
+    elif 17 <= hour < 22:
+        meal_type = "dinner"
+    else:
+        meal_type = "meal"
+    
+    # Suggestions are shared by everyone on the tour, per itinerary item and meal
+    tour = get_tour()
+    category = f"restaurant:{meal_type}"
+    nearby_restaurants = tour.get_suggestions(current_item['id'], category)
+    
+    # Button to get suggestions (refreshing only reruns this tab)
+    find = st.button(f"🍽️ Find {meal_type.title()} Places")
+    if nearby_restaurants and st.button("🔄 Refresh", key="refresh_restaurants"):
+        nearby_restaurants = None
+        find = True
+    
+    if find or nearby_restaurants:
+        if not nearby_restaurants:
+            with st.spinner(f"Finding {meal_type} places..."):
+                # Get suggestions from the local dataset (AI only ranks them)
+                try:
+                    local = find_local_suggestions(current_item, 'restaurant')
+                    if local:
+                        suggestions = rank_suggestions(current_location, local, meal_type)
+                    else:
+                        suggestions = get_meal_suggestions(current_location, meal_type)
+                    nearby_restaurants = suggestions
+                    tour.set_suggestions(current_item['id'], category, nearby_restaurants)
+    
+                    # Add a meal notification
+                    add_notification(
+                        f"Time for {meal_type}!",
+                        f"Here are some {meal_type} suggestions near {current_location}"
+                    )
+                except Exception as e:
+                    st.error(f"Error getting suggestions: {e}")
+    
+                    # For demo, provide sample suggestions if API fails
+                    # (only for this run; they are not shared with the tour)
+                    nearby_restaurants = [
+                        {
+                            "name": "The Local Grill",
+                            "cuisine": "American",
+                            "description": "Casual dining with burgers and steaks.",
+                            "price_range": "$$"
+                        },
+                        {
+                            "name": "Pasta Palace",
+                            "cuisine": "Italian",
+                            "description": "Authentic Italian pasta and pizza.",
+                            "price_range": "$$"
+                        },
+                        {
+                            "name": "Sushi Spot",
+                            "cuisine": "Japanese",
+                            "description": "Fresh sushi and Japanese specialties.",
+                            "price_range": "$$$"
+                        }
+                    ]
+    
+        # Display suggestions
+        for suggestion in nearby_restaurants:
+            render_suggestion_card(suggestion, "rest")
+
+def remove_favorite(favorite):
+    """Remove a place from the user's saved favorites"""
+    session_set('saved_favorites', [f for f in session_get('saved_favorites', []) if f != favorite])
+
+@fragment
+def render_saved_favorites():
+    """Saved favorites list (reruns as a fragment)"""
+    st.markdown("---")
+    st.subheader("Your Saved Favorites")
+    
+    # Favorites are kept in the session store
+    saved_favorites = session_get('saved_favorites', [])
+    
+    if not saved_favorites:
+        st.info("You haven't saved any favorites yet. Click 'Add to Plan' on any suggestion to save it!")
+    else:
+        # Display saved favorites
+        for favorite in saved_favorites:
+            with st.container():
+                st.markdown(f"**{favorite.get('name', 'Unknown place')}**")
+                st.markdown(favorite.get('description', ''))
+                st.button("🗑️ Remove", key=f"remove_{favorite.get('name', '').replace(' ', '_').lower()}",
+                          on_click=remove_favorite, args=(favorite,))
+                st.markdown("---")
 
 def suggestions_page():
     """Display the suggestions page"""
@@ -12,8 +194,8 @@ def suggestions_page():
     
     st.header("Personalized Suggestions")
     
-    # Check if we have an itinerary in session state
-    if 'itinerary' not in st.session_state or not st.session_state.itinerary:
+    # Check if the user has an itinerary
+    if not get_itinerary():
         # Show empty state
         st.info("You don't have a tour plan yet. Please upload or create one in the Upload Plan page.")
         
@@ -21,22 +203,19 @@ def suggestions_page():
         if st.button("➕ Create New Tour Plan"):
             # Switch to upload page
             st.session_state.page = "Upload Plan"
-            st.experimental_rerun()
+            st.rerun()
             
         return
     
     # User has an itinerary, display suggestions
-    itinerary = st.session_state.itinerary
-    
     # Find current activity
-    current_idx = find_current_item(itinerary)
+    current_id = find_current_item_id()
+    current_item = get_item(current_id) if current_id else None
     
-    if current_idx < 0 or current_idx >= len(itinerary):
+    if current_item is None:
         st.warning("Could not determine your current activity.")
         return
     
-    current_item = itinerary[current_idx]
-    
     # Display current location
     current_location = current_item.get('location', 'Unknown location')
     current_activity = current_item.get('activity', 'Unknown activity')
@@ -53,117 +232,16 @@ def suggestions_page():
     ])
     
     with tab1:
-        st.markdown("### Nearby Attractions")
-        
-        # Initialize session state for attractions
-        if 'nearby_attractions' not in st.session_state:
-            st.session_state.nearby_attractions = []
-            
-        # Button to get suggestions
-        if st.button("🔍 Find Nearby Attractions") or st.session_state.nearby_attractions:
-            if not st.session_state.nearby_attractions:
-                with st.spinner("Finding nearby attractions..."):
-                    # Get suggestions from AI
-                    try:
-                        suggestions = get_nearby_suggestions(current_location, 'attraction')
-                        st.session_state.nearby_attractions = suggestions
-                    except Exception as e:
-                        st.error(f"Error getting suggestions: {e}")
-                        
-                        # For demo, provide sample suggestions if API fails
-                        st.session_state.nearby_attractions = [
-                            {
-                                "name": "Central Park",
-                                "type": "Park",
-                                "description": "Iconic urban park with walking paths, lakes, and open spaces.",
-                                "estimated_time": "2-3 hours"
-                            },
-                            {
-                                "name": "Metropolitan Museum of Art",
-                                "type": "Museum",
-                                "description": "World-class art museum with extensive collections.",
-                                "estimated_time": "3-4 hours"
-                            },
-                            {
-                                "name": "Top of the Rock",
-                                "type": "Observation Deck",
-                                "description": "Spectacular views of Manhattan from Rockefeller Center.",
-                                "estimated_time": "1 hour"
-                            }
-                        ]
-            
-            # Display suggestions
-            for suggestion in st.session_state.nearby_attractions:
-                render_suggestion_card(suggestion, "attr")
+        render_attraction_suggestions(current_item)
     
     with tab2:
-        st.markdown("### Restaurant Suggestions")
-        
-        # Initialize session state for restaurants
-        if 'nearby_restaurants' not in st.session_state:
-            st.session_state.nearby_restaurants = []
-        
-        # Check time of day for meal type suggestion
-        now = datetime.datetime.now()
-        hour = now.hour
-        
-        if 6 <= hour < 11:
-            meal_type = "breakfast"
-        elif 11 <= hour < 15:
-            meal_type = "lunch"
-        elif 17 <= hour < 22:
-            meal_type = "dinner"
-        else:
-            meal_type = "meal"
-        
-        # Button to get suggestions
-        if st.button(f"🍽️ Find {meal_type.title()} Places") or st.session_state.nearby_restaurants:
-            if not st.session_state.nearby_restaurants:
-                with st.spinner(f"Finding {meal_type} places..."):
-                    # Get suggestions from AI
-                    try:
-                        suggestions = get_meal_suggestions(current_location, meal_type)
-                        st.session_state.nearby_restaurants = suggestions
-                        
-                        # Add a meal notification
-                        add_notification(
-                            f"Time for {meal_type}!",
-                            f"Here are some {meal_type} suggestions near {current_location}"
-                        )
-                    except Exception as e:
-                        st.error(f"Error getting suggestions: {e}")
-                        
-                        # For demo, provide sample suggestions if API fails
-                        st.session_state.nearby_restaurants = [
-                            {
-                                "name": "The Local Grill",
-                                "cuisine": "American",
-                                "description": "Casual dining with burgers and steaks.",
-                                "price_range": "$$"
-                            },
-                            {
-                                "name": "Pasta Palace",
-                                "cuisine": "Italian",
-                                "description": "Authentic Italian pasta and pizza.",
-                                "price_range": "$$"
-                            },
-                            {
-                                "name": "Sushi Spot",
-                                "cuisine": "Japanese",
-                                "description": "Fresh sushi and Japanese specialties.",
-                                "price_range": "$$$"
-                            }
-                        ]
-            
-            # Display suggestions
-            for suggestion in st.session_state.nearby_restaurants:
-                render_suggestion_card(suggestion, "rest")
+        render_restaurant_suggestions(current_item)
     
     with tab3:
         st.markdown("### Shopping Suggestions")
         
-        # Sample shopping suggestions (in a real app, these would come from the API)
-        shopping_suggestions = [
+        # Nearby shops from the local dataset, with samples as a fallback
+        shopping_suggestions = find_local_suggestions(current_item, 'shopping') or [
             {
                 "name": "Local Artisan Market",
                 "type": "Market",
@@ -188,8 +266,8 @@ def suggestions_page():
     with tab4:
         st.markdown("### Local Events")
         
-        # Sample events (in a real app, these would come from the API)
-        events = [
+        # Nearby events from the local dataset, with samples as a fallback
+        events = find_local_suggestions(current_item, 'event') or [
             {
                 "name": "Farmers Market",
                 "type": "Market",
@@ -212,22 +290,4 @@ def suggestions_page():
             render_suggestion_card(event, "event")
     
     # Add ability to save favorites
-    st.markdown("---")
-    st.subheader("Your Saved Favorites")
-    
-    # Initialize saved favorites in session state
-    if 'saved_favorites' not in st.session_state:
-        st.session_state.saved_favorites = []
-    
-    if not st.session_state.saved_favorites:
-        st.info("You haven't saved any favorites yet. Click 'Add to Plan' on any suggestion to save it!")
-    else:
-        # Display saved favorites
-        for favorite in st.session_state.saved_favorites:
-            with st.container():
-                st.markdown(f"**{favorite.get('name', 'Unknown place')}**")
-                st.markdown(favorite.get('description', ''))
-                if st.button("🗑️ Remove", key=f"remove_{favorite.get('name', '').replace(' ', '_').lower()}"):
-                    st.session_state.saved_favorites.remove(favorite)
-                    st.experimental_rerun()
-                st.markdown("---") 
\ No newline at end of file
+    render_saved_favorites()
@@ -1,12 +1,17 @@
 import streamlit as st
-import pandas as pd
 import datetime
-from utils.parser import parse_tour_agenda
-from utils.notifications import schedule_notification_for_next_item
+from utils.parser import parse_tour_agenda, new_item_id
+from utils.itinerary import get_itinerary, set_itinerary
+from utils.notifications import schedule_itinerary_notifications
 from utils.ai_suggestions import get_place_insights
+from utils.geocoding import geocode_itinerary
+from utils.session_store import session_get, session_set
 
 def upload_page():
     """Display the upload plan page"""
+    # pandas is only needed for the tables on this page
+    import pandas as pd
+    
     st.header("Upload Your Tour Plan")
     
     # Instructions
@@ -55,9 +60,8 @@ def upload_page():
         # Manual creation
         st.markdown("### Create Your Tour Agenda Manually")
         
-        # Initialize session state for manual creation
-        if 'manual_items' not in st.session_state:
-            st.session_state.manual_items = []
+        # Manual items live in the session store, not in session state
+        manual_items = session_get('manual_items', [])
         
         # Form for adding new items
         with st.form("add_item_form"):
@@ -95,6 +99,7 @@ def upload_page():
             if submitted:
                 # Create a new item
                 new_item = {
+                    "id": new_item_id(),
                     "date": activity_date,
                     "time": activity_time.strftime("%-I:%M %p"),
                     "activity": activity_name,
@@ -106,16 +111,17 @@ def upload_page():
                 if notes:
                     new_item["notes"] = [notes]
                 
-                # Add to session state
-                st.session_state.manual_items.append(new_item)
+                # Save the new list back to the session store
+                manual_items = manual_items + [new_item]
+                session_set('manual_items', manual_items)
                 st.success("Item added to itinerary!")
         
         # Display the current manual items
-        if st.session_state.manual_items:
+        if manual_items:
             st.markdown("### Current Itinerary Items")
             
             # Convert to DataFrame for display
-            df = pd.DataFrame(st.session_state.manual_items)
+            df = pd.DataFrame(manual_items)
             
             # Format the display columns
             display_df = df[['date', 'time', 'activity', 'location', 'type']].copy()
@@ -125,19 +131,20 @@ def upload_page():
             
             # Button to process the manual itinerary
             if st.button("Process Manual Itinerary"):
-                process_manual_agenda()
+                process_manual_agenda(manual_items)
             
             # Button to clear the manual itinerary
             if st.button("Clear Manual Itinerary"):
-                st.session_state.manual_items = []
+                session_set('manual_items', [])
                 st.success("Manual itinerary cleared!")
-                st.experimental_rerun()
+                st.rerun()
     
     # Show previous itinerary if it exists
-    if 'itinerary' in st.session_state and st.session_state.itinerary:
+    itinerary = get_itinerary()
+    if itinerary:
         with st.expander("Current Processed Itinerary", expanded=False):
             # Convert to DataFrame for display
-            df = pd.DataFrame(st.session_state.itinerary)
+            df = pd.DataFrame(itinerary)
             
             # Handle missing columns
             required_cols = ['date', 'time', 'activity', 'location', 'type']
@@ -150,11 +157,9 @@ def upload_page():
             
             # Button to clear current itinerary
             if st.button("Clear Current Itinerary"):
-                st.session_state.itinerary = []
-                if 'insights' in st.session_state:
-                    st.session_state.insights = {}
+                set_itinerary([])
                 st.success("Itinerary cleared!")
-                st.experimental_rerun()
+                st.rerun()
 
 def process_agenda(content):
     """Process the agenda content and store in session state"""
@@ -162,8 +167,12 @@ def process_agenda(content):
         # Parse the content
         itinerary = parse_tour_agenda(content)
         
-        # Store in session state
-        st.session_state.itinerary = itinerary
+        # Resolve each unique location to coordinates once
+        resolve_coordinates(itinerary)
+        
+        # Store it, sharing the copy of anyone else on the same tour
+        set_itinerary(itinerary)
+        itinerary = get_itinerary()
         
         # Initialize insights dictionary
         if 'insights' not in st.session_state:
@@ -181,53 +190,50 @@ def process_agenda(content):
         # Add a button to view the tour flow
         if st.button("View Tour Flow"):
             # Redirect to the tour flow page
-            st.experimental_rerun()
+            st.rerun()
 
-def process_manual_agenda():
+def process_manual_agenda(manual_items):
     """Process the manually created agenda"""
-    if not st.session_state.manual_items:
+    if not manual_items:
         st.warning("No items in manual itinerary!")
         return
     
-    # Store in session state
-    st.session_state.itinerary = st.session_state.manual_items
+    # Resolve each unique location to coordinates once
+    resolve_coordinates(manual_items)
+    
+    # Store it, sharing the copy of anyone else on the same tour
+    set_itinerary(manual_items)
+    itinerary = get_itinerary()
     
     # Initialize insights dictionary
     if 'insights' not in st.session_state:
         st.session_state.insights = {}
     
     # Schedule notifications for the next few items
-    schedule_notifications(st.session_state.manual_items)
+    schedule_notifications(itinerary)
     
     # Get insights for locations (background task in real app)
-    fetch_insights_for_locations(st.session_state.manual_items)
+    fetch_insights_for_locations(itinerary)
     
     # Show success message
-    st.success(f"Successfully processed {len(st.session_state.manual_items)} itinerary items!")
+    st.success(f"Successfully processed {len(itinerary)} itinerary items!")
     
     # Add a button to view the tour flow
     if st.button("View Tour Flow"):
         # Redirect to the tour flow page
-        st.experimental_rerun()
+        st.rerun()
+
+def resolve_coordinates(itinerary):
+    """Store lat/lon on the itinerary items from the geocoding cache/provider"""
+    try:
+        geocode_itinerary(itinerary)
+    except Exception as e:
+        print(f"Error geocoding itinerary: {e}")
 
 def schedule_notifications(itinerary):
     """Schedule notifications for the itinerary items"""
-    current_time = datetime.datetime.now().time()
-    current_date = datetime.date.today()
-    
-    # Find items that are coming up soon
-    for i, item in enumerate(itinerary):
-        item_date = item.get('date')
-        
-        # Only schedule for today or future dates
-        if not item_date or item_date < current_date:
-            continue
-        
-        # Schedule notification
-        notification_id = schedule_notification_for_next_item(item)
-        if notification_id:
-            # Store the notification ID with the item
-            itinerary[i]['notification_id'] = notification_id
+    # Schedule all upcoming reminders in one batch and remember which item each belongs to
+    st.session_state.item_notifications = schedule_itinerary_notifications(itinerary)
 
 def fetch_insights_for_locations(itinerary):
     """Fetch insights for locations in the itinerary"""
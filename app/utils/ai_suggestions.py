@@ -1,16 +1,21 @@
 import streamlit as st
-import google.generativeai as genai
 from typing import Dict, Any, List
 
+from utils.profiling import profiled
+
 # Configure the Gemini API
 def configure_genai():
-    """Configure the Gemini API with API key from session_state"""
+    """Configure the Gemini API with API key from session_state and return the SDK module"""
     api_key = st.session_state.get("GEMINI_API_KEY")
-    if api_key:
-        genai.configure(api_key=api_key)
-    else:
+    if not api_key:
         raise ValueError("GEMINI_API_KEY is not set. Please enter it in the setup page.")
+    
+    # Imported on first use; the SDK is slow to import and most reruns never call it
+    import google.generativeai as genai
+    genai.configure(api_key=api_key)
+    return genai
 
+@profiled()
 def get_place_insights(location: str, activity_type: str = None) -> Dict[str, Any]:
     """
     Get insights about a location using Gemini API
@@ -23,7 +28,7 @@ def get_place_insights(location: str, activity_type: str = None) -> Dict[str, An
         Dictionary with insights about the place
     """
     try:
-        configure_genai()
+        genai = configure_genai()
         model = genai.GenerativeModel('gemini-1.5-pro')
         
         # Create prompt based on activity type
@@ -81,6 +86,7 @@ def get_place_insights(location: str, activity_type: str = None) -> Dict[str, An
             "description": f"Failed to get insights for {location}"
         }
 
+@profiled()
 def get_nearby_suggestions(location: str, activity_type: str = None) -> List[Dict[str, Any]]:
     """
     Get suggestions for nearby places based on current location and activity type
@@ -93,7 +99,7 @@ def get_nearby_suggestions(location: str, activity_type: str = None) -> List[Dic
         List of dictionaries with suggestions
     """
     try:
-        configure_genai()
+        genai = configure_genai()
         model = genai.GenerativeModel('gemini-1.5-pro')
         
         # Create prompt based on activity type
@@ -150,6 +156,7 @@ def get_nearby_suggestions(location: str, activity_type: str = None) -> List[Dic
             "description": f"Failed to get suggestions: {str(e)}"
         }]
 
+@profiled()
 def get_meal_suggestions(location: str, meal_type: str) -> List[Dict[str, Any]]:
     """
     Get meal suggestions for breakfast, lunch or dinner near a location
@@ -161,4 +168,52 @@ def get_meal_suggestions(location: str, meal_type: str) -> List[Dict[str, Any]]:
     Returns:
         List of dictionaries with meal suggestions
     """
-    return get_nearby_suggestions(location, 'meal') 
\ No newline at end of file
+    return get_nearby_suggestions(location, 'meal') 
+
+@profiled()
+def rank_suggestions(location: str, candidates: List[Dict[str, Any]], activity_type: str = None) -> List[Dict[str, Any]]:
+    """
+    Rank locally found places with Gemini
+
+    The candidates come from the offline POI store, so the model only has to
+    order a short list instead of inventing places. If the call fails the
+    candidates are returned in their original (distance) order.
+    
+    Args:
+        location: Current location
+        candidates: Suggestion dictionaries to rank
+        activity_type: Type of suggestion (meal, attraction, etc.)
+        
+    Returns:
+        The same suggestions, best first
+    """
+    if len(candidates) < 2:
+        return candidates
+    
+    try:
+        genai = configure_genai()
+        model = genai.GenerativeModel('gemini-1.5-pro')
+        
+        names = "\n".join(f"- {c.get('name')} ({c.get('type', '')})" for c in candidates)
+        prompt = f"""
+        A traveller is at {location} looking for {activity_type or 'places'} to visit.
+        Rank these nearby places from most to least recommended:
+        {names}
+        Format as JSON array of the place names, exactly as written above
+        """
+        
+        response = model.generate_content(prompt)
+        
+        import json
+        import re
+        
+        json_match = re.search(r'\[.*\]', response.text, re.DOTALL)
+        if not json_match:
+            return candidates
+        
+        order = {name: i for i, name in enumerate(json.loads(json_match.group(0)))}
+        return sorted(candidates, key=lambda c: order.get(c.get('name'), len(order)))
+    
+    except Exception as e:
+        print(f"Error ranking suggestions: {e}")
+        return candidates
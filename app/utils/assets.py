@@ -0,0 +1,233 @@
+import streamlit as st
+import functools
+import hashlib
+import io
+import mimetypes
+import os
+import urllib.request
+from typing import Dict, Optional
+
+from utils.push_gateway import get_push_gateway, get_public_gateway_url
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets')
+
+# Streamlit serves app/static at app/static/ when server.enableStaticServing
+# is on (see .streamlit/config.toml); the URL is relative to the app's page
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+STATIC_URL = 'app/static'
+
+# Files from app/assets published with content-hash names
+STATIC_ASSETS = ['style.css', 'logo.png']
+
+# Resized avatars are kept here across restarts (can be overridden with AVATAR_CACHE_DIR)
+DEFAULT_AVATAR_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.tour_flow', 'avatars')
+AVATAR_SIZE = 80
+
+def hashed_name(name: str, data: bytes) -> str:
+    """File name with a content hash, e.g. style.3f2a9c1b0d4e.css"""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+
+def _content_type(name: str) -> str:
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    return f"{content_type}; charset=utf-8" if content_type.startswith('text/') else content_type
+
+def static_serving_enabled() -> bool:
+    """Whether Streamlit serves app/static (server.enableStaticServing)"""
+    try:
+        return bool(st.get_option('server.enableStaticServing'))
+    except Exception:
+        return False
+
+def _write_static(static_name: str, data: bytes, stale_prefix: Optional[str] = None) -> Optional[str]:
+    """
+    Put a file in app/static for Streamlit to serve
+
+    Args:
+        static_name: File name, including a content hash
+        data: File contents
+        stale_prefix: Remove other files starting with this (older versions)
+
+    Returns:
+        Relative URL of the file, or None if it could not be written
+    """
+    path = os.path.join(STATIC_DIR, static_name)
+    try:
+        if not os.path.exists(path):
+            os.makedirs(STATIC_DIR, exist_ok=True)
+            # Write then rename, so a half-written file is never served
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        if stale_prefix:
+            for name in os.listdir(STATIC_DIR):
+                if name.startswith(stale_prefix) and name != static_name:
+                    os.remove(os.path.join(STATIC_DIR, name))
+    except OSError as e:
+        print(f"Error writing static file {static_name}: {e}")
+        return None
+    return f"{STATIC_URL}/{static_name}"
+
+def _asset_gateway():
+    """The push gateway, if browsers can reach it at a published URL (otherwise None)"""
+    if not get_public_gateway_url():
+        return None
+    return get_push_gateway()
+
+@st.cache_resource(show_spinner=False)
+def get_static_assets() -> Dict[str, str]:
+    """
+    Publish the app assets once per process
+
+    Assets are written to app/static and served by Streamlit itself when
+    static serving is on (the default). Otherwise they are published on the
+    gateway if PUSH_GATEWAY_PUBLIC_URL is set, and failing that the
+    stylesheet is inlined and the logo sent by Streamlit.
+
+    Returns:
+        Dictionary mapping asset name to its URL (empty if not served)
+    """
+    static = static_serving_enabled()
+    gateway = None if static else _asset_gateway()
+    if not static and gateway is None:
+        return {}
+
+    urls = {}
+    for name in STATIC_ASSETS:
+        try:
+            with open(os.path.join(ASSETS_DIR, name), 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            print(f"Error reading asset {name}: {e}")
+            continue
+        static_name = hashed_name(name, data)
+        if static:
+            url = _write_static(static_name, data, stale_prefix=os.path.splitext(name)[0] + '.')
+            if url:
+                urls[name] = url
+        else:
+            gateway.publish_asset(static_name, data, _content_type(name))
+            urls[name] = f"{get_public_gateway_url()}/static/{static_name}"
+    return urls
+
+def asset_url(name: str) -> Optional[str]:
+    """URL of a published asset, or None if assets are not being served"""
+    # The gateway is only started after sign-in, so the setup and login
+    # screens never spin up its threads (they get the inlined stylesheet)
+    if not static_serving_enabled() and (not st.session_state.get('logged_in') or not get_public_gateway_url()):
+        return None
+    return get_static_assets().get(name)
+
+@functools.lru_cache(maxsize=None)
+def _read_asset_text(name: str) -> str:
+    with open(os.path.join(ASSETS_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+# Streamlit serves static files other than images as text/plain, which
+# browsers refuse as a stylesheet, so the page fetches the file and adds it
+# as a <style> (once per page load; reruns only resend this loader)
+_STYLESHEET_LOADER = """<script>
+const doc = window.parent.document;
+if (!doc.getElementById("{element_id}")) {{
+  fetch(new URL("{url}", window.parent.location.href))
+    .then(response => response.ok ? response.text() : Promise.reject(response.status))
+    .then(css => {{
+      const style = doc.createElement("style");
+      style.id = "{element_id}";
+      style.textContent = css;
+      doc.head.appendChild(style);
+    }})
+    .catch(error => console.error("Error loading stylesheet", error));
+}}
+</script>"""
+
+def inject_stylesheet():
+    """Link the global stylesheet (inlined only when assets are not being served)"""
+    url = asset_url('style.css')
+    if url and static_serving_enabled():
+        import streamlit.components.v1 as components
+        element_id = 'tour-flow-' + os.path.basename(url).replace('.', '-')
+        components.html(_STYLESHEET_LOADER.format(url=url, element_id=element_id), height=0)
+    elif url:
+        st.markdown(f'<link rel="stylesheet" href="{url}">', unsafe_allow_html=True)
+    else:
+        st.markdown(f"<style>{_read_asset_text('style.css')}</style>", unsafe_allow_html=True)
+
+def render_logo(width: int = 150):
+    """Show the app logo in the current container"""
+    url = asset_url('logo.png')
+    if url:
+        st.markdown(f'<img src="{url}" width="{width}" alt="Tour Flow">', unsafe_allow_html=True)
+        return
+    try:
+        st.image(os.path.join(ASSETS_DIR, 'logo.png'), width=width)
+    except Exception:
+        st.title("Tour Flow")
+
+def render_avatar(picture_url: str, width: int = 40):
+    """Show a profile picture (a cached thumbnail where possible)"""
+    url = avatar_url(picture_url)
+    if url and not url.startswith(('http://', 'https://')):
+        # A relative app/static URL, which st.image would treat as a file path
+        st.markdown(f'<img src="{url}" width="{width}" alt="Profile picture">', unsafe_allow_html=True)
+    else:
+        st.image(url, width=width)
+
+def _make_thumbnail(data: bytes, size: int) -> bytes:
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(data)).convert('RGBA')
+    # Crop to a centred square before scaling down
+    side = min(image.size)
+    left = (image.width - side) // 2
+    top = (image.height - side) // 2
+    image = image.crop((left, top, left + side, top + side)).resize((size, size), Image.LANCZOS)
+    output = io.BytesIO()
+    image.save(output, format='PNG', optimize=True)
+    return output.getvalue()
+
+@st.cache_data(show_spinner=False)
+def avatar_url(picture_url: str, size: int = AVATAR_SIZE) -> str:
+    """
+    Get a URL for a small, locally cached copy of a remote avatar
+
+    The avatar is downloaded and resized once, stored on disk and served
+    from app/static (or from the gateway when static serving is off and
+    PUSH_GATEWAY_PUBLIC_URL is set); otherwise, or on any failure, the
+    original URL is returned.
+
+    Args:
+        picture_url: Remote avatar URL (e.g. the Google profile picture)
+        size: Thumbnail width and height in pixels
+
+    Returns:
+        Thumbnail URL, or ``picture_url`` if it could not be proxied
+    """
+    static = static_serving_enabled()
+    gateway = None if static else _asset_gateway()
+    if (not static and gateway is None) or not picture_url:
+        return picture_url
+
+    cache_dir = os.environ.get('AVATAR_CACHE_DIR') or DEFAULT_AVATAR_CACHE_DIR
+    key = hashlib.sha256(f"{picture_url}|{size}".encode('utf-8')).hexdigest()[:24]
+    path = os.path.join(cache_dir, f"{key}.png")
+    try:
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                thumbnail = f.read()
+        else:
+            with urllib.request.urlopen(picture_url, timeout=5) as response:
+                thumbnail = _make_thumbnail(response.read(), size)
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(thumbnail)
+    except Exception as e:
+        print(f"Error caching avatar: {e}")
+        return picture_url
+
+    static_name = hashed_name('avatar.png', thumbnail)
+    if static:
+        return _write_static(static_name, thumbnail) or picture_url
+    gateway.publish_asset(static_name, thumbnail, 'image/png')
+    return f"{get_public_gateway_url()}/static/{static_name}"
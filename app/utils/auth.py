@@ -1,7 +1,39 @@
 import streamlit as st
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
+import collections
+import datetime
+import functools
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from utils.scheduler import TimerScheduler
+from utils.notification_service import get_session_id, is_active_session
+
+# OAuth endpoints (GOOGLE_AUTH_URI, GOOGLE_TOKEN_URI and GOOGLE_USERINFO_URI
+# override them, e.g. to point at a local stub server)
+DEFAULT_AUTH_URI = "https://accounts.google.com/o/oauth2/auth"
+DEFAULT_TOKEN_URI = "https://oauth2.googleapis.com/token"
+DEFAULT_USERINFO_URI = "https://www.googleapis.com/oauth2/v2/userinfo"
+REDIRECT_URI = "https://tourflow.streamlit.app/"
+SCOPES = [
+    'openid',
+    'https://www.googleapis.com/auth/userinfo.profile',
+    'https://www.googleapis.com/auth/userinfo.email',
+]
+
+HTTP_POOL_SIZE = 32
+HTTP_TIMEOUT = 10
+
+USERINFO_CACHE_SIZE = 1024
+USERINFO_TTL_SECONDS = 600
+
+# Access tokens are refreshed this long before they expire
+REFRESH_MARGIN_SECONDS = 300
+
+# Sessions without a rerun for this long are no longer refreshed
+REFRESH_IDLE_SECONDS = 3600
 
 def initialize_auth_state():
     """Initialize authentication state variables"""
@@ -15,10 +47,42 @@ def initialize_auth_state():
 def check_login_status():
     """Check if user is logged in"""
     initialize_auth_state()
+    if st.session_state.logged_in and st.session_state.credentials:
+        # Keeps the background refresh going while the session is in use
+        get_token_refresher().touch(get_session_id(), st.session_state.credentials)
     return st.session_state.logged_in
 
+@functools.lru_cache(maxsize=8)
+def _client_config(client_id: str, client_secret: str) -> Dict[str, Any]:
+    """OAuth client configuration, built once per client id and secret"""
+    return {
+        "web": {
+            "client_id": client_id,
+            "client_secret": client_secret,
+            "auth_uri": os.environ.get("GOOGLE_AUTH_URI") or DEFAULT_AUTH_URI,
+            "token_uri": os.environ.get("GOOGLE_TOKEN_URI") or DEFAULT_TOKEN_URI,
+            "redirect_uri": REDIRECT_URI,
+            "javascript_origins": ["https://tourflow.streamlit.app"]
+        }
+    }
+
+@st.cache_resource(show_spinner=False)
+def get_http_session():
+    """
+    Get the HTTP session shared by every session in this process
+
+    Token exchanges, refreshes and userinfo lookups all reuse its
+    connection pool instead of opening a new connection each time.
+    """
+    import requests
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE, max_retries=2)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
 def create_oauth_flow():
-    """Create OAuth flow for Google Sign-In"""
+    """Create OAuth flow for Google Sign-In (reused for the rest of the session)"""
     # Get client ID and secret from session state or secrets
     client_id = st.session_state.get("GOOGLE_CLIENT_ID")
     client_secret = st.session_state.get("GOOGLE_CLIENT_SECRET")
@@ -38,46 +102,204 @@ def create_oauth_flow():
     st.session_state["GOOGLE_CLIENT_ID"] = client_id
     st.session_state["GOOGLE_CLIENT_SECRET"] = client_secret
     
-    client_config = {
-        "web": {
-            "client_id": client_id,
-            "client_secret": client_secret,
-            "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-            "token_uri": "https://oauth2.googleapis.com/token",
-            "redirect_uri": "https://tourflow.streamlit.app/",
-            "javascript_origins": ["https://tourflow.streamlit.app"]
-        }
-    }
+    # The same flow must exchange the code it issued the authorization URL for
+    flow = st.session_state.get("_oauth_flow")
+    if flow is not None and flow.client_config.get("client_id") == client_id:
+        return flow
     
-    # Create flow instance
+    client_config = _client_config(client_id, client_secret)
+    
+    # Create flow instance (the OAuth libraries are only imported on the login screen)
+    from google_auth_oauthlib.flow import Flow
     flow = Flow.from_client_config(
         client_config,
-        scopes=[
-            'openid',
-            'https://www.googleapis.com/auth/userinfo.profile',
-            'https://www.googleapis.com/auth/userinfo.email',
-        ],
+        scopes=SCOPES,
         redirect_uri=client_config['web']['redirect_uri']
     )
+    # Token requests go through the process-wide connection pool
+    adapter = get_http_session().get_adapter('https://')
+    flow.oauth2session.mount('https://', adapter)
+    flow.oauth2session.mount('http://', adapter)
     
+    st.session_state._oauth_flow = flow
+    st.session_state.pop("google_auth_url", None)
     return flow
 
-def get_user_info(credentials):
-    """Get user info from Google using credentials"""
-    service = build('oauth2', 'v2', credentials=credentials)
-    user_info = service.userinfo().get().execute()
+class UserInfoCache:
+    """Profile responses keyed by a hash of the access token they were fetched with"""
+    def __init__(self, max_size: int = USERINFO_CACHE_SIZE, ttl: float = USERINFO_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "collections.OrderedDict[str, tuple]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, token: str, user_info: Dict[str, Any]):
+        with self._lock:
+            self._entries[self._key(token)] = (time.time() + self.ttl, user_info)
+            self._entries.move_to_end(self._key(token))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+@st.cache_resource(show_spinner=False)
+def get_userinfo_cache() -> UserInfoCache:
+    """Get the userinfo cache shared by every session in this process"""
+    return UserInfoCache()
+
+def get_user_info(credentials) -> Dict[str, Any]:
+    """
+    Get user info from Google using credentials
+
+    Calls the oauth2 v2 userinfo endpoint directly over the shared HTTP
+    session (the URL is the one from the API's discovery document, so
+    the document is never fetched). Responses are cached per token.
+
+    Args:
+        credentials: Credentials dictionary (as stored in session state) or
+            google.oauth2 Credentials object
+
+    Returns:
+        User info dictionary (email, name, picture, ...)
+    """
+    token = credentials['token'] if isinstance(credentials, dict) else credentials.token
+    cache = get_userinfo_cache()
+    user_info = cache.get(token)
+    if user_info is not None:
+        return user_info
+    
+    response = get_http_session().get(
+        os.environ.get("GOOGLE_USERINFO_URI") or DEFAULT_USERINFO_URI,
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=HTTP_TIMEOUT
+    )
+    response.raise_for_status()
+    user_info = response.json()
+    cache.put(token, user_info)
     return user_info
 
+def refresh_access_token(credentials: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Exchange the refresh token for a new access token
+
+    Args:
+        credentials: Credentials dictionary, updated in place
+
+    Returns:
+        The same dictionary
+    """
+    response = get_http_session().post(
+        credentials.get('token_uri') or os.environ.get("GOOGLE_TOKEN_URI") or DEFAULT_TOKEN_URI,
+        data={
+            'grant_type': 'refresh_token',
+            'refresh_token': credentials['refresh_token'],
+            'client_id': credentials['client_id'],
+            'client_secret': credentials['client_secret'],
+        },
+        timeout=HTTP_TIMEOUT
+    )
+    response.raise_for_status()
+    token = response.json()
+    credentials['token'] = token['access_token']
+    credentials['expiry'] = time.time() + float(token.get('expires_in', 3600))
+    if token.get('refresh_token'):
+        credentials['refresh_token'] = token['refresh_token']
+    return credentials
+
+class TokenRefresher:
+    """
+    Refreshes access tokens in the background shortly before they expire.
+
+    Each signed-in session's credentials dictionary (the one in its session
+    state) is scheduled on a TimerScheduler at ``expiry - margin`` and
+    updated in place, so requests never wait for a refresh. Sessions are
+    keyed by session id. A session that has ended, or has not rerun for
+    ``idle`` seconds, is dropped when its refresh comes due, along with its
+    credentials; touch() picks it up again on its next rerun.
+    """
+    def __init__(self, margin: float = REFRESH_MARGIN_SECONDS, idle: float = REFRESH_IDLE_SECONDS,
+                 is_active: Callable[[str], bool] = None):
+        self.margin = margin
+        self.idle = idle
+        self.is_active = is_active or (lambda session_id: True)
+        # Session id -> [credentials, last seen]
+        self._sessions: Dict[str, list] = {}
+        self._lock = threading.Lock()
+        self.scheduler = TimerScheduler(self._on_due, name='token-refresher')
+        self.scheduler.start()
+
+    def watch(self, session_id: str, credentials: Dict[str, Any]):
+        """Keep a session's credentials fresh (no-op without a refresh token or expiry)"""
+        if not credentials or not credentials.get('refresh_token') or not credentials.get('expiry'):
+            return
+        with self._lock:
+            self._sessions[session_id] = [credentials, time.time()]
+        self.scheduler.schedule(session_id, max(time.time(), credentials['expiry'] - self.margin))
+
+    def touch(self, session_id: str, credentials: Dict[str, Any]):
+        """Record that a session is in use, watching it again if it was dropped"""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None and entry[0] is credentials:
+                entry[1] = time.time()
+                return
+        self.watch(session_id, credentials)
+
+    def forget(self, session_id: str):
+        """Stop refreshing a session's credentials"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        self.scheduler.cancel(session_id)
+
+    def _on_due(self, session_id: str, _payload: Any):
+        with self._lock:
+            entry = self._sessions.get(session_id)
+        if entry is None:
+            return
+        credentials, last_seen = entry
+        if time.time() - last_seen > self.idle or not self.is_active(session_id):
+            self.forget(session_id)
+            return
+        try:
+            refresh_access_token(credentials)
+        except Exception as e:
+            print(f"Error refreshing access token: {e}")
+            self.forget(session_id)
+            return
+        self.scheduler.schedule(session_id, max(time.time(), credentials['expiry'] - self.margin))
+
+@st.cache_resource(show_spinner=False)
+def get_token_refresher() -> TokenRefresher:
+    """Get the token refresher shared by every session in this process"""
+    return TokenRefresher(is_active=is_active_session)
+
 def sign_in_with_google():
     """Sign in with Google"""
     flow = create_oauth_flow()
-    authorization_url, state = flow.authorization_url(
-        access_type='offline',
-        include_granted_scopes='true'
-    )
-    
-    # In a real app, you'd use a more secure method to handle state
-    st.session_state.google_auth_state = state
+    # The URL (and its state) stay the same across reruns of the login screen
+    if not st.session_state.get("google_auth_url"):
+        authorization_url, state = flow.authorization_url(
+            access_type='offline',
+            include_granted_scopes='true'
+        )
+        st.session_state.google_auth_url = authorization_url
+        # In a real app, you'd use a more secure method to handle state
+        st.session_state.google_auth_state = state
+    authorization_url = st.session_state.google_auth_url
     
     # Create a better looking button for Google Sign-In
     google_btn = """
@@ -110,14 +332,20 @@ def sign_in_with_google():
                 'token_uri': credentials.token_uri,
                 'client_id': credentials.client_id,
                 'client_secret': credentials.client_secret,
-                'scopes': credentials.scopes
+                'scopes': credentials.scopes,
+                'expiry': credentials.expiry.replace(tzinfo=datetime.timezone.utc).timestamp() if credentials.expiry else None
             }
             
             # Get user info
-            user_info = get_user_info(credentials)
+            user_info = get_user_info(st.session_state.credentials)
             st.session_state.user_info = user_info
             st.session_state.logged_in = True
             
+            # Keep the access token fresh in the background
+            get_token_refresher().watch(get_session_id(), st.session_state.credentials)
+            st.session_state.pop("_oauth_flow", None)
+            st.session_state.pop("google_auth_url", None)
+            
             # Make sure we have the Gemini API key in the session state
             # If it's not already there, try to get it from secrets
             if "GEMINI_API_KEY" not in st.session_state:
@@ -136,6 +364,11 @@ def sign_in_with_google():
 
 def sign_out():
     """Sign out by clearing session state"""
+    if st.session_state.get('logged_in'):
+        get_token_refresher().forget(get_session_id())
+        # Imported here: the gateway imports this module
+        from utils.push_gateway import revoke_push_token
+        revoke_push_token()
     if 'logged_in' in st.session_state:
         st.session_state.logged_in = False
     if 'user_info' in st.session_state:
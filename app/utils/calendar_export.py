@@ -0,0 +1,207 @@
+import streamlit as st
+import collections
+import datetime
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from utils.notifications import parse_item_time
+from utils.session_store import session_get, session_set
+
+PRODID = '-//Tour Flow//Itinerary//EN'
+UID_DOMAIN = 'tourflow'
+
+# Serialized event bodies kept per distinct item content
+EVENT_CACHE_SIZE = 100000
+
+# Fields that go into an event; a change to any of them is a new revision
+EVENT_FIELDS = ('date', 'time', 'duration_minutes', 'activity', 'location', 'notes', 'type', 'lat', 'lon')
+
+def _escape(text: Any) -> str:
+    """Escape a TEXT value (RFC 5545, 3.3.11)"""
+    return (str(text).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+def _fold(line: str) -> str:
+    """Fold a content line to 75 octets, continuation lines start with a space"""
+    data = line.encode('utf-8')
+    if len(data) <= 75:
+        return line + '\r\n'
+    parts = []
+    start = 0
+    limit = 75
+    while start < len(data):
+        end = min(start + limit, len(data))
+        # Do not split a UTF-8 sequence
+        while end < len(data) and (data[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(data[start:end].decode('utf-8'))
+        start = end
+        limit = 74
+    return '\r\n '.join(parts) + '\r\n'
+
+def event_hash(item: Dict[str, Any]) -> str:
+    """Hash of the fields of an item that appear in its calendar event"""
+    data = json.dumps([item.get(field) for field in EVENT_FIELDS], default=str)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()[:16]
+
+def serialize_event_body(item: Dict[str, Any], stamp: datetime.datetime = None) -> Optional[str]:
+    """
+    Serialize the properties of an item's VEVENT, except SEQUENCE
+
+    Args:
+        item: Itinerary item
+        stamp: DTSTAMP (defaults to now, i.e. when this revision was first seen)
+
+    Returns:
+        Folded content lines, or None if the item has no date
+    """
+    item_date = item.get('date')
+    if not isinstance(item_date, datetime.date):
+        return None
+    stamp = stamp or datetime.datetime.utcnow()
+
+    lines = [
+        f"UID:{item.get('id')}@{UID_DOMAIN}",
+        f"DTSTAMP:{stamp.strftime('%Y%m%dT%H%M%SZ')}",
+    ]
+    item_time = parse_item_time(item.get('time', ''))
+    if item_time is None:
+        # No usable time: an all-day event
+        lines.append(f"DTSTART;VALUE=DATE:{item_date.strftime('%Y%m%d')}")
+    else:
+        # Floating local time, the agenda's times are local to the tour
+        start = datetime.datetime.combine(item_date, item_time)
+        lines.append(f"DTSTART:{start.strftime('%Y%m%dT%H%M%S')}")
+        duration = item.get('duration_minutes') or 0
+        if duration:
+            lines.append(f"DURATION:PT{int(duration)}M")
+
+    lines.append(f"SUMMARY:{_escape(item.get('activity') or 'Activity')}")
+    if item.get('location'):
+        lines.append(f"LOCATION:{_escape(item['location'])}")
+    if item.get('lat') is not None and item.get('lon') is not None:
+        lines.append(f"GEO:{item['lat']};{item['lon']}")
+    notes = item.get('notes')
+    if notes:
+        lines.append(f"DESCRIPTION:{_escape(chr(10).join(notes))}")
+    if item.get('type'):
+        lines.append(f"CATEGORIES:{_escape(item['type'].upper())}")
+    return ''.join(_fold(line) for line in lines)
+
+def _event_key(item: Dict[str, Any]) -> tuple:
+    return (item.get('id'),) + tuple(
+        tuple(value) if isinstance(value, list) else value
+        for value in (item.get(field) for field in EVENT_FIELDS)
+    )
+
+class EventCache:
+    """
+    Serialized event bodies shared by every session, keyed by item id and
+    content. Only new or changed items are hashed and serialized again.
+    """
+    def __init__(self, max_size: int = EVENT_CACHE_SIZE):
+        self.max_size = max_size
+        self._events: "collections.OrderedDict[tuple, Tuple[str, Optional[str]]]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def event(self, item: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+        """
+        Get an item's content hash and serialized event body
+
+        Returns:
+            Tuple of the content hash and the body (None if the item has no date)
+        """
+        key = _event_key(item)
+        with self._lock:
+            cached = self._events.get(key)
+            if cached is not None:
+                self._events.move_to_end(key)
+                self.hits += 1
+                return cached
+        cached = (event_hash(item), serialize_event_body(item))
+        with self._lock:
+            self.misses += 1
+            self._events[key] = cached
+            while len(self._events) > self.max_size:
+                self._events.popitem(last=False)
+        return cached
+
+@st.cache_resource(show_spinner=False)
+def get_event_cache() -> EventCache:
+    """Get the event cache shared by every session in this process"""
+    return EventCache()
+
+def build_calendar(itinerary: Iterable[Dict[str, Any]], sequences: Dict[str, Tuple[str, int]],
+                   name: str = "Tour Itinerary") -> Tuple[str, bool]:
+    """
+    Build an iCalendar document for an itinerary
+
+    Unchanged events reuse their cached serialization. An event whose
+    content changed since the last export gets its SEQUENCE bumped, so
+    calendar clients replace the old version.
+
+    Args:
+        itinerary: Itinerary items
+        sequences: Item id -> (content hash, sequence) from the previous
+            export; updated in place
+        name: Calendar name
+
+    Returns:
+        Tuple of the document and whether ``sequences`` changed
+    """
+    cache = get_event_cache()
+    changed = False
+    parts = [
+        'BEGIN:VCALENDAR\r\n',
+        'VERSION:2.0\r\n',
+        f'PRODID:{PRODID}\r\n',
+        'CALSCALE:GREGORIAN\r\n',
+        _fold(f'X-WR-CALNAME:{_escape(name)}'),
+    ]
+    for item in itinerary:
+        item_id = item.get('id')
+        content_hash, body = cache.event(item)
+        if body is None:
+            continue
+
+        previous = sequences.get(item_id)
+        if previous is None:
+            sequence = 0
+        elif previous[0] != content_hash:
+            sequence = previous[1] + 1
+        else:
+            sequence = previous[1]
+        if previous is None or previous[0] != content_hash:
+            sequences[item_id] = (content_hash, sequence)
+            changed = True
+
+        parts.append('BEGIN:VEVENT\r\n')
+        parts.append(f'SEQUENCE:{sequence}\r\n')
+        parts.append(body)
+        parts.append('END:VEVENT\r\n')
+    parts.append('END:VCALENDAR\r\n')
+    return ''.join(parts), changed
+
+def export_calendar(itinerary: Iterable[Dict[str, Any]]) -> bytes:
+    """
+    iCalendar export of the current user's itinerary
+
+    Built on demand (see the Tour Flow page's "Prepare Calendar" step); the
+    document itself is not kept. Event sequence numbers are kept per user in
+    the session store, so they keep counting up across sessions and restarts.
+
+    Args:
+        itinerary: The session's itinerary
+
+    Returns:
+        The .ics file
+    """
+    sequences = session_get('ics_sequences', {})
+    document, changed = build_calendar(itinerary, sequences)
+    if changed:
+        session_set('ics_sequences', sequences)
+    return document.encode('utf-8')
@@ -0,0 +1,120 @@
+import streamlit as st
+import csv
+import datetime
+import importlib.util
+import io
+import json
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Sequence
+
+# Columns written by every format, in order
+EXPORT_FIELDS = ['id', 'date', 'time', 'activity', 'location', 'duration_minutes', 'type', 'notes', 'lat', 'lon']
+
+# Rows per write; output is produced in chunks of this many items
+EXPORT_CHUNK_ROWS = 4096
+
+# Format name -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'JSON Lines': ('jsonl', 'application/x-ndjson'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+
+def available_formats() -> List[str]:
+    """Export formats usable here (Parquet needs pyarrow)"""
+    formats = ['CSV', 'JSON Lines']
+    if importlib.util.find_spec('pyarrow') is not None:
+        formats.append('Parquet')
+    return formats
+
+def _value(value: Any) -> Any:
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, tuple):
+        return list(value)
+    return value
+
+def iter_rows(itinerary: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Yield one flat, serializable row per itinerary item"""
+    for item in itinerary:
+        yield {field: _value(item.get(field)) for field in EXPORT_FIELDS}
+
+def _chunks(itinerary: Iterable[Dict[str, Any]], size: int = EXPORT_CHUNK_ROWS) -> Iterator[List[Dict[str, Any]]]:
+    chunk = []
+    for row in iter_rows(itinerary):
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def iter_csv(itinerary: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """Yield the itinerary as UTF-8 CSV, a chunk of rows at a time"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for chunk in _chunks(itinerary):
+        for row in chunk:
+            if row['notes']:
+                row['notes'] = ' | '.join(row['notes'])
+            writer.writerow(row)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+def iter_jsonl(itinerary: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """Yield the itinerary as JSON Lines, a chunk of rows at a time"""
+    for chunk in _chunks(itinerary):
+        yield ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in chunk).encode('utf-8')
+
+def write_parquet(itinerary: Iterable[Dict[str, Any]], output: BinaryIO):
+    """Write the itinerary to a Parquet file, one row group per chunk"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ('id', pa.string()),
+        ('date', pa.string()),
+        ('time', pa.string()),
+        ('activity', pa.string()),
+        ('location', pa.string()),
+        ('duration_minutes', pa.int64()),
+        ('type', pa.string()),
+        ('notes', pa.list_(pa.string())),
+        ('lat', pa.float64()),
+        ('lon', pa.float64()),
+    ])
+    with pq.ParquetWriter(output, schema) as writer:
+        for chunk in _chunks(itinerary):
+            writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+
+_STREAMS = {
+    'CSV': iter_csv,
+    'JSON Lines': iter_jsonl,
+}
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def export_itinerary(version: str, fmt: str, _itinerary: Sequence[Dict[str, Any]]) -> bytes:
+    """
+    Export an itinerary, once per itinerary version and format
+
+    The bytes are immutable, so every session gets the same object rather
+    than a copy (as st.cache_data would return).
+
+    Args:
+        version: Content hash of the itinerary (the cache key)
+        fmt: One of EXPORT_FORMATS
+        _itinerary: The itinerary itself (not hashed by the cache)
+
+    Returns:
+        The exported file
+    """
+    output = io.BytesIO()
+    if fmt == 'Parquet':
+        write_parquet(_itinerary, output)
+    else:
+        for chunk in _STREAMS[fmt](_itinerary):
+            output.write(chunk)
+    return output.getvalue()
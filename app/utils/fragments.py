@@ -0,0 +1,15 @@
+import streamlit as st
+import functools
+
+def _full_rerun_fragment(func=None, **kwargs):
+    """Stand-in for st.fragment on Streamlit versions without it (runs as part of the full script)"""
+    if func is None:
+        return lambda f: _full_rerun_fragment(f, **kwargs)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kw):
+        return func(*args, **kw)
+    return wrapper
+
+# Widgets inside a fragment only rerun the fragment, not the whole script
+fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None) or _full_rerun_fragment
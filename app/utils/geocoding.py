@@ -0,0 +1,248 @@
+import streamlit as st
+import os
+import json
+import sqlite3
+import threading
+import time
+import urllib.parse
+import urllib.request
+from typing import Dict, Any, List, Optional, Tuple
+
+from utils.poi import POIStore, load_poi_file, normalize_name, DEFAULT_POI_FILE
+
+# Gazetteer shipped with the app (can be overridden with GEOCODER_GAZETTEER_FILES)
+DEFAULT_GAZETTEER_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'nyc_gazetteer.csv')
+
+# Persistent cache location (can be overridden with GEOCODE_CACHE_FILE)
+DEFAULT_CACHE_FILE = os.path.join(os.path.expanduser('~'), '.tour_flow', 'geocode_cache.sqlite3')
+
+# Cached misses are retried after this many seconds (GEOCODE_MISS_TTL_SECONDS)
+DEFAULT_MISS_TTL_SECONDS = 7 * 24 * 3600
+
+Coordinates = Tuple[float, float]
+
+class GeocodingProvider:
+    """Base class for geocoding providers"""
+    name = 'base'
+
+    def geocode(self, query: str) -> Optional[Coordinates]:
+        """Resolve a free-text location to (lat, lon), or None if unknown"""
+        raise NotImplementedError
+
+class GazetteerProvider(GeocodingProvider):
+    """Resolve locations from local gazetteer files (CSV or GeoJSON with name/lat/lon)"""
+    name = 'gazetteer'
+
+    def __init__(self, paths: List[str]):
+        self.store = POIStore()
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            gazetteer = load_poi_file(path)
+            for row in range(len(gazetteer)):
+                self.store.add(gazetteer.names[row], 'place', gazetteer.lats[row], gazetteer.lons[row])
+
+    def geocode(self, query: str) -> Optional[Coordinates]:
+        return self.store.locate(query)
+
+class NominatimProvider(GeocodingProvider):
+    """
+    Resolve locations with the OpenStreetMap Nominatim search API
+
+    Requests are spaced at least ``min_interval`` seconds apart across all
+    threads, as the public server's usage policy allows one request a second.
+    """
+    name = 'nominatim'
+
+    def __init__(self, base_url: str = 'https://nominatim.openstreetmap.org/search',
+                 user_agent: str = 'tour-flow-app', timeout: float = 5.0, min_interval: float = 1.0):
+        self.base_url = base_url
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_request = 0.0
+
+    def _wait_turn(self):
+        """Block until this thread may send the next request"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_request)
+            self._next_request = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+
+    def geocode(self, query: str) -> Optional[Coordinates]:
+        self._wait_turn()
+        url = f"{self.base_url}?{urllib.parse.urlencode({'q': query, 'format': 'json', 'limit': 1})}"
+        request = urllib.request.Request(url, headers={'User-Agent': self.user_agent})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            results = json.loads(response.read().decode('utf-8'))
+        if not results:
+            return None
+        return float(results[0]['lat']), float(results[0]['lon'])
+
+class GeocodeCache:
+    """
+    Persistent SQLite cache of geocoding results.
+
+    Misses are cached as well (with NULL coordinates) so unknown locations are
+    not sent to the provider again on every upload. A miss only counts for
+    the provider that reported it and is retried after ``miss_ttl`` seconds;
+    coordinates are kept whichever provider found them.
+    """
+    def __init__(self, path: str, miss_ttl: float = DEFAULT_MISS_TTL_SECONDS):
+        self.miss_ttl = miss_ttl
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS geocodes (
+                query TEXT PRIMARY KEY,
+                lat REAL,
+                lon REAL,
+                provider TEXT,
+                updated_at REAL
+            )
+        """)
+        self._conn.commit()
+
+    def get_many(self, keys: List[str], provider: str) -> Dict[str, Optional[Coordinates]]:
+        """
+        Look up cached keys
+
+        Keys that were never resolved, and misses that are expired or were
+        reported by another provider, are left out.
+
+        Args:
+            keys: Normalized queries
+            provider: Name of the provider that would resolve the keys left out
+
+        Returns:
+            Dictionary mapping cached keys to (lat, lon) or None
+        """
+        found = {}
+        miss_cutoff = time.time() - self.miss_ttl
+        with self._lock:
+            # Stay well below SQLite's bound parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT query, lat, lon, provider, updated_at FROM geocodes WHERE query IN ({placeholders})", chunk
+                ).fetchall()
+                for query, lat, lon, row_provider, updated_at in rows:
+                    if lat is not None:
+                        found[query] = (lat, lon)
+                    elif row_provider == provider and (updated_at or 0) >= miss_cutoff:
+                        found[query] = None
+        return found
+
+    def put_many(self, results: Dict[str, Optional[Coordinates]], provider: str):
+        """Store resolved keys in one transaction"""
+        now = time.time()
+        rows = [
+            (key, coords[0] if coords else None, coords[1] if coords else None, provider, now)
+            for key, coords in results.items()
+        ]
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO geocodes (query, lat, lon, provider, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+
+class Geocoder:
+    """Geocoding provider with a persistent cache in front of it"""
+    def __init__(self, provider: GeocodingProvider, cache: Optional[GeocodeCache] = None):
+        self.provider = provider
+        self.cache = cache
+
+    def geocode_many(self, queries: List[str]) -> Dict[str, Optional[Coordinates]]:
+        """
+        Resolve several locations, asking the provider only for cache misses
+
+        Args:
+            queries: Free-text locations
+
+        Returns:
+            Dictionary mapping each normalized query to (lat, lon) or None
+        """
+        keys = list(dict.fromkeys(normalize_name(q) for q in queries if q and q.strip()))
+        results = self.cache.get_many(keys, self.provider.name) if self.cache else {}
+
+        resolved = {}
+        for key in keys:
+            if key in results:
+                continue
+            try:
+                resolved[key] = self.provider.geocode(key)
+            except Exception as e:
+                print(f"Error geocoding {key}: {e}")
+                continue
+
+        if resolved and self.cache:
+            self.cache.put_many(resolved, self.provider.name)
+
+        results.update(resolved)
+        return results
+
+    def geocode(self, query: str) -> Optional[Coordinates]:
+        """Resolve a single location"""
+        return self.geocode_many([query]).get(normalize_name(query))
+
+def create_provider(name: str = None) -> GeocodingProvider:
+    """Create the configured geocoding provider (GEOCODER_PROVIDER)"""
+    name = (name or os.environ.get('GEOCODER_PROVIDER') or 'gazetteer').lower()
+    if name == 'nominatim':
+        return NominatimProvider()
+
+    paths = os.environ.get('GEOCODER_GAZETTEER_FILES')
+    if paths:
+        paths = [p for p in paths.split(os.pathsep) if p]
+    else:
+        # The POI dataset doubles as a gazetteer for well-known places
+        paths = [DEFAULT_GAZETTEER_FILE, os.environ.get('POI_DATA_FILE') or DEFAULT_POI_FILE]
+    return GazetteerProvider(paths)
+
+@st.cache_resource(show_spinner=False)
+def get_geocoder() -> Geocoder:
+    """Get the process-wide geocoder"""
+    cache = None
+    try:
+        cache = GeocodeCache(
+            os.environ.get('GEOCODE_CACHE_FILE') or DEFAULT_CACHE_FILE,
+            float(os.environ.get('GEOCODE_MISS_TTL_SECONDS') or DEFAULT_MISS_TTL_SECONDS)
+        )
+    except Exception as e:
+        print(f"Geocode cache unavailable, continuing without it: {e}")
+    return Geocoder(create_provider(), cache)
+
+def geocode_itinerary(itinerary: List[Dict[str, Any]], geocoder: Geocoder = None) -> int:
+    """
+    Resolve each unique itinerary location once and store lat/lon on the items
+
+    Items without a location fall back to their activity text
+    (e.g. "Lunch at Shake Shack").
+
+    Args:
+        itinerary: List of itinerary items (updated in place)
+        geocoder: Geocoder to use (defaults to the process-wide one)
+
+    Returns:
+        Number of items that received coordinates
+    """
+    geocoder = geocoder or get_geocoder()
+
+    queries = [item.get('location') or item.get('activity', '') for item in itinerary]
+    results = geocoder.geocode_many(queries)
+
+    count = 0
+    for item, query in zip(itinerary, queries):
+        coords = results.get(normalize_name(query)) if query else None
+        if coords:
+            item['lat'], item['lon'] = coords
+            count += 1
+    return count
@@ -0,0 +1,271 @@
+import streamlit as st
+from typing import Any, Dict, List, Optional, Sequence
+from utils.parser import assign_item_ids, find_current_item
+from utils.tour_registry import SharedTour, content_hash, get_tour_registry
+from utils.notification_service import get_session_owner
+from utils.session_store import TOURS_OWNER, get_session_store, maybe_collect_garbage, session_get, session_set, session_delete
+
+def set_itinerary(itinerary: List[Dict[str, Any]]):
+    """
+    Make this the session's itinerary
+
+    Items without an id (or with a duplicate one) get a new id. The
+    itinerary is interned in the process-wide tour registry, so sessions
+    of the same tour group share one immutable copy (and its insights);
+    session state only holds a reference to it. The tour is also saved in
+    the session store, so the user gets it back after a restart.
+
+    Args:
+        itinerary: List of itinerary items
+    """
+    assign_item_ids(itinerary)
+    st.session_state._itinerary_owner = get_session_owner()
+    st.session_state.itinerary_edited = False
+    st.session_state.pop('itinerary', None)
+    st.session_state.pop('itinerary_index', None)
+    st.session_state.pop('_itinerary_version', None)
+    st.session_state.pop('_itinerary_view', None)
+    session_delete('itinerary_edits')
+
+    if not itinerary:
+        st.session_state.tour = None
+        st.session_state.insights = {}
+        session_delete('tour')
+        return
+
+    tour = get_tour_registry().intern(itinerary)
+    st.session_state.tour = tour
+    st.session_state.insights = tour.insights
+
+    # Tours are stored once under their content key; users keep the key
+    # (set first, so garbage collection never sees the tour unreferenced)
+    session_set('tour', tour.key)
+    store = get_session_store()
+    if store.get(TOURS_OWNER, tour.key) is None:
+        store.set(TOURS_OWNER, tour.key, list(tour.items))
+    maybe_collect_garbage()
+
+def _load_itinerary():
+    """Pick up the itinerary for the session's current owner"""
+    st.session_state._itinerary_owner = get_session_owner()
+
+    # An itinerary put straight into session state (older sessions, tests)
+    legacy = st.session_state.pop('itinerary', None)
+    if legacy:
+        set_itinerary(list(legacy))
+        return
+
+    st.session_state.tour = None
+    st.session_state.insights = {}
+    st.session_state.itinerary_edited = False
+    st.session_state.pop('itinerary_index', None)
+    st.session_state.pop('_itinerary_version', None)
+    st.session_state.pop('_itinerary_view', None)
+
+    # Otherwise restore the tour this user had last, with any personal edits
+    key = session_get('tour')
+    items = get_session_store().get(TOURS_OWNER, key) if key else None
+    if items:
+        tour = get_tour_registry().intern(items)
+        st.session_state.tour = tour
+        st.session_state.insights = tour.insights
+        st.session_state.itinerary_edited = session_get('itinerary_edits') is not None
+
+def get_tour() -> Optional[SharedTour]:
+    """Get the shared tour the session's itinerary belongs to (None if there is none)"""
+    if st.session_state.get('_itinerary_owner') != get_session_owner() or 'itinerary' in st.session_state:
+        _load_itinerary()
+    return st.session_state.get('tour')
+
+def get_itinerary() -> Sequence[Dict[str, Any]]:
+    """
+    Get the session's itinerary (empty if there is none)
+
+    This is the shared tour's tuple of items until the user edits their
+    plan, after which it is their own list: the tour's items with the
+    edits kept in the session store applied, built once per edit. Treat it
+    as read-only and change it through update_item, remove_item or
+    move_item.
+    """
+    tour = get_tour()
+    if tour is None:
+        return []
+    if st.session_state.get('itinerary_edited'):
+        revision = st.session_state.get('itinerary_revision', 0)
+        view = st.session_state.get('_itinerary_view')
+        if view is None or view[0] != revision:
+            edits = session_get('itinerary_edits')
+            if edits is None:
+                return tour.items
+            view = (revision, _apply_edits(tour, edits))
+            st.session_state._itinerary_view = view
+        return view[1]
+    return tour.items
+
+def is_itinerary_shared() -> bool:
+    """Whether the session still uses its tour's shared items unchanged"""
+    return get_tour() is not None and not st.session_state.get('itinerary_edited')
+
+def itinerary_version(itinerary: Sequence[Dict[str, Any]]) -> str:
+    """
+    Content hash of an itinerary
+
+    Two itineraries with the same items in the same order share a version,
+    so it can key caches of anything derived from the itinerary. The
+    shared tour's version is computed once, when it is interned.
+
+    Args:
+        itinerary: List of itinerary items
+
+    Returns:
+        Hex digest identifying the itinerary's content
+    """
+    tour = st.session_state.get('tour')
+    if tour is not None and itinerary is tour.items:
+        return tour.version
+    return content_hash(itinerary)
+
+def get_itinerary_version() -> str:
+    """
+    Version of the session's itinerary
+
+    Unedited sessions use the shared tour's version; for personal edits
+    the hash is computed once per edit.
+    """
+    if is_itinerary_shared():
+        return st.session_state.tour.version
+    cached = st.session_state.get('_itinerary_version')
+    revision = st.session_state.get('itinerary_revision', 0)
+    if cached is None or cached[0] != revision:
+        cached = (revision, content_hash(get_itinerary()))
+        st.session_state._itinerary_version = cached
+    return cached[1]
+
+def _reindex(itinerary: Sequence[Dict[str, Any]]):
+    st.session_state.itinerary_index = {item['id']: i for i, item in enumerate(itinerary)}
+
+def get_item_index() -> Dict[str, int]:
+    """Get the map from item id to position in the session's itinerary"""
+    if is_itinerary_shared():
+        return st.session_state.tour.index
+    itinerary = get_itinerary()
+    index = st.session_state.get('itinerary_index')
+    if index is None or len(index) != len(itinerary):
+        _reindex(itinerary)
+        index = st.session_state.itinerary_index
+    return index
+
+def get_item_position(item_id: str) -> Optional[int]:
+    """Position of an item in the session's itinerary, or None if unknown"""
+    position = get_item_index().get(item_id)
+    itinerary = get_itinerary()
+    if position is not None and itinerary[position].get('id') != item_id:
+        # The list was reordered in place; reindex once
+        _reindex(itinerary)
+        position = st.session_state.itinerary_index.get(item_id)
+    return position
+
+def get_item(item_id: str) -> Optional[Dict[str, Any]]:
+    """Look up an item of the session's itinerary by id"""
+    position = get_item_position(item_id)
+    return None if position is None else get_itinerary()[position]
+
+def find_current_item_id() -> Optional[str]:
+    """Id of the current item of the session's itinerary"""
+    itinerary = get_itinerary()
+    current_idx = find_current_item(itinerary)
+    if 0 <= current_idx < len(itinerary):
+        return itinerary[current_idx].get('id')
+    return None
+
+def _get_edits() -> Dict[str, Any]:
+    """A copy of the session's edits to its tour, safe to change"""
+    edits = session_get('itinerary_edits') or {}
+    order = edits.get('order')
+    return {
+        'changes': dict(edits.get('changes', {})),
+        'removed': list(edits.get('removed', [])),
+        'order': None if order is None else list(order),
+    }
+
+def _apply_edits(tour: SharedTour, edits: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    The tour's items with a session's edits applied
+
+    Unchanged items are the shared ones; only changed items are copied.
+    """
+    if edits.get('order') is not None:
+        items = [tour.items[tour.index[item_id]] for item_id in edits['order'] if item_id in tour.index]
+    else:
+        removed = set(edits.get('removed', ()))
+        items = [item for item in tour.items if item['id'] not in removed]
+    changes = edits.get('changes', {})
+    return [dict(item, **changes[item['id']]) if item['id'] in changes else item for item in items]
+
+def _save_edits(edits: Dict[str, Any]):
+    """
+    Save the session's edits (copy-on-write)
+
+    Only the changed fields, removed ids and, once the user reorders, the
+    order of the ids are stored; the items come from the shared tour.
+    """
+    session_set('itinerary_edits', edits)
+    st.session_state.itinerary_edited = True
+    st.session_state.itinerary_revision = st.session_state.get('itinerary_revision', 0) + 1
+    st.session_state.pop('_itinerary_view', None)
+    _reindex(get_itinerary())
+
+def update_item(item_id: str, **changes):
+    """
+    Change fields of one item in this session's plan only
+
+    Args:
+        item_id: Id of the item to change
+        **changes: Field values to set
+    """
+    position = get_item_position(item_id)
+    if position is None:
+        return
+    edits = _get_edits()
+    edits['changes'][item_id] = dict(edits['changes'].get(item_id, {}), **changes)
+    _save_edits(edits)
+
+def remove_item(item_id: str):
+    """Remove an item from this session's plan only"""
+    position = get_item_position(item_id)
+    if position is None:
+        return
+    edits = _get_edits()
+    edits['removed'].append(item_id)
+    edits['changes'].pop(item_id, None)
+    if edits['order'] is not None:
+        edits['order'].remove(item_id)
+    _save_edits(edits)
+
+def move_item(item_id: str, delta: int):
+    """
+    Move an item earlier (negative delta) or later in this session's plan
+
+    Args:
+        item_id: Id of the item to move
+        delta: Number of places to move it by
+    """
+    position = get_item_position(item_id)
+    if position is None:
+        return
+    itinerary = get_itinerary()
+    target = max(0, min(len(itinerary) - 1, position + delta))
+    if target == position:
+        return
+    edits = _get_edits()
+    order = [item['id'] for item in itinerary]
+    order.insert(target, order.pop(position))
+    edits['order'] = order
+    _save_edits(edits)
+
+def reset_itinerary():
+    """Drop this session's personal edits and go back to the shared tour"""
+    session_delete('itinerary_edits')
+    st.session_state.pop('_itinerary_view', None)
+    st.session_state.itinerary_edited = False
+    st.session_state.pop('itinerary_index', None)
@@ -0,0 +1,218 @@
+import datetime
+import json
+import os
+import queue
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# Default database location (can be overridden with NOTIFICATION_DB_FILE)
+DEFAULT_DB_FILE = os.path.join(os.path.expanduser('~'), '.tour_flow', 'notifications.sqlite3')
+
+# Writes are grouped into one transaction per batch; the writer keeps
+# collecting until the queue stays quiet for WRITE_LINGER_SECONDS
+WRITE_BATCH_SIZE = 5000
+WRITE_LINGER_SECONDS = 0.05
+
+STATUS_PENDING = 'pending'
+STATUS_DELIVERED = 'delivered'
+STATUS_CANCELLED = 'cancelled'
+
+_UPSERT_SQL = """
+    INSERT OR REPLACE INTO notifications
+        (id, owner, title, message, scheduled_at, created_at, status, is_read, extra)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_STATUS_SQL = "UPDATE notifications SET status = ? WHERE id = ?"
+_READ_SQL = "UPDATE notifications SET is_read = 1 WHERE id = ?"
+_READ_ALL_SQL = "UPDATE notifications SET is_read = 1 WHERE owner = ? AND is_read = 0"
+_CANCEL_KIND_SQL = """
+    UPDATE notifications SET status = ?
+    WHERE owner = ? AND status = ? AND json_extract(extra, '$.kind') = ?
+"""
+
+# Keys stored in their own columns; anything else goes to the JSON extra column
+_COLUMN_KEYS = {'id', 'title', 'message', 'scheduled_time', 'created_at', 'is_read', 'is_triggered'}
+
+def _to_timestamp(value) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, datetime.datetime):
+        return value.timestamp()
+    return float(value)
+
+def _to_datetime(value) -> Optional[datetime.datetime]:
+    return datetime.datetime.fromtimestamp(value) if value is not None else None
+
+class NotificationDB:
+    """
+    SQLite persistence for notifications.
+
+    The database runs in WAL mode so readers never block the writer. Writes
+    are queued and applied by a background thread in batched transactions,
+    so scheduling or delivering thousands of reminders costs a handful of
+    commits instead of one per row.
+    """
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS notifications (
+                id TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                title TEXT,
+                message TEXT,
+                scheduled_at REAL,
+                created_at REAL,
+                status TEXT NOT NULL,
+                is_read INTEGER NOT NULL DEFAULT 0,
+                extra TEXT
+            );
+            CREATE INDEX IF NOT EXISTS notifications_pending
+                ON notifications (status, scheduled_at, id);
+            CREATE INDEX IF NOT EXISTS notifications_owner
+                ON notifications (owner, status, created_at);
+        """)
+        self._writes: "queue.Queue[Tuple[str, List[tuple]]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name='notification-db-writer', daemon=True)
+        self._writer.start()
+
+    # Writes (queued)
+
+    def _row(self, owner: str, notification: Dict[str, Any], status: str) -> tuple:
+        extra = {k: v for k, v in notification.items() if k not in _COLUMN_KEYS}
+        return (
+            notification['id'],
+            owner,
+            notification.get('title'),
+            notification.get('message'),
+            _to_timestamp(notification.get('scheduled_time')),
+            _to_timestamp(notification.get('created_at')),
+            status,
+            1 if notification.get('is_read') else 0,
+            json.dumps(extra, default=str) if extra else None,
+        )
+
+    def save(self, owner: str, notification: Dict[str, Any], status: str = STATUS_PENDING):
+        """Queue a notification dictionary to be stored"""
+        self._writes.put((_UPSERT_SQL, [self._row(owner, notification, status)]))
+
+    def save_many(self, owner: str, notifications: List[Dict[str, Any]], status: str = STATUS_PENDING):
+        """Queue several notifications to be stored in the same transaction"""
+        self._writes.put((_UPSERT_SQL, [self._row(owner, n, status) for n in notifications]))
+
+    def set_status(self, notification_id: str, status: str):
+        self._writes.put((_STATUS_SQL, [(status, notification_id)]))
+
+    def mark_read(self, notification_id: str):
+        self._writes.put((_READ_SQL, [(notification_id,)]))
+
+    def mark_all_read(self, owner: str):
+        self._writes.put((_READ_ALL_SQL, [(owner,)]))
+
+    def cancel_pending(self, owner: str, kind: str):
+        """Cancel every pending notification of an owner with this ``kind``"""
+        self._writes.put((_CANCEL_KIND_SQL, [(STATUS_CANCELLED, owner, STATUS_PENDING, kind)]))
+
+    def _write_loop(self):
+        while True:
+            batch = [self._writes.get()]
+            try:
+                while len(batch) < WRITE_BATCH_SIZE:
+                    batch.append(self._writes.get(timeout=WRITE_LINGER_SECONDS))
+            except queue.Empty:
+                pass
+            self._apply(batch)
+            for _ in batch:
+                self._writes.task_done()
+
+    def _apply(self, batch: List[Tuple[str, List[tuple]]]):
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN")
+                # Run consecutive statements of the same kind with executemany
+                start = 0
+                for i in range(1, len(batch) + 1):
+                    if i == len(batch) or batch[i][0] != batch[start][0]:
+                        self._conn.executemany(batch[start][0], [
+                            params for _, rows in batch[start:i] for params in rows
+                        ])
+                        start = i
+                self._conn.execute("COMMIT")
+            except Exception as e:
+                self._conn.execute("ROLLBACK")
+                print(f"Error writing notifications: {e}")
+
+    def flush(self):
+        """Block until every queued write has been committed"""
+        self._writes.join()
+
+    # Reads
+
+    def _row_to_notification(self, row) -> Tuple[str, Dict[str, Any]]:
+        (notification_id, owner, title, message, scheduled_at, created_at, status, is_read, extra) = row
+        notification = {
+            'id': notification_id,
+            'title': title,
+            'message': message,
+            'scheduled_time': _to_datetime(scheduled_at),
+            'is_read': bool(is_read),
+            'created_at': _to_datetime(created_at),
+        }
+        if status == STATUS_DELIVERED:
+            notification['is_triggered'] = True
+        if extra:
+            notification.update(json.loads(extra))
+        return owner, notification
+
+    def load_pending(self, after: Tuple[float, str] = None, limit: int = 5000) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Load the next page of pending notifications in scheduled order
+
+        Args:
+            after: (scheduled_at, id) cursor of the last row already loaded
+            limit: Maximum number of rows
+
+        Returns:
+            List of (owner, notification) pairs
+        """
+        query = "SELECT * FROM notifications WHERE status = ?"
+        params: list = [STATUS_PENDING]
+        if after is not None:
+            query += " AND (scheduled_at, id) > (?, ?)"
+            params.extend(after)
+        query += " ORDER BY scheduled_at, id LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._row_to_notification(row) for row in rows]
+
+    def load_delivered(self, owner: str, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Load the most recent delivered notifications of an owner, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM notifications WHERE owner = ? AND status = ? ORDER BY created_at DESC LIMIT ?",
+                (owner, STATUS_DELIVERED, limit)
+            ).fetchall()
+        return [self._row_to_notification(row)[1] for row in reversed(rows)]
+
+    def count(self, status: str = None) -> int:
+        with self._lock:
+            if status:
+                return self._conn.execute("SELECT COUNT(*) FROM notifications WHERE status = ?", (status,)).fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM notifications").fetchone()[0]
+
+def open_notification_db(path: str = None) -> Optional[NotificationDB]:
+    """Open the notification database (NOTIFICATION_DB_FILE), or None if unavailable"""
+    path = path or os.environ.get('NOTIFICATION_DB_FILE') or DEFAULT_DB_FILE
+    try:
+        return NotificationDB(path)
+    except Exception as e:
+        print(f"Notification database unavailable, reminders will not survive restarts: {e}")
+        return None
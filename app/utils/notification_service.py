@@ -0,0 +1,374 @@
+import streamlit as st
+import collections
+import datetime
+import threading
+from typing import Any, Callable, Deque, Dict, List, Optional, Set
+
+from utils.scheduler import TimerScheduler
+from utils.notification_db import (
+    NotificationDB,
+    open_notification_db,
+    STATUS_PENDING,
+    STATUS_DELIVERED,
+    STATUS_CANCELLED,
+)
+
+# Fired notifications kept for an owner with no attached session
+MAX_UNDELIVERED_PER_OWNER = 500
+
+# Pending reminders are loaded from the database this many at a time
+RELOAD_PAGE_SIZE = 5000
+
+# Scheduler key of the sentinel entry that loads the next page
+RELOAD_KEY = '__reload__'
+
+def owner_session_id(owner: str) -> Optional[str]:
+    """The session id an anonymous (``session:``) owner belongs to, None for signed-in users"""
+    if not owner.startswith('session:'):
+        return None
+    # session:<session id>, or session:<session id>:<demo login id>
+    return owner.split(':', 2)[1]
+
+class NotificationService:
+    """
+    Process-wide notification scheduler shared by all Streamlit sessions.
+
+    One timer thread owns every pending reminder in the process. Reminders
+    are scheduled for an *owner* (the signed-in user, or the session itself
+    for anonymous users) and, when they fall due, are copied into the inbox
+    of each session attached for that owner. Sessions drain their inbox
+    from the script thread, so the timer thread never touches
+    ``st.session_state``.
+
+    With a database attached, every reminder is persisted and pending ones
+    are reloaded lazily after a restart: only the earliest page is put in
+    the heap, plus a sentinel entry at the time of the last loaded reminder
+    that pulls in the next page when it fires. Reminders scheduled beyond the
+    loaded page are only written to the database until their page is loaded.
+    """
+    def __init__(self, db: Optional[NotificationDB] = None):
+        self.db = db
+        self._cursor: Optional[tuple] = None
+        self._fully_loaded = db is None
+        # Held over saving, the cursor check and the heap insert, and over a
+        # page load, so no reminder falls between the heap and the next page
+        self._page_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._inboxes: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._session_owner: Dict[str, str] = {}
+        self._owner_sessions: Dict[str, Set[str]] = collections.defaultdict(set)
+        self._undelivered: Dict[str, Deque[Dict[str, Any]]] = {}
+        # Reminders in the heap per owner, so new ones can be merged with them
+        self._owner_pending: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+        self._is_active: Optional[Callable[[str], bool]] = None
+        self.scheduler = TimerScheduler(self._on_due, name='notification-service')
+        if db is not None:
+            self._load_next_page()
+        self.scheduler.start()
+
+    def _load_next_page(self):
+        """Put the next page of pending reminders from the database into the heap"""
+        with self._page_lock:
+            self.db.flush()
+            rows = self.db.load_pending(after=self._cursor, limit=RELOAD_PAGE_SIZE)
+            self.scheduler.schedule_many([
+                (notification['id'], notification['scheduled_time'], (owner, notification))
+                for owner, notification in rows
+            ])
+            with self._lock:
+                for owner, notification in rows:
+                    self._owner_pending.setdefault(owner, {})[notification['id']] = notification
+            if len(rows) < RELOAD_PAGE_SIZE:
+                # In this order: the cursor is only read while not fully loaded
+                self._fully_loaded = True
+                self._cursor = None
+                return
+
+            last = rows[-1][1]
+            self._cursor = (last['scheduled_time'].timestamp(), last['id'])
+            self.scheduler.schedule(RELOAD_KEY, self._cursor[0], None)
+
+    def attach(self, session_id: str, owner: str):
+        """Attach a session so it receives reminders scheduled for its owner"""
+        with self._lock:
+            previous = self._session_owner.get(session_id)
+            if previous == owner:
+                return
+            if previous is not None:
+                self._owner_sessions[previous].discard(session_id)
+            self._session_owner[session_id] = owner
+            self._owner_sessions[owner].add(session_id)
+            inbox = self._inboxes.setdefault(session_id, collections.deque())
+
+            # Hand over anything that fired while no session was attached
+            undelivered = self._undelivered.pop(owner, None)
+            if undelivered:
+                inbox.extend(undelivered)
+
+    def add_listener(self, listener: Callable[[str, Dict[str, Any]], None]):
+        """Call listener(owner, notification) from the timer thread whenever a reminder fires"""
+        self._listeners.append(listener)
+
+    def is_attached(self, session_id: str) -> bool:
+        return session_id in self._session_owner
+
+    def detach(self, session_id: str):
+        """Detach a session and drop its inbox"""
+        with self._lock:
+            owner = self._session_owner.pop(session_id, None)
+            self._inboxes.pop(session_id, None)
+            if owner is not None:
+                sessions = self._owner_sessions.get(owner)
+                if sessions is not None:
+                    sessions.discard(session_id)
+                    if not sessions:
+                        del self._owner_sessions[owner]
+
+    def prune(self, is_active: Callable[[str], bool]):
+        """
+        Detach sessions that are no longer active
+
+        Reminders held back for anonymous owners whose session has ended are
+        dropped as well, since nobody can attach as that owner again.
+        """
+        self._is_active = is_active
+        with self._lock:
+            stale = [session_id for session_id in self._session_owner if not is_active(session_id)]
+        for session_id in stale:
+            self.detach(session_id)
+        with self._lock:
+            for owner in list(self._undelivered):
+                session_id = owner_session_id(owner)
+                if session_id is not None and not is_active(session_id):
+                    del self._undelivered[owner]
+
+    def schedule(self, owner: str, notification: Dict[str, Any]) -> str:
+        """Schedule a notification dictionary (with id and scheduled_time) for an owner"""
+        with self._page_lock:
+            if self.db is not None:
+                self.db.save(owner, notification, STATUS_PENDING)
+                # Beyond the loaded page: the page loader picks it up later
+                if not self._fully_loaded and notification['scheduled_time'].timestamp() > self._cursor[0]:
+                    return notification['id']
+            with self._lock:
+                self._owner_pending.setdefault(owner, {})[notification['id']] = notification
+            return self.scheduler.schedule(
+                notification['id'], notification['scheduled_time'], (owner, notification)
+            )
+
+    def schedule_many(self, owner: str, notifications: List[Dict[str, Any]]):
+        """Schedule several notifications for an owner in one database transaction"""
+        with self._page_lock:
+            if self.db is not None:
+                self.db.save_many(owner, notifications, STATUS_PENDING)
+                if not self._fully_loaded:
+                    notifications = [
+                        n for n in notifications if n['scheduled_time'].timestamp() <= self._cursor[0]
+                    ]
+            with self._lock:
+                pending = self._owner_pending.setdefault(owner, {})
+                for n in notifications:
+                    pending[n['id']] = n
+            self.scheduler.schedule_many([
+                (n['id'], n['scheduled_time'], (owner, n)) for n in notifications
+            ])
+
+    def cancel(self, notification_id: str) -> bool:
+        """Cancel a pending notification"""
+        if self.db is not None:
+            self.db.set_status(notification_id, STATUS_CANCELLED)
+        return self.scheduler.cancel(notification_id)
+
+    def cancel_kind(self, owner: str, kind: str) -> int:
+        """
+        Cancel all of an owner's pending reminders of one kind
+
+        Args:
+            owner: Owner key
+            kind: Value of the reminders' ``kind`` field (e.g. 'itinerary')
+
+        Returns:
+            Number of reminders cancelled in the scheduler (those still only
+            in the database are cancelled there)
+        """
+        with self._page_lock:
+            if self.db is not None:
+                self.db.cancel_pending(owner, kind)
+            with self._lock:
+                pending = self._owner_pending.get(owner, {})
+                ids = [notification_id for notification_id, n in pending.items() if n.get('kind') == kind]
+                for notification_id in ids:
+                    del pending[notification_id]
+                if not pending:
+                    self._owner_pending.pop(owner, None)
+            return sum(1 for notification_id in ids if self.scheduler.cancel(notification_id))
+
+    def _forget_pending(self, owner: str, notification_id: str):
+        with self._lock:
+            pending = self._owner_pending.get(owner)
+            if pending is not None:
+                pending.pop(notification_id, None)
+                if not pending:
+                    del self._owner_pending[owner]
+
+    def take_pending(self, owner: str, start: datetime.datetime, end: datetime.datetime) -> List[Dict[str, Any]]:
+        """
+        Cancel and return an owner's pending reminders due between two times
+
+        Only reminders already loaded into the scheduler are considered (all
+        of them unless more than RELOAD_PAGE_SIZE are pending), and only
+        those cancelled before they fired are returned.
+
+        Args:
+            owner: Owner key
+            start: Earliest due time
+            end: Latest due time
+
+        Returns:
+            The cancelled notification dictionaries
+        """
+        with self._lock:
+            candidates = [
+                n for n in self._owner_pending.get(owner, {}).values()
+                if start <= n['scheduled_time'] <= end
+            ]
+        taken = []
+        for notification in candidates:
+            # Also forgets reminders that fired meanwhile or were cancelled by id
+            self._forget_pending(owner, notification['id'])
+            if self.scheduler.cancel(notification['id']):
+                if self.db is not None:
+                    self.db.set_status(notification['id'], STATUS_CANCELLED)
+                taken.append(notification)
+        return taken
+
+    def record_delivered(self, owner: str, notification: Dict[str, Any]):
+        """Persist a notification that was delivered immediately"""
+        if self.db is not None:
+            self.db.save(owner, notification, STATUS_DELIVERED)
+
+    def mark_read(self, notification_id: str):
+        if self.db is not None:
+            self.db.mark_read(notification_id)
+
+    def mark_all_read(self, owner: str):
+        if self.db is not None:
+            self.db.mark_all_read(owner)
+
+    def load_history(self, owner: str) -> List[Dict[str, Any]]:
+        """Delivered notifications of an owner from earlier sessions"""
+        if self.db is None:
+            return []
+        return self.db.load_delivered(owner)
+
+    def drain(self, session_id: str) -> List[Dict[str, Any]]:
+        """Take all notifications delivered to a session since the last drain"""
+        with self._lock:
+            inbox = self._inboxes.get(session_id)
+            if not inbox:
+                return []
+            delivered = list(inbox)
+            inbox.clear()
+        return delivered
+
+    def _on_due(self, notification_id: str, payload: tuple):
+        if notification_id == RELOAD_KEY:
+            self._load_next_page()
+            return
+
+        owner, notification = payload
+        self._forget_pending(owner, notification_id)
+        if self.db is not None:
+            self.db.set_status(notification_id, STATUS_DELIVERED)
+        notification = dict(notification, is_triggered=True)
+        with self._lock:
+            sessions = self._owner_sessions.get(owner)
+            if not sessions:
+                session_id = owner_session_id(owner)
+                if session_id is not None and self._is_active is not None and not self._is_active(session_id):
+                    # The anonymous session that scheduled it is gone
+                    return
+                self._undelivered.setdefault(
+                    owner, collections.deque(maxlen=MAX_UNDELIVERED_PER_OWNER)
+                ).append(notification)
+            else:
+                for session_id in sessions:
+                    # Each session gets its own copy so read state stays per session
+                    self._inboxes[session_id].append(dict(notification))
+
+        # Push to live listeners (e.g. the browser push gateway)
+        for listener in self._listeners:
+            try:
+                listener(owner, notification)
+            except Exception as e:
+                print(f"Error in notification listener: {e}")
+
+    @property
+    def session_count(self) -> int:
+        return len(self._session_owner)
+
+    @property
+    def pending_count(self) -> int:
+        return len(self.scheduler)
+
+@st.cache_resource(show_spinner=False)
+def get_notification_service() -> NotificationService:
+    """Get the notification service shared by every session in this process"""
+    return NotificationService(db=open_notification_db())
+
+def get_session_id() -> str:
+    """Get the id of the current Streamlit session"""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        if ctx is not None:
+            return ctx.session_id
+    except Exception:
+        pass
+
+    # Fall back to an id stored in the session itself
+    if '_notification_session_id' not in st.session_state:
+        import uuid
+        st.session_state._notification_session_id = uuid.uuid4().hex
+    return st.session_state._notification_session_id
+
+def get_session_owner() -> str:
+    """
+    Get the owner key for the current session
+
+    Signed-in users are keyed by email. Anonymous sessions are keyed by the
+    session id, and so is the shared demo account (which every demo visitor
+    signs in as), plus the id of the demo sign-in, so each demo login gets
+    data of its own.
+    """
+    user = st.session_state.get('user_info') or {}
+    email = user.get('email')
+    if email and not user.get('demo'):
+        return f"user:{email}"
+    owner = f"session:{get_session_id()}"
+    return f"{owner}:{user['demo']}" if user.get('demo') else owner
+
+def is_active_session(session_id: str) -> bool:
+    try:
+        from streamlit.runtime import Runtime
+        return Runtime.instance().is_active_session(session_id)
+    except Exception:
+        return True
+
+def attach_current_session() -> Optional[str]:
+    """Attach the current session to the notification service"""
+    service = get_notification_service()
+    session_id = get_session_id()
+    owner = get_session_owner()
+    if st.session_state.get('_notification_owner') != owner or not service.is_attached(session_id):
+        # New session or the signed-in user changed; clean up dead sessions too
+        service.prune(is_active_session)
+        service.attach(session_id, owner)
+        st.session_state._notification_owner = owner
+    return session_id
+
+def detach_current_session():
+    """Detach the current session from the notification service"""
+    get_notification_service().detach(get_session_id())
+    st.session_state.pop('_notification_owner', None)
@@ -0,0 +1,227 @@
+import bisect
+import datetime
+import heapq
+import itertools
+import secrets
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# Compact the unread list once read tombstones make up more than this share of it
+COMPACT_RATIO = 0.5
+
+_id_lock = threading.Lock()
+_last_id = 0
+
+# Tells apart ids made in the same microsecond by processes sharing a database
+_PROCESS_TAG = secrets.token_hex(4)
+
+def new_notification_id() -> str:
+    """
+    Generate a unique, monotonically increasing notification id
+
+    Ids are microsecond timestamps bumped past the previous id, zero-padded
+    so that string order matches creation order, plus a random per-process
+    tag so processes (or restarts) writing to the same database never
+    reuse an id.
+    """
+    global _last_id
+    with _id_lock:
+        _last_id = max(_last_id + 1, time.time_ns() // 1000)
+        return f"{_last_id:017d}-{_PROCESS_TAG}"
+
+def _sort_time(notification: Dict[str, Any]) -> float:
+    """Timestamp a notification is ordered by (scheduled time, else creation time)"""
+    value = notification.get('scheduled_time') or notification.get('created_at')
+    if isinstance(value, datetime.datetime):
+        return value.timestamp()
+    return float(value or 0)
+
+def _insert_sorted(ids: List[str], notification_id: str):
+    # Ids grow monotonically, so this is almost always an append
+    if not ids or notification_id > ids[-1]:
+        ids.append(notification_id)
+    else:
+        bisect.insort(ids, notification_id)
+
+def _remove_sorted(ids: List[str], notification_id: str) -> bool:
+    i = bisect.bisect_left(ids, notification_id)
+    if i < len(ids) and ids[i] == notification_id:
+        del ids[i]
+        return True
+    return False
+
+class NotificationStore:
+    """
+    Indexed collection of notification dictionaries.
+
+    Keeps a dict index by id, a list of (time, id) pairs sorted by scheduled
+    time for range queries, and the unread and read ids as two sorted lists.
+    Because ids increase monotonically, id order is creation order, so the
+    unread-first, newest-first inbox is just the tail of one list followed by
+    the tail of the other: the unread count is a length and a page of the
+    inbox costs O(page size).
+
+    Mark-as-read leaves the id in the unread list with a tombstone (kept as
+    a set for lookups and a sorted list for paging) and counts it as read
+    from then on. Tombstones are skipped by queries, and moved to the read
+    list in one merge once they make up more than COMPACT_RATIO of the
+    unread list.
+    """
+    def __init__(self):
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._by_time: List[Tuple[float, str]] = []
+        self._unread: List[str] = []
+        self._read: List[str] = []
+        # Ids in _unread that have been marked read since the last compaction,
+        # as a set and as a sorted list
+        self._marked_read: Set[str] = set()
+        self._marked_ids: List[str] = []
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, notification_id):
+        return notification_id in self._by_id
+
+    @property
+    def unread_count(self) -> int:
+        return len(self._unread) - len(self._marked_read)
+
+    def _compact(self):
+        """Move tombstoned ids from the unread list to the read list"""
+        marked = self._marked_read
+        self._read = list(heapq.merge(self._read, self._marked_ids))
+        self._unread = [i for i in self._unread if i not in marked]
+        self._marked_read = set()
+        self._marked_ids = []
+
+    def add(self, notification: Dict[str, Any]) -> str:
+        """Add a notification (replacing any with the same id) and return its id"""
+        notification_id = notification['id']
+        if notification_id in self._by_id:
+            self.remove(notification_id)
+
+        self._by_id[notification_id] = notification
+        key = (_sort_time(notification), notification_id)
+        # Notifications usually arrive in time order, which makes this an append
+        if not self._by_time or key >= self._by_time[-1]:
+            self._by_time.append(key)
+        else:
+            bisect.insort(self._by_time, key)
+        _insert_sorted(self._read if notification.get('is_read') else self._unread, notification_id)
+        return notification_id
+
+    def add_many(self, notifications: List[Dict[str, Any]]) -> List[str]:
+        """Add several notifications, re-sorting the indexes once"""
+        # Drop replaced notifications while the indexes are still sorted
+        batch = {notification['id']: notification for notification in notifications}
+        for notification_id in batch:
+            if notification_id in self._by_id:
+                self.remove(notification_id)
+
+        for notification_id, notification in batch.items():
+            self._by_id[notification_id] = notification
+            self._by_time.append((_sort_time(notification), notification_id))
+            (self._read if notification.get('is_read') else self._unread).append(notification_id)
+        self._by_time.sort()
+        self._unread.sort()
+        self._read.sort()
+        return list(batch)
+
+    def get(self, notification_id: str) -> Optional[Dict[str, Any]]:
+        return self._by_id.get(notification_id)
+
+    def remove(self, notification_id: str) -> Optional[Dict[str, Any]]:
+        """Remove a notification by id"""
+        notification = self._by_id.pop(notification_id, None)
+        if notification is None:
+            return None
+        key = (_sort_time(notification), notification_id)
+        i = bisect.bisect_left(self._by_time, key)
+        if i < len(self._by_time) and self._by_time[i] == key:
+            del self._by_time[i]
+        if notification_id in self._marked_read:
+            self._marked_read.discard(notification_id)
+            _remove_sorted(self._marked_ids, notification_id)
+            _remove_sorted(self._unread, notification_id)
+        else:
+            _remove_sorted(self._read if notification.get('is_read') else self._unread, notification_id)
+        return notification
+
+    def mark_read(self, notification_id: str) -> bool:
+        """Mark a notification as read; returns False if it was unknown or already read"""
+        notification = self._by_id.get(notification_id)
+        if notification is None or notification.get('is_read'):
+            return False
+        notification['is_read'] = True
+        self._marked_read.add(notification_id)
+        _insert_sorted(self._marked_ids, notification_id)
+        if len(self._marked_read) > len(self._unread) * COMPACT_RATIO:
+            self._compact()
+        return True
+
+    def mark_all_read(self) -> int:
+        """Mark every unread notification as read and return how many changed"""
+        count = self.unread_count
+        for notification_id in self._unread:
+            self._by_id[notification_id]['is_read'] = True
+        # Tombstoned ids are already read and move along with the rest
+        self._read = list(heapq.merge(self._read, self._unread))
+        self._unread = []
+        self._marked_read = set()
+        self._marked_ids = []
+        return count
+
+    def between(self, start: datetime.datetime = None, end: datetime.datetime = None) -> List[Dict[str, Any]]:
+        """Notifications scheduled in [start, end), in time order"""
+        lo = 0 if start is None else bisect.bisect_left(self._by_time, (start.timestamp(), ''))
+        hi = len(self._by_time) if end is None else bisect.bisect_left(self._by_time, (end.timestamp(), ''))
+        return [self._by_id[notification_id] for _, notification_id in self._by_time[lo:hi]]
+
+    def page(self, offset: int = 0, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        A page of the inbox: unread first, newest first within each group
+
+        Args:
+            offset: Number of notifications to skip
+            limit: Page size
+
+        Returns:
+            Up to ``limit`` notification dictionaries
+        """
+        ids = []
+        marked = self._marked_read
+        unread_count = self.unread_count
+        if offset < unread_count:
+            if marked:
+                # Skip tombstones; there are at most COMPACT_RATIO of the list
+                unread = (i for i in reversed(self._unread) if i not in marked)
+                ids.extend(itertools.islice(unread, offset, offset + limit))
+            else:
+                end = unread_count - offset
+                ids.extend(reversed(self._unread[max(0, end - limit):end]))
+            offset = 0
+        else:
+            offset -= unread_count
+
+        remaining = limit - len(ids)
+        if remaining > 0:
+            if marked:
+                # Tombstoned ids are read too and slot in by id order
+                read = heapq.merge(reversed(self._read), reversed(self._marked_ids), reverse=True)
+                ids.extend(itertools.islice(read, offset, offset + remaining))
+            else:
+                end = len(self._read) - offset
+                if end > 0:
+                    ids.extend(reversed(self._read[max(0, end - remaining):end]))
+        return [self._by_id[notification_id] for notification_id in ids]
+
+    def all(self) -> List[Dict[str, Any]]:
+        """All notifications in the order they were added"""
+        return list(self._by_id.values())
+
+    def unread(self) -> List[Dict[str, Any]]:
+        """Unread notifications, oldest first"""
+        return [self._by_id[notification_id] for notification_id in self._unread
+                if notification_id not in self._marked_read]
@@ -1,18 +1,28 @@
 import streamlit as st
 import datetime
-import time
-import threading
-from typing import Dict, Any, List, Callable
+import functools
+import os
+import re
+from typing import Dict, Any, List, Optional
+from utils.notification_store import NotificationStore, new_notification_id
+from utils.notification_service import (
+    get_notification_service,
+    get_session_owner,
+    attach_current_session,
+    detach_current_session,
+)
+from utils.push_gateway import render_push_listener
 
-# Store for scheduled notifications
-notifications = []
-notification_thread = None
-stop_notification_thread = False
+# Reminders due within this many minutes of each other become one digest
+DEFAULT_DIGEST_WINDOW_MINUTES = 10
+
+# ``kind`` of item reminders, replaced when a new itinerary is scheduled
+ITINERARY_REMINDER = 'itinerary'
 
 class Notification:
     """Class to represent a notification"""
     def __init__(self, title, message, scheduled_time=None, id=None):
-        self.id = id or str(int(time.time()))
+        self.id = id or new_notification_id()
         self.title = title
         self.message = message
         self.scheduled_time = scheduled_time
@@ -31,107 +41,321 @@ class Notification:
 
 def initialize_notifications():
     """Initialize notifications in session state"""
-    if 'notifications' not in st.session_state:
-        st.session_state.notifications = []
-    if 'unread_count' not in st.session_state:
-        st.session_state.unread_count = 0
+    if 'notification_store' not in st.session_state:
+        st.session_state.notification_store = NotificationStore()
+        # Restore notifications delivered before a restart or reconnect
+        history = get_notification_service().load_history(get_session_owner())
+        if history:
+            st.session_state.notification_store.add_many(history)
+    
+    # Collect reminders the shared scheduler delivered since the last rerun
+    session_id = attach_current_session()
+    delivered = get_notification_service().drain(session_id)
+    if delivered:
+        st.session_state.notification_store.add_many(delivered)
+    return st.session_state.notification_store
 
 def add_notification(title, message, scheduled_time=None):
-    """Add a notification to the list"""
-    initialize_notifications()
+    """Add a notification to the list (future ones are delivered when due)"""
+    store = initialize_notifications()
     notification = Notification(title, message, scheduled_time)
-    st.session_state.notifications.append(notification.to_dict())
-    st.session_state.unread_count += 1
-    return notification.id
+    
+    # Future notifications go to the shared scheduler and arrive via the inbox
+    if scheduled_time and scheduled_time > datetime.datetime.now():
+        return schedule_reminder(notification.to_dict())
+    
+    notification_dict = notification.to_dict()
+    get_notification_service().record_delivered(get_session_owner(), notification_dict)
+    return store.add(notification_dict)
 
 def mark_notification_as_read(notification_id):
     """Mark a notification as read"""
-    initialize_notifications()
-    for i, notification in enumerate(st.session_state.notifications):
-        if notification['id'] == notification_id and not notification['is_read']:
-            st.session_state.notifications[i]['is_read'] = True
-            st.session_state.unread_count = max(0, st.session_state.unread_count - 1)
-            break
+    changed = initialize_notifications().mark_read(notification_id)
+    if changed:
+        get_notification_service().mark_read(notification_id)
+    return changed
+
+def mark_all_notifications_as_read():
+    """Mark every notification as read and return how many changed"""
+    count = initialize_notifications().mark_all_read()
+    if count:
+        get_notification_service().mark_all_read(get_session_owner())
+    return count
 
 def get_unread_count():
     """Get the number of unread notifications"""
-    initialize_notifications()
-    return st.session_state.unread_count
+    return initialize_notifications().unread_count
 
 def get_all_notifications():
     """Get all notifications"""
-    initialize_notifications()
-    return st.session_state.notifications
+    return initialize_notifications().all()
 
-def schedule_notification_for_next_item(itinerary_item: Dict[str, Any], advance_minutes: int = 15):
+def get_notification_count():
+    """Get the total number of notifications"""
+    return len(initialize_notifications())
+
+def get_notifications_page(page: int = 0, per_page: int = 10):
+    """Get one page of the inbox, unread first and newest first"""
+    return initialize_notifications().page(page * per_page, per_page)
+
+def get_notifications_between(start=None, end=None):
+    """Get notifications scheduled between two datetimes, in time order"""
+    return initialize_notifications().between(start, end)
+
+# Item times look like "10:30 AM", "10:30am" or "14:30"
+TIME_PATTERN = re.compile(r'^\s*(\d{1,2}):(\d{2})\s*([AaPp][Mm])?')
+
+@functools.lru_cache(maxsize=1024)
+def parse_item_time(time_str: str) -> Optional[datetime.time]:
+    """Parse an itinerary time string (memoized, itineraries reuse a few dozen times)"""
+    match = TIME_PATTERN.match(time_str or '')
+    if not match:
+        return None
+    hour = int(match.group(1))
+    minute = int(match.group(2))
+    meridiem = (match.group(3) or '').upper()
+    if meridiem == 'PM' and hour < 12:
+        hour += 12
+    elif meridiem == 'AM' and hour == 12:
+        hour = 0
+    try:
+        return datetime.time(hour=hour, minute=minute)
+    except ValueError:
+        return None
+
+def build_item_reminder(itinerary_item: Dict[str, Any], advance_minutes: int = 15,
+                        now: datetime.datetime = None) -> Optional[Dict[str, Any]]:
     """
-    Schedule a notification for the next itinerary item
+    Build the reminder notification for an itinerary item
     
     Args:
-        itinerary_item: The itinerary item to schedule notification for
+        itinerary_item: The itinerary item to build the reminder for
         advance_minutes: How many minutes in advance to send the notification
+        now: Current time (reminders in the past are skipped)
+        
+    Returns:
+        Notification dictionary, or None if the item has no usable time or is past
     """
     if not itinerary_item or 'time' not in itinerary_item:
         return None
     
-    # Parse the time from the itinerary item
-    time_str = itinerary_item.get('time', '')
+    item_time = parse_item_time(itinerary_item.get('time', ''))
+    if item_time is None:
+        return None
+    
+    # Create datetime for the notification
+    notification_date = itinerary_item.get('date') or datetime.date.today()
+    notification_time = datetime.datetime.combine(notification_date, item_time)
+    notification_time -= datetime.timedelta(minutes=advance_minutes)
+    
+    # If the time is in the past, don't schedule
+    if notification_time < (now or datetime.datetime.now()):
+        return None
+    
+    # Create notification message
+    activity = itinerary_item.get('activity', 'upcoming activity')
+    location = itinerary_item.get('location', '')
+    
+    title = f"Upcoming: {activity}"
+    message = f"Starting in {advance_minutes} minutes"
+    if location:
+        message += f" at {location}"
+    
+    reminder = Notification(title, message, scheduled_time=notification_time).to_dict()
+    # Line listing this activity when the reminder is merged into a digest
+    reminder['lines'] = [f"- **{itinerary_item.get('time', '')}** {activity}"]
+    reminder['kind'] = ITINERARY_REMINDER
+    if 'id' in itinerary_item:
+        reminder['item_ids'] = [itinerary_item['id']]
+    return reminder
+
+def schedule_notification_for_next_item(itinerary_item: Dict[str, Any], advance_minutes: int = 15):
+    """
+    Schedule a notification for the next itinerary item
+    
+    Args:
+        itinerary_item: The itinerary item to schedule notification for
+        advance_minutes: How many minutes in advance to send the notification
+    """
     try:
-        if ' ' in time_str:  # Format like "10:30 AM"
-            time_parts = time_str.split(' ')
-            hour_min = time_parts[0].split(':')
-            hour = int(hour_min[0])
-            minute = int(hour_min[1])
-            
-            if time_parts[1].upper() == 'PM' and hour < 12:
-                hour += 12
-            elif time_parts[1].upper() == 'AM' and hour == 12:
-                hour = 0
-        else:  # Format like "10:30"
-            hour_min = time_str.split(':')
-            hour = int(hour_min[0])
-            minute = int(hour_min[1])
-        
-        # Create datetime for the notification
-        today = datetime.date.today()
-        if itinerary_item.get('date'):
-            notification_date = itinerary_item['date']
-        else:
-            notification_date = today
+        reminder = build_item_reminder(itinerary_item, advance_minutes)
+        if reminder is None:
+            return None
         
-        notification_time = datetime.datetime.combine(
-            notification_date, 
-            datetime.time(hour=hour, minute=minute)
-        )
+        initialize_notifications()
+        return schedule_reminder(reminder)
+    
+    except Exception as e:
+        print(f"Error scheduling notification: {e}")
+        return None
+
+def get_digest_window_minutes() -> int:
+    """Reminders falling due within this many minutes are merged (DIGEST_WINDOW_MINUTES, 0 disables)"""
+    try:
+        return int(os.environ.get('DIGEST_WINDOW_MINUTES', DEFAULT_DIGEST_WINDOW_MINUTES))
+    except ValueError:
+        return DEFAULT_DIGEST_WINDOW_MINUTES
+
+def merge_reminders(reminders: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge reminders (or earlier digests) into one digest notification
+    
+    The digest is due at the earliest reminder's time and lists each
+    activity; reminders without a ``lines`` entry are listed by title.
+    
+    Args:
+        reminders: Notification dictionaries
         
-        # Subtract advance_minutes
-        notification_time = notification_time - datetime.timedelta(minutes=advance_minutes)
+    Returns:
+        The digest notification dictionary
+    """
+    ordered = sorted(reminders, key=lambda r: r['scheduled_time'])
+    lines = [
+        line
+        for reminder in ordered
+        for line in reminder.get('lines') or [f"- **{reminder['title']}** {reminder['message']}"]
+    ]
+    digest = Notification(
+        f"Coming up: {len(lines)} activities",
+        "\n".join(lines),
+        scheduled_time=ordered[0]['scheduled_time'],
+    ).to_dict()
+    # Kept so the digest can be merged again, and to link each item
+    digest['lines'] = lines
+    digest['item_ids'] = [item_id for reminder in ordered for item_id in reminder.get('item_ids', [])]
+    # Only a digest of itinerary reminders alone is replaced with the itinerary
+    if all(reminder.get('kind') == ITINERARY_REMINDER for reminder in ordered):
+        digest['kind'] = ITINERARY_REMINDER
+    return digest
+
+def schedule_reminder(reminder: Dict[str, Any], window_minutes: int = None) -> str:
+    """
+    Schedule one future reminder for the current owner
+    
+    Pending reminders of the owner due within the digest window of it are
+    cancelled and merged with it into one digest, as the bulk path does.
+    
+    Args:
+        reminder: Notification dictionary with a future scheduled_time
+        window_minutes: Coalescing window (defaults to DIGEST_WINDOW_MINUTES)
         
-        # If the time is in the past, don't schedule
-        if notification_time < datetime.datetime.now():
-            return None
+    Returns:
+        Id of the scheduled notification (the digest's, if merged)
+    """
+    service = get_notification_service()
+    owner = get_session_owner()
+    if window_minutes is None:
+        window_minutes = get_digest_window_minutes()
+    
+    if window_minutes > 0:
+        window = datetime.timedelta(minutes=window_minutes)
+        due = reminder['scheduled_time']
+        nearby = service.take_pending(owner, due - window, due + window)
+        if nearby:
+            reminder = merge_reminders(nearby + [reminder])
+    return service.schedule(owner, reminder)
+
+def coalesce_reminders(reminders: List[tuple], window_minutes: int) -> List[tuple]:
+    """
+    Merge reminders that fall due close together into digest notifications
+    
+    Reminders are grouped in scheduled order; a group collects every reminder
+    due within ``window_minutes`` of its first one. Single reminders are kept
+    as they are; larger groups become one digest notification due at the
+    group's first time, listing each activity and linking each item.
+    
+    Args:
+        reminders: List of (item key, item, reminder notification) tuples
+        window_minutes: Size of the coalescing window (0 disables coalescing)
         
-        # Create notification message
-        activity = itinerary_item.get('activity', 'upcoming activity')
-        location = itinerary_item.get('location', '')
+    Returns:
+        List of (item keys, notification) tuples
+    """
+    if window_minutes <= 0:
+        return [([key], reminder) for key, _, reminder in reminders]
+    
+    window = datetime.timedelta(minutes=window_minutes)
+    ordered = sorted(reminders, key=lambda r: r[2]['scheduled_time'])
+    
+    groups = []
+    for reminder in ordered:
+        if groups and reminder[2]['scheduled_time'] - groups[-1][0][2]['scheduled_time'] <= window:
+            groups[-1].append(reminder)
+        else:
+            groups.append([reminder])
+    
+    coalesced = []
+    for group in groups:
+        keys = [key for key, _, _ in group]
+        if len(group) == 1:
+            coalesced.append((keys, group[0][2]))
+            continue
         
-        title = f"Upcoming: {activity}"
-        message = f"Starting in {advance_minutes} minutes"
-        if location:
-            message += f" at {location}"
+        digest = merge_reminders([reminder for _, _, reminder in group])
+        # Link every item, including those without an id
+        digest['item_ids'] = keys
+        coalesced.append((keys, digest))
+    return coalesced
+
+def schedule_itinerary_notifications(itinerary: List[Dict[str, Any]], advance_minutes: int = 15,
+                                     include_undated: bool = False, digest_window_minutes: int = None) -> Dict[Any, str]:
+    """
+    Schedule reminders for a whole itinerary in one batch
+    
+    All reminder times are computed in a single pass (time strings are parsed
+    once each) and reminders due close together are merged into digests.
+    The result is handed to the notification service in one call, which
+    writes it to the database in one transaction and pushes it onto the
+    scheduler heap under a single lock. Reminders still pending for the
+    owner's previous itinerary are cancelled first, so uploading again
+    does not schedule everything twice.
+    
+    Args:
+        itinerary: List of itinerary items
+        advance_minutes: How many minutes in advance to send each reminder
+        include_undated: Also schedule items without a date (as today)
+        digest_window_minutes: Coalescing window (defaults to DIGEST_WINDOW_MINUTES)
         
-        # Add the notification
-        return add_notification(title, message, scheduled_time=notification_time)
+    Returns:
+        Dictionary mapping item id (or index for items without one) to notification id
+    """
+    initialize_notifications()
+    now = datetime.datetime.now()
     
-    except Exception as e:
-        print(f"Error scheduling notification: {e}")
-        return None
+    reminders = []
+    for i, item in enumerate(itinerary):
+        if not include_undated and not item.get('date'):
+            continue
+        reminder = build_item_reminder(item, advance_minutes, now)
+        if reminder is None:
+            continue
+        reminders.append((item.get('id', i), item, reminder))
+    
+    if digest_window_minutes is None:
+        digest_window_minutes = get_digest_window_minutes()
+    
+    mapping = {}
+    notifications = []
+    for keys, notification in coalesce_reminders(reminders, digest_window_minutes):
+        notifications.append(notification)
+        for key in keys:
+            mapping[key] = notification['id']
+    
+    service = get_notification_service()
+    owner = get_session_owner()
+    service.cancel_kind(owner, ITINERARY_REMINDER)
+    if notifications:
+        service.schedule_many(owner, notifications)
+    return mapping
 
 def display_notification_bell():
     """Display the notification bell icon in the app"""
     initialize_notifications()
     unread_count = get_unread_count()
     
+    # Receive reminders in real time instead of waiting for the next rerun
+    render_push_listener()
+    
     if unread_count > 0:
         st.markdown(
             f"""
@@ -156,43 +380,6 @@ def display_notification_bell():
             unsafe_allow_html=True
         )
 
-def notification_worker(callback: Callable = None):
-    """Background worker to check for scheduled notifications"""
-    global stop_notification_thread
-    
-    while not stop_notification_thread:
-        now = datetime.datetime.now()
-        
-        # In a real app, this would access a database or other persistent storage
-        if 'notifications' in st.session_state:
-            for notification in st.session_state.notifications:
-                if (notification.get('scheduled_time') and 
-                    notification.get('scheduled_time') <= now and 
-                    not notification.get('is_read')):
-                    # Mark as triggered
-                    notification['is_triggered'] = True
-                    
-                    # Call callback if provided
-                    if callback:
-                        callback(notification)
-        
-        # Sleep for 1 minute
-        time.sleep(60)
-
-def start_notification_thread(callback: Callable = None):
-    """Start the background notification thread"""
-    global notification_thread, stop_notification_thread
-    
-    if notification_thread is None or not notification_thread.is_alive():
-        stop_notification_thread = False
-        notification_thread = threading.Thread(
-            target=notification_worker,
-            args=(callback,),
-            daemon=True
-        )
-        notification_thread.start()
-
-def stop_notification_thread():
-    """Stop the background notification thread"""
-    global stop_notification_thread
-    stop_notification_thread = True 
\ No newline at end of file
+def stop_notifications():
+    """Stop receiving reminders in this session (e.g. on sign out)"""
+    detach_current_session()
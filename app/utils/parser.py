@@ -1,7 +1,31 @@
 import re
 import datetime
+import uuid
 from typing import List, Dict, Any
 
+from utils.profiling import profiled
+
+def new_item_id() -> str:
+    """Generate a unique id for an itinerary item"""
+    return uuid.uuid4().hex[:12]
+
+def assign_item_ids(itinerary: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Give every itinerary item a unique id, keeping ids that are already unique
+    
+    Args:
+        itinerary: List of itinerary items (updated in place)
+        
+    Returns:
+        The same list
+    """
+    seen = set()
+    for item in itinerary:
+        if not item.get('id') or item['id'] in seen:
+            item['id'] = new_item_id()
+        seen.add(item['id'])
+    return itinerary
+
 def parse_tour_agenda(text: str) -> List[Dict[str, Any]]:
     """
     Parse a raw text tour agenda into structured data.
@@ -109,8 +133,9 @@ def parse_tour_agenda(text: str) -> List[Dict[str, Any]]:
     if current_item and 'activity' in current_item:
         itinerary.append(current_item)
     
-    # Infer types of activities
+    # Infer types of activities and give each item a stable id
     for item in itinerary:
+        item['id'] = new_item_id()
         activity = item['activity'].lower()
         
         if any(word in activity for word in ['breakfast', 'lunch', 'dinner', 'meal', 'eat']):
@@ -134,6 +159,7 @@ def generate_next_items(itinerary: List[Dict[str, Any]], current_index: int, cou
     end_index = min(current_index + count + 1, len(itinerary))
     return itinerary[current_index+1:end_index]
 
+@profiled()
 def find_current_item(itinerary: List[Dict[str, Any]]) -> int:
     """Find the current item in the itinerary based on current time"""
     now = datetime.datetime.now()
@@ -0,0 +1,219 @@
+import streamlit as st
+import os
+import sys
+import csv
+import json
+import math
+from array import array
+from typing import Dict, Any, List, Optional, Tuple
+
+# Default dataset shipped with the app (can be overridden with POI_DATA_FILE)
+DEFAULT_POI_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'nyc_pois.csv')
+
+# Size of one grid cell in degrees (~1 km of latitude)
+GRID_CELL_DEGREES = 0.01
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+def _intern(value: str) -> str:
+    """Intern a repeated string value so each distinct value is stored once"""
+    return sys.intern(value) if value else ''
+
+def normalize_name(name: str) -> str:
+    """Normalize a place name for lookups"""
+    return ' '.join(''.join(c if c.isalnum() else ' ' for c in name.lower()).split())
+
+class POIStore:
+    """
+    Columnar, grid-indexed store of points of interest.
+
+    Coordinates are kept in flat ``array('d')`` columns and text columns in
+    plain lists, so a city-sized dataset costs a few bytes per row instead of
+    one dict per row. A uniform lat/lon grid maps each cell to the row ids it
+    contains, so nearby queries only look at the handful of cells around the
+    query point.
+    """
+    def __init__(self, cell_size: float = GRID_CELL_DEGREES):
+        self.cell_size = cell_size
+        self.lats = array('d')
+        self.lons = array('d')
+        self.names: List[str] = []
+        self.categories: List[str] = []
+        self.types: List[str] = []
+        self.descriptions: List[str] = []
+        self.price_ranges: List[str] = []
+        self._grid: Dict[Tuple[int, int], array] = {}
+        self._name_index: Dict[str, int] = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return (int(math.floor(lat / self.cell_size)), int(math.floor(lon / self.cell_size)))
+
+    def add(self, name: str, category: str, lat: float, lon: float,
+            place_type: str = '', description: str = '', price_range: str = '') -> int:
+        """Add a point of interest and return its row id"""
+        row = len(self.names)
+        self.lats.append(lat)
+        self.lons.append(lon)
+        self.names.append(name)
+        self.categories.append(_intern(category.lower()))
+        self.types.append(_intern(place_type))
+        self.descriptions.append(description)
+        self.price_ranges.append(_intern(price_range))
+
+        self._grid.setdefault(self._cell(lat, lon), array('I')).append(row)
+        self._name_index.setdefault(normalize_name(name), row)
+        return row
+
+    def record(self, row: int, distance_km: Optional[float] = None) -> Dict[str, Any]:
+        """Materialize a single row as a suggestion dictionary"""
+        record = {
+            'name': self.names[row],
+            'category': self.categories[row],
+            'type': self.types[row],
+            'description': self.descriptions[row],
+            'lat': self.lats[row],
+            'lon': self.lons[row],
+        }
+        if self.categories[row] == 'restaurant':
+            record['cuisine'] = self.types[row]
+        if self.price_ranges[row]:
+            record['price_range'] = self.price_ranges[row]
+        if distance_km is not None:
+            record['distance_km'] = round(distance_km, 2)
+        return record
+
+    def nearby(self, lat: float, lon: float, radius_km: float = 1.5,
+               category: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Find points of interest within a radius of a coordinate
+
+        Args:
+            lat: Latitude of the query point
+            lon: Longitude of the query point
+            radius_km: Search radius in kilometres
+            category: Optional category filter (attraction, restaurant, shopping, event)
+            limit: Maximum number of results
+
+        Returns:
+            List of suggestion dictionaries ordered by distance
+        """
+        if category:
+            category = category.lower()
+
+        # Number of cells to scan in each direction
+        lat_span = radius_km / KM_PER_DEGREE_LAT
+        lon_span = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 1e-6))
+        min_cell = self._cell(lat - lat_span, lon - lon_span)
+        max_cell = self._cell(lat + lat_span, lon + lon_span)
+
+        hits = []
+        for i in range(min_cell[0], max_cell[0] + 1):
+            for j in range(min_cell[1], max_cell[1] + 1):
+                rows = self._grid.get((i, j))
+                if not rows:
+                    continue
+                for row in rows:
+                    if category and self.categories[row] != category:
+                        continue
+                    distance = haversine_km(lat, lon, self.lats[row], self.lons[row])
+                    if distance <= radius_km:
+                        hits.append((distance, row))
+
+        hits.sort()
+        return [self.record(row, distance) for distance, row in hits[:limit]]
+
+    def find(self, name: str) -> Optional[int]:
+        """Find the row id of a place by (normalized) name"""
+        return self._name_index.get(normalize_name(name))
+
+    def locate(self, text: str) -> Optional[Tuple[float, float]]:
+        """
+        Resolve free text (a place name or an activity description) to coordinates
+
+        Tries the whole text first, then every shorter run of words in it
+        (longest first), so "Lunch at Shake Shack" resolves to "Shake Shack"
+        with dictionary lookups only.
+        """
+        if not text:
+            return None
+        words = normalize_name(text).split()
+        for size in range(len(words), 0, -1):
+            for start in range(len(words) - size + 1):
+                row = self._name_index.get(' '.join(words[start:start + size]))
+                if row is not None:
+                    return self.lats[row], self.lons[row]
+        return None
+
+def load_poi_csv(path: str, store: POIStore) -> POIStore:
+    """Load rows from a CSV file with name, category, lat and lon columns"""
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            try:
+                lat = float(row['lat'])
+                lon = float(row['lon'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            store.add(
+                row.get('name', '').strip(),
+                row.get('category', 'other').strip() or 'other',
+                lat,
+                lon,
+                place_type=(row.get('type') or '').strip(),
+                description=(row.get('description') or '').strip(),
+                price_range=(row.get('price_range') or '').strip(),
+            )
+    return store
+
+def load_poi_geojson(path: str, store: POIStore) -> POIStore:
+    """Load Point features from a GeoJSON FeatureCollection"""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+
+    for feature in data.get('features', []):
+        geometry = feature.get('geometry') or {}
+        if geometry.get('type') != 'Point':
+            continue
+        lon, lat = geometry['coordinates'][:2]
+        props = feature.get('properties') or {}
+        store.add(
+            props.get('name', ''),
+            props.get('category', 'other') or 'other',
+            float(lat),
+            float(lon),
+            place_type=props.get('type', '') or '',
+            description=props.get('description', '') or '',
+            price_range=props.get('price_range', '') or '',
+        )
+    return store
+
+def load_poi_file(path: str) -> POIStore:
+    """Load a POI dataset from a CSV or GeoJSON file"""
+    store = POIStore()
+    if path.lower().endswith(('.geojson', '.json')):
+        return load_poi_geojson(path, store)
+    return load_poi_csv(path, store)
+
+@st.cache_resource(show_spinner=False)
+def get_poi_store(path: str = None) -> Optional[POIStore]:
+    """Get the process-wide POI store (loaded once per dataset file)"""
+    path = path or os.environ.get('POI_DATA_FILE') or DEFAULT_POI_FILE
+    if not os.path.exists(path):
+        return None
+    try:
+        return load_poi_file(path)
+    except Exception as e:
+        print(f"Error loading POI dataset {path}: {e}")
+        return None
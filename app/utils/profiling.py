@@ -0,0 +1,179 @@
+import cProfile
+import functools
+import io
+import os
+import pstats
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+# cProfile dumps of single reruns are written here (override with PROFILE_DIR)
+DEFAULT_PROFILE_DIR = os.path.join(os.path.expanduser('~'), '.tour_flow', 'profiles')
+
+class _Local(threading.local):
+    # The recorder of the rerun running on this thread, None when not profiling
+    recorder = None
+
+_local = _Local()
+
+class RerunProfile:
+    """
+    Span timings of one script run.
+
+    Each span is a tuple of (name, depth, start, seconds), with ``start``
+    relative to the start of the run, in the order the spans started.
+    """
+    def __init__(self, label: str = ''):
+        self.label = label
+        self.started_at = time.time()
+        self.spans: List[tuple] = []
+        self.seconds = 0.0
+        self.stats_text: Optional[str] = None
+        self.dump_file: Optional[str] = None
+        self._start = time.perf_counter()
+        self._depth = 0
+        self._profiler = None
+
+    def slowest(self, count: int = 10) -> List[tuple]:
+        """The ``count`` longest spans"""
+        return sorted(self.spans, key=lambda span: span[3], reverse=True)[:count]
+
+    def totals(self) -> Dict[str, Dict[str, float]]:
+        """Calls, total and longest time per span name"""
+        totals = {}
+        for name, _, _, seconds in self.spans:
+            entry = totals.setdefault(name, {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+            entry['calls'] += 1
+            entry['seconds'] += seconds
+            entry['max_seconds'] = max(entry['max_seconds'], seconds)
+        return totals
+
+class _Span:
+    __slots__ = ('recorder', 'name', 'index', 'start')
+
+    def __init__(self, recorder: RerunProfile, name: str):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        recorder = self.recorder
+        self.start = time.perf_counter()
+        self.index = len(recorder.spans)
+        recorder.spans.append(None)
+        recorder._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        recorder = self.recorder
+        end = time.perf_counter()
+        recorder._depth -= 1
+        recorder.spans[self.index] = (self.name, recorder._depth, self.start - recorder._start, end - self.start)
+        return False
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+def span(name: str):
+    """
+    Context manager timing a block as a span of the current rerun
+
+    Does nothing (and costs about as much as an attribute lookup) unless a
+    rerun is being profiled on this thread.
+
+    Args:
+        name: Span name shown in the performance panel
+    """
+    recorder = _local.recorder
+    if recorder is None:
+        return _NULL_SPAN
+    return _Span(recorder, name)
+
+def profiled(name: str = None) -> Callable:
+    """
+    Decorator timing every call of a function as a span
+
+    Args:
+        name: Span name (defaults to module.function)
+    """
+    def decorate(func: Callable) -> Callable:
+        span_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            recorder = _local.recorder
+            if recorder is None:
+                return func(*args, **kwargs)
+            with _Span(recorder, span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def start_rerun(label: str = '', cprofile: bool = False) -> RerunProfile:
+    """
+    Start recording spans on this thread
+
+    Args:
+        label: Description of the run (e.g. the page)
+        cprofile: Also run cProfile over the whole run
+
+    Returns:
+        The profile being recorded; pass it to finish_rerun
+    """
+    recorder = RerunProfile(label)
+    if cprofile:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            recorder._profiler = profiler
+        except ValueError as e:
+            # Another profiler is already running in this interpreter
+            print(f"Error starting cProfile: {e}")
+    _local.recorder = recorder
+    return recorder
+
+def finish_rerun(recorder: RerunProfile, dump_dir: str = None) -> RerunProfile:
+    """
+    Stop recording, and save the cProfile dump if one was requested
+
+    Args:
+        recorder: Profile returned by start_rerun
+        dump_dir: Directory for the .prof file (defaults to PROFILE_DIR)
+
+    Returns:
+        The finished profile
+    """
+    recorder.seconds = time.perf_counter() - recorder._start
+    _local.recorder = None
+    # Spans still open (finish_rerun called inside a span) are dropped
+    recorder.spans = [s for s in recorder.spans if s is not None]
+
+    profiler = recorder._profiler
+    if profiler is not None:
+        profiler.disable()
+        recorder._profiler = None
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats('cumulative').print_stats(40)
+        recorder.stats_text = stream.getvalue()
+
+        dump_dir = dump_dir or os.environ.get('PROFILE_DIR') or DEFAULT_PROFILE_DIR
+        try:
+            os.makedirs(dump_dir, exist_ok=True)
+            path = os.path.join(dump_dir, f"rerun-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{id(recorder):x}.prof")
+            stats.dump_stats(path)
+            recorder.dump_file = path
+        except OSError as e:
+            print(f"Error saving profile: {e}")
+    return recorder
+
+def current_profile() -> Optional[RerunProfile]:
+    """The profile being recorded on this thread, if any"""
+    return _local.recorder
@@ -0,0 +1,400 @@
+import streamlit as st
+import asyncio
+import json
+import os
+import secrets
+import threading
+import time
+import urllib.parse
+from typing import Any, Dict, List, Optional, Set
+
+from utils.auth import REDIRECT_URI
+from utils.notification_service import get_notification_service, get_session_owner
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Idle connections get a comment line this often so proxies keep them open
+HEARTBEAT_SECONDS = 20
+
+# Subscribers that stop reading are dropped once this much output is queued
+MAX_BUFFERED_BYTES = 256 * 1024
+
+# Tokens without an open connection are revoked after this many seconds;
+# long enough for EventSource to reconnect after a dropped connection
+TOKEN_IDLE_SECONDS = 120
+
+# Static assets are published under content-hash names, so they never change
+STATIC_CACHE_CONTROL = b"public, max-age=31536000, immutable"
+
+_SSE_HEADERS = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: text/event-stream\r\n"
+    b"Cache-Control: no-cache\r\n"
+    b"Connection: keep-alive\r\n"
+    b"Vary: Origin\r\n"
+)
+
+_SSE_PREAMBLE = b"\r\nretry: 3000\n\n"
+
+def _origin(url: str) -> str:
+    parts = urllib.parse.urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+class PushGateway:
+    """
+    Server-sent events gateway for real-time reminders.
+
+    Runs an asyncio server on its own thread. Browsers subscribe with
+    ``GET /events?token=...`` using a token issued for their owner; the
+    notification service publishes from the scheduler thread and the event
+    loop fans each message out to every subscriber of that owner. A message
+    is encoded once and written to all subscribers without awaiting, so a
+    single process can hold tens of thousands of idle connections.
+
+    Only pages from ``allowed_origins`` may read the event stream. Tokens
+    are revoked when their session signs out or switches owner, and once
+    they have had no open connection for ``token_idle`` seconds.
+
+    The same server also answers ``GET /static/<name>`` for assets published
+    with publish_asset, with far-future cache headers.
+    """
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 allowed_origins: List[str] = None, token_idle: float = TOKEN_IDLE_SECONDS):
+        self.host = host
+        self.port = port
+        self.allowed_origins = set(allowed_origins or [])
+        self.token_idle = token_idle
+        # token -> [owner, open connections, last connected or disconnected]
+        self._tokens: Dict[str, list] = {}
+        self._tokens_lock = threading.Lock()
+        self._subscribers: Dict[str, Set[asyncio.StreamWriter]] = {}
+        # Open connections per token (event loop thread only)
+        self._token_writers: Dict[str, Set[asyncio.StreamWriter]] = {}
+        self._assets: Dict[str, tuple] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+    # Lifecycle
+
+    def start(self, timeout: float = 5.0):
+        """Start the event loop thread and bind the server"""
+        ready = threading.Event()
+        errors = []
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._server = self._loop.run_until_complete(
+                    asyncio.start_server(self._handle, self.host, self.port, backlog=4096)
+                )
+                # Pick up the real port when started with port 0
+                self.port = self._server.sockets[0].getsockname()[1]
+            except Exception as e:
+                errors.append(e)
+                ready.set()
+                return
+            self._loop.create_task(self._heartbeat())
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name='push-gateway', daemon=True)
+        self._thread.start()
+        ready.wait(timeout)
+        if errors:
+            raise errors[0]
+
+    def stop(self):
+        if self._loop is None:
+            return
+
+        async def shutdown():
+            self._server.close()
+            # Closing the sockets lets each handler return on its own
+            for writers in list(self._subscribers.values()):
+                for writer in list(writers):
+                    writer.close()
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            await asyncio.wait(tasks, timeout=1) if tasks else None
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._loop.stop()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop)
+        self._thread.join(5)
+        self._loop = None
+
+    # Tokens
+
+    def issue_token(self, owner: str) -> str:
+        """Issue a subscription token for an owner"""
+        token = secrets.token_urlsafe(16)
+        with self._tokens_lock:
+            self._tokens[token] = [owner, 0, time.monotonic()]
+        return token
+
+    def has_token(self, token: str) -> bool:
+        with self._tokens_lock:
+            return token in self._tokens
+
+    def revoke_token(self, token: str):
+        """Invalidate a token and close the connections opened with it (thread-safe)"""
+        with self._tokens_lock:
+            self._tokens.pop(token, None)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._close_token, token)
+
+    def _close_token(self, token: str):
+        for writer in self._token_writers.pop(token, ()):
+            writer.close()
+
+    def expire_tokens(self) -> int:
+        """Revoke tokens that have had no open connection for token_idle seconds"""
+        cutoff = time.monotonic() - self.token_idle
+        with self._tokens_lock:
+            expired = [token for token, (_, connections, seen) in self._tokens.items()
+                       if connections == 0 and seen < cutoff]
+            for token in expired:
+                del self._tokens[token]
+        return len(expired)
+
+    def _cors_header(self, request: bytes) -> bytes:
+        """Access-Control-Allow-Origin line for the request's Origin, if it is allowed"""
+        for line in request.split(b"\r\n")[1:]:
+            name, _, value = line.partition(b":")
+            if name.strip().lower() == b"origin":
+                origin = value.strip().decode('latin-1')
+                if origin in self.allowed_origins:
+                    return b"Access-Control-Allow-Origin: " + origin.encode('latin-1') + b"\r\n"
+                break
+        return b""
+
+    # Static assets
+
+    def publish_asset(self, name: str, data: bytes, content_type: str):
+        """Serve ``data`` at /static/<name> (names should include a content hash)"""
+        self._assets[name] = (content_type.encode('latin-1'), data)
+
+    def _asset_response(self, name: str) -> bytes:
+        asset = self._assets.get(name)
+        if asset is None:
+            return b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+        content_type, data = asset
+        return (
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: " + content_type + b"\r\n"
+            b"Content-Length: " + str(len(data)).encode() + b"\r\n"
+            b"Cache-Control: " + STATIC_CACHE_CONTROL + b"\r\n"
+            b"Connection: close\r\n"
+            b"\r\n" + data
+        )
+
+    # Publishing
+
+    def publish(self, owner: str, notification: Dict[str, Any]):
+        """Send a notification to every subscriber of an owner (thread-safe)"""
+        if self._loop is None:
+            return
+        payload = {
+            'id': notification.get('id'),
+            'title': notification.get('title'),
+            'message': notification.get('message'),
+        }
+        data = f"event: reminder\ndata: {json.dumps(payload)}\n\n".encode('utf-8')
+        self._loop.call_soon_threadsafe(self._fanout, owner, data)
+
+    def _fanout(self, owner: str, data: bytes):
+        writers = self._subscribers.get(owner)
+        if not writers:
+            return
+        for writer in list(writers):
+            self._write(owner, writer, data)
+
+    def _write(self, owner: str, writer: asyncio.StreamWriter, data: bytes):
+        if writer.is_closing() or writer.transport.get_write_buffer_size() > MAX_BUFFERED_BYTES:
+            self._unsubscribe(owner, writer)
+            writer.close()
+            return
+        writer.write(data)
+
+    def _unsubscribe(self, owner: str, writer: asyncio.StreamWriter):
+        writers = self._subscribers.get(owner)
+        if writers is not None:
+            writers.discard(writer)
+            if not writers:
+                del self._subscribers[owner]
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+            self.expire_tokens()
+            for owner, writers in list(self._subscribers.items()):
+                for writer in list(writers):
+                    self._write(owner, writer, b": ping\n\n")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        owner = None
+        token = None
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=10)
+            request_line = request.split(b"\r\n", 1)[0].decode('latin-1')
+            method, target, _ = request_line.split(' ', 2)
+            url = urllib.parse.urlsplit(target)
+            if method == 'GET' and url.path.startswith('/static/'):
+                writer.write(self._asset_response(url.path[len('/static/'):]))
+                await writer.drain()
+                return
+
+            token = urllib.parse.parse_qs(url.query).get('token', [''])[0]
+            entry = None
+            if method == 'GET' and url.path == '/events':
+                with self._tokens_lock:
+                    entry = self._tokens.get(token)
+                    if entry is not None:
+                        entry[1] += 1
+                        entry[2] = time.monotonic()
+
+            if entry is None:
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                await writer.drain()
+                token = None
+                return
+
+            owner = entry[0]
+            writer.write(_SSE_HEADERS + self._cors_header(request) + _SSE_PREAMBLE)
+            self._subscribers.setdefault(owner, set()).add(writer)
+            self._token_writers.setdefault(token, set()).add(writer)
+
+            # Hold the connection until the client goes away
+            while await reader.read(1024):
+                pass
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            if owner is not None:
+                self._unsubscribe(owner, writer)
+            if token is not None:
+                writers = self._token_writers.get(token)
+                if writers is not None:
+                    writers.discard(writer)
+                    if not writers:
+                        del self._token_writers[token]
+                with self._tokens_lock:
+                    entry = self._tokens.get(token)
+                    if entry is not None:
+                        entry[1] -= 1
+                        entry[2] = time.monotonic()
+            writer.close()
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(writers) for writers in self._subscribers.values())
+
+@st.cache_resource(show_spinner=False)
+def get_push_gateway() -> Optional[PushGateway]:
+    """Start the process-wide push gateway (PUSH_GATEWAY_ENABLED=0 disables it)"""
+    if os.environ.get('PUSH_GATEWAY_ENABLED', '1') == '0':
+        return None
+
+    gateway = PushGateway(
+        os.environ.get('PUSH_GATEWAY_HOST', DEFAULT_HOST),
+        int(os.environ.get('PUSH_GATEWAY_PORT', DEFAULT_PORT)),
+        get_allowed_origins(),
+    )
+    try:
+        gateway.start()
+    except Exception as e:
+        print(f"Push gateway unavailable, reminders will appear on the next rerun: {e}")
+        return None
+
+    get_notification_service().add_listener(gateway.publish)
+    return gateway
+
+def get_allowed_origins() -> List[str]:
+    """
+    Origins of the app pages that may subscribe (PUSH_GATEWAY_ALLOWED_ORIGINS)
+
+    Defaults to the OAuth redirect URI's origin and the local Streamlit server.
+    """
+    origins = os.environ.get('PUSH_GATEWAY_ALLOWED_ORIGINS')
+    if origins:
+        return [origin.strip().rstrip('/') for origin in origins.split(',') if origin.strip()]
+    port = st.get_option('server.port')
+    return [_origin(REDIRECT_URI), f"http://localhost:{port}", f"http://127.0.0.1:{port}"]
+
+def get_gateway_url(gateway: PushGateway) -> str:
+    """Base URL browsers use to reach the gateway (PUSH_GATEWAY_PUBLIC_URL behind a proxy)"""
+    return os.environ.get('PUSH_GATEWAY_PUBLIC_URL') or f"http://localhost:{gateway.port}"
+
+def get_public_gateway_url() -> Optional[str]:
+    """
+    The gateway's URL if it is explicitly published (PUSH_GATEWAY_PUBLIC_URL)
+
+    Only then can pages depend on it: a browser that cannot reach the
+    default localhost URL just misses real-time reminders, but would lose
+    any stylesheet or image served from it.
+    """
+    return os.environ.get('PUSH_GATEWAY_PUBLIC_URL') or None
+
+def revoke_push_token():
+    """Revoke this session's subscription token and close its connections (e.g. on sign-out)"""
+    token = st.session_state.pop('_push_token', None)
+    st.session_state.pop('_push_owner', None)
+    if not token:
+        return
+    gateway = get_push_gateway()
+    if gateway is not None:
+        gateway.revoke_token(token)
+
+def render_push_listener():
+    """Subscribe the browser to real-time reminders for the current owner"""
+    gateway = get_push_gateway()
+    if gateway is None:
+        return
+
+    owner = get_session_owner()
+    token = st.session_state.get('_push_token')
+    # A new token (and URL) also remounts the listener after an idle token expired
+    if st.session_state.get('_push_owner') != owner or not (token and gateway.has_token(token)):
+        if token:
+            gateway.revoke_token(token)
+        st.session_state._push_token = gateway.issue_token(owner)
+        st.session_state._push_owner = owner
+
+    events_url = f"{get_gateway_url(gateway)}/events?token={st.session_state._push_token}"
+
+    import streamlit.components.v1 as components
+    components.html(f"""
+        <script>
+        (function() {{
+            const doc = window.parent.document;
+            const source = new EventSource({json.dumps(events_url)});
+            source.addEventListener('reminder', (event) => {{
+                const reminder = JSON.parse(event.data);
+                if (window.Notification && Notification.permission === 'granted') {{
+                    new Notification(reminder.title, {{ body: reminder.message }});
+                }}
+                const toast = doc.createElement('div');
+                toast.style.cssText = 'position: fixed; top: 3.5rem; right: 2rem; z-index: 1001; ' +
+                    'background: white; border-left: 4px solid #3b82f6; border-radius: 0.5rem; ' +
+                    'box-shadow: 0 4px 12px rgba(0,0,0,0.15); padding: 0.75rem 1rem; max-width: 22rem; ' +
+                    'font-family: sans-serif; color: #0f172a;';
+                const title = doc.createElement('div');
+                title.style.fontWeight = '600';
+                title.textContent = '🔔 ' + reminder.title;
+                const body = doc.createElement('div');
+                body.style.cssText = 'font-size: 0.85rem; color: #4b5563; white-space: pre-line;';
+                body.textContent = reminder.message;
+                toast.append(title, body);
+                doc.body.appendChild(toast);
+                setTimeout(() => toast.remove(), 10000);
+            }});
+            if (window.Notification && Notification.permission === 'default') {{
+                Notification.requestPermission();
+            }}
+        }})();
+        </script>
+    """, height=0)
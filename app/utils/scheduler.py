@@ -0,0 +1,193 @@
+import datetime
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Union
+
+Due = Union[float, datetime.datetime]
+
+# Rebuild the heap once cancelled entries make up more than this share of it
+COMPACT_RATIO = 0.5
+
+class TimerScheduler:
+    """
+    Min-heap timer scheduler driven by a condition variable.
+
+    The worker thread sleeps exactly until the earliest due entry instead of
+    polling. Inserting only wakes the thread when the new entry becomes the
+    head of the heap, so scheduling thousands of later reminders causes no
+    wakeups at all. Cancelling marks the heap entry dead and drops it from the
+    key index; dead entries are skipped when they reach the head and the heap
+    is compacted when they pile up, keeping insert and cancel O(log n)
+    amortized.
+    """
+    def __init__(self, on_due: Callable[[str, Any], None], name: str = 'timer-scheduler'):
+        self.on_due = on_due
+        self.name = name
+        self._heap: List[list] = []
+        self._entries: Dict[str, list] = {}
+        self._counter = itertools.count()
+        self._cancelled = 0
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @staticmethod
+    def _timestamp(due: Due) -> float:
+        if isinstance(due, datetime.datetime):
+            return due.timestamp()
+        return float(due)
+
+    def schedule(self, key: str, due: Due, payload: Any = None) -> str:
+        """
+        Schedule a payload to be delivered at a given time
+
+        Args:
+            key: Unique key of the entry (rescheduling an existing key replaces it)
+            due: Unix timestamp or datetime when the entry is due
+            payload: Object passed to ``on_due`` when the entry fires
+
+        Returns:
+            The entry key
+        """
+        with self._cond:
+            self._schedule_locked(key, self._timestamp(due), payload)
+        return key
+
+    def schedule_many(self, entries: List[tuple]):
+        """
+        Schedule several (key, due, payload) entries under one lock acquisition
+
+        A key repeated within the batch is scheduled once, with its last entry.
+        """
+        # Deduplicate first: replacing an entry of this batch would count a
+        # cancellation for an entry that is not in the heap yet
+        batch = {key: (due, payload) for key, due, payload in entries}
+        with self._cond:
+            head = self._heap[0][0] if self._heap else None
+            new_entries = []
+            for key, (due, payload) in batch.items():
+                if key in self._entries:
+                    self._cancel_locked(key)
+                entry = [self._timestamp(due), next(self._counter), key, payload]
+                self._entries[key] = entry
+                new_entries.append(entry)
+
+            # Re-heapify once for large batches, push one by one for small ones
+            if len(new_entries) > len(self._heap):
+                self._heap.extend(new_entries)
+                heapq.heapify(self._heap)
+            else:
+                for entry in new_entries:
+                    heapq.heappush(self._heap, entry)
+
+            if self._heap and (head is None or self._heap[0][0] < head):
+                self._cond.notify()
+
+    def _schedule_locked(self, key: str, due: float, payload: Any):
+        if key in self._entries:
+            self._cancel_locked(key)
+        entry = [due, next(self._counter), key, payload]
+        self._entries[key] = entry
+        heapq.heappush(self._heap, entry)
+        # Only wake the worker if its current sleep would now be too long
+        if self._heap[0] is entry:
+            self._cond.notify()
+
+    def cancel(self, key: str) -> bool:
+        """Cancel a scheduled entry; returns False if it was not pending"""
+        with self._cond:
+            return self._cancel_locked(key)
+
+    def _cancel_locked(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        entry[2] = None  # Mark dead; skipped when it reaches the head
+        self._cancelled += 1
+        if self._cancelled > len(self._heap) * COMPACT_RATIO:
+            self._heap = [e for e in self._heap if e[2] is not None]
+            heapq.heapify(self._heap)
+            self._cancelled = 0
+        return True
+
+    def next_due(self) -> Optional[float]:
+        """Timestamp of the earliest pending entry"""
+        with self._cond:
+            self._drop_dead_head()
+            return self._heap[0][0] if self._heap else None
+
+    def _drop_dead_head(self):
+        while self._heap and self._heap[0][2] is None:
+            heapq.heappop(self._heap)
+            self._cancelled -= 1
+
+    def pop_due(self, now: float = None) -> List[tuple]:
+        """Remove and return all (key, payload) entries due at or before now"""
+        now = time.time() if now is None else now
+        due = []
+        with self._cond:
+            self._pop_due_locked(now, due)
+        return due
+
+    def _pop_due_locked(self, now: float, due: List[tuple]):
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if entry[2] is None:
+                self._cancelled -= 1
+                continue
+            del self._entries[entry[2]]
+            due.append((entry[2], entry[3]))
+
+    def _run(self):
+        while True:
+            due = []
+            with self._cond:
+                while self._running and not due:
+                    self._drop_dead_head()
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self._heap[0][0] - time.time()
+                    if delay > 0:
+                        self._cond.wait(delay)
+                        continue
+                    self._pop_due_locked(time.time(), due)
+                if not self._running:
+                    return
+
+            # Deliver outside the lock so callbacks can schedule new entries
+            for key, payload in due:
+                try:
+                    self.on_due(key, payload)
+                except Exception as e:
+                    print(f"Error delivering scheduled entry {key}: {e}")
+
+    def start(self):
+        """Start the worker thread (no-op if it is already running)"""
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = None):
+        """Stop the worker thread; pending entries are kept"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
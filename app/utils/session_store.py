@@ -0,0 +1,342 @@
+import streamlit as st
+import collections
+import hashlib
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from utils.notification_service import get_session_owner
+
+# Backend and limits (override with SESSION_STORE, SESSION_STORE_FILE,
+# SESSION_STORE_MAX_MB and SESSION_SPILL_DIR)
+DEFAULT_BACKEND = 'sqlite'
+DEFAULT_STORE_FILE = os.path.join(os.path.expanduser('~'), '.tour_flow', 'sessions.sqlite3')
+DEFAULT_MAX_MB = 64
+
+# Owner under which shared tours are stored (see utils.itinerary)
+TOURS_OWNER = 'tours'
+
+# Unreferenced tours and the data of ended anonymous sessions are collected
+# at most this often
+COLLECT_INTERVAL_SECONDS = 600
+
+# Prefix of owners that only live as long as their Streamlit session
+SESSION_OWNER_PREFIX = 'session:'
+
+_MISSING = object()
+
+def _dumps(value: Any) -> bytes:
+    return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+class _LRU:
+    """Values with their pickled size, least recently used first"""
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.entries: "collections.OrderedDict[Tuple[str, str], Tuple[Any, int]]" = collections.OrderedDict()
+
+    def get(self, key: Tuple[str, str]) -> Any:
+        entry = self.entries.get(key)
+        if entry is None:
+            return _MISSING
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: Tuple[str, str], value: Any, size: int) -> List[Tuple[Tuple[str, str], Any]]:
+        """Add a value and return the (key, value) pairs evicted to stay under the cap"""
+        self.pop(key)
+        self.entries[key] = (value, size)
+        self.bytes += size
+        evicted = []
+        # The newest value stays even if it is bigger than the cap on its own
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            old_key, (old_value, old_size) = self.entries.popitem(last=False)
+            self.bytes -= old_size
+            evicted.append((old_key, old_value))
+        return evicted
+
+    def pop(self, key: Tuple[str, str]):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+class SessionStore:
+    """
+    Per-user session data kept outside st.session_state.
+
+    Values are addressed by owner (see get_session_owner) and name. Stored
+    values are snapshots: after changing a value in place, call set() again.
+    """
+    def get(self, owner: str, name: str, default: Any = None) -> Any:
+        raise NotImplementedError
+
+    def set(self, owner: str, name: str, value: Any):
+        raise NotImplementedError
+
+    def delete(self, owner: str, name: str):
+        raise NotImplementedError
+
+    def keys(self) -> List[Tuple[str, str]]:
+        """Every stored (owner, name) pair"""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        raise NotImplementedError
+
+class MemorySessionStore(SessionStore):
+    """
+    In-memory store with LRU spill.
+
+    Values are kept in memory up to ``max_bytes`` (measured by their pickled
+    size); the least recently used ones beyond that are pickled to
+    ``spill_dir`` and loaded back when next accessed.
+    """
+    def __init__(self, max_bytes: int, spill_dir: str = None):
+        self.spill_dir = spill_dir or tempfile.mkdtemp(prefix='tour_flow_sessions_')
+        os.makedirs(self.spill_dir, exist_ok=True)
+        self._lru = _LRU(max_bytes)
+        self._spilled = set()
+        self._lock = threading.Lock()
+
+    def _path(self, key: Tuple[str, str]) -> str:
+        digest = hashlib.sha1(f"{key[0]}\0{key[1]}".encode('utf-8')).hexdigest()
+        return os.path.join(self.spill_dir, f"{digest}.pkl")
+
+    def _spill(self, evicted: List[Tuple[Tuple[str, str], Any]]):
+        for key, value in evicted:
+            try:
+                with open(self._path(key), 'wb') as f:
+                    f.write(_dumps(value))
+                self._spilled.add(key)
+            except OSError as e:
+                print(f"Error spilling session data: {e}")
+
+    def get(self, owner: str, name: str, default: Any = None) -> Any:
+        key = (owner, name)
+        with self._lock:
+            value = self._lru.get(key)
+            if value is not _MISSING:
+                return value
+            if key not in self._spilled:
+                return default
+
+            # Page the value back in
+            path = self._path(key)
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                os.remove(path)
+            except OSError as e:
+                print(f"Error loading spilled session data: {e}")
+                self._spilled.discard(key)
+                return default
+            self._spilled.discard(key)
+            value = pickle.loads(data)
+            self._spill(self._lru.put(key, value, len(data)))
+            return value
+
+    def set(self, owner: str, name: str, value: Any):
+        key = (owner, name)
+        size = len(_dumps(value))
+        with self._lock:
+            if key in self._spilled:
+                self._spilled.discard(key)
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+            self._spill(self._lru.put(key, value, size))
+
+    def delete(self, owner: str, name: str):
+        key = (owner, name)
+        with self._lock:
+            self._lru.pop(key)
+            if key in self._spilled:
+                self._spilled.discard(key)
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+
+    def keys(self) -> List[Tuple[str, str]]:
+        with self._lock:
+            return list(self._lru.entries) + list(self._spilled)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'in_memory': len(self._lru.entries),
+                'memory_bytes': self._lru.bytes,
+                'max_bytes': self._lru.max_bytes,
+                'spilled': len(self._spilled),
+            }
+
+class SQLiteSessionStore(SessionStore):
+    """
+    SQLite store that survives restarts.
+
+    Every value is written through to the database (in WAL mode); a bounded
+    LRU of recently used values is kept in memory, and anything evicted
+    from it is simply read back from disk on its next access.
+    """
+    def __init__(self, path: str, max_bytes: int):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lru = _LRU(max_bytes)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS session_data (
+                owner TEXT NOT NULL,
+                name TEXT NOT NULL,
+                value BLOB NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (owner, name)
+            )
+        """)
+
+    def get(self, owner: str, name: str, default: Any = None) -> Any:
+        key = (owner, name)
+        with self._lock:
+            value = self._lru.get(key)
+            if value is not _MISSING:
+                return value
+            row = self._conn.execute(
+                "SELECT value FROM session_data WHERE owner = ? AND name = ?", key
+            ).fetchone()
+            if row is None:
+                return default
+            try:
+                value = pickle.loads(row[0])
+            except Exception as e:
+                print(f"Error loading session data {name}: {e}")
+                return default
+            self._lru.put(key, value, len(row[0]))
+            return value
+
+    def set(self, owner: str, name: str, value: Any):
+        data = _dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO session_data (owner, name, value, updated_at) VALUES (?, ?, ?, ?)",
+                (owner, name, data, time.time())
+            )
+            self._lru.put((owner, name), value, len(data))
+
+    def delete(self, owner: str, name: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM session_data WHERE owner = ? AND name = ?", (owner, name))
+            self._lru.pop((owner, name))
+
+    def keys(self) -> List[Tuple[str, str]]:
+        with self._lock:
+            return [tuple(row) for row in self._conn.execute("SELECT owner, name FROM session_data")]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT COUNT(*) FROM session_data").fetchone()[0]
+            return {
+                'in_memory': len(self._lru.entries),
+                'memory_bytes': self._lru.bytes,
+                'max_bytes': self._lru.max_bytes,
+                'stored': rows,
+            }
+
+def open_session_store(backend: str = None) -> SessionStore:
+    """
+    Create the session store configured by the environment
+
+    Args:
+        backend: 'sqlite' or 'memory' (defaults to SESSION_STORE, then sqlite)
+
+    Returns:
+        The SessionStore (the memory store if SQLite cannot be opened)
+    """
+    backend = (backend or os.environ.get('SESSION_STORE') or DEFAULT_BACKEND).lower()
+    try:
+        max_bytes = int(float(os.environ.get('SESSION_STORE_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024)
+    except ValueError:
+        max_bytes = DEFAULT_MAX_MB * 1024 * 1024
+
+    if backend == 'sqlite':
+        path = os.environ.get('SESSION_STORE_FILE') or DEFAULT_STORE_FILE
+        try:
+            return SQLiteSessionStore(path, max_bytes)
+        except Exception as e:
+            print(f"Session database unavailable, session data will not survive restarts: {e}")
+    return MemorySessionStore(max_bytes, os.environ.get('SESSION_SPILL_DIR'))
+
+def collect_garbage(store: SessionStore, is_active: Callable[[str], bool]) -> int:
+    """
+    Delete data nobody can reach any more
+
+    That is everything stored for anonymous (``session:``) owners whose
+    Streamlit session has ended, and every shared tour no owner's 'tour'
+    value points at.
+
+    Args:
+        store: The session store
+        is_active: Whether a Streamlit session id is still active
+
+    Returns:
+        Number of values deleted
+    """
+    deleted = 0
+    keys = store.keys()
+    for owner, name in keys:
+        # session:<session id>, or session:<session id>:<demo login id>
+        if owner.startswith(SESSION_OWNER_PREFIX) and \
+                not is_active(owner[len(SESSION_OWNER_PREFIX):].split(':', 1)[0]):
+            store.delete(owner, name)
+            deleted += 1
+
+    # set_itinerary points the owner at a tour before storing it, so a tour
+    # being saved right now is never collected
+    keys = store.keys()
+    referenced = {store.get(owner, name) for owner, name in keys if name == 'tour' and owner != TOURS_OWNER}
+    for owner, name in keys:
+        if owner == TOURS_OWNER and name not in referenced:
+            store.delete(owner, name)
+            deleted += 1
+    return deleted
+
+_collect_lock = threading.Lock()
+_last_collection = [0.0]
+
+def maybe_collect_garbage():
+    """Run collect_garbage on the session store if it has not run for a while"""
+    now = time.time()
+    with _collect_lock:
+        if now - _last_collection[0] < COLLECT_INTERVAL_SECONDS:
+            return
+        _last_collection[0] = now
+    from utils.notification_service import is_active_session
+    try:
+        collect_garbage(get_session_store(), is_active_session)
+    except Exception as e:
+        print(f"Error collecting session data: {e}")
+
+@st.cache_resource(show_spinner=False)
+def get_session_store() -> SessionStore:
+    """Get the session store shared by every session in this process"""
+    return open_session_store()
+
+def session_get(name: str, default: Any = None) -> Any:
+    """Get a value of the current user's session data"""
+    return get_session_store().get(get_session_owner(), name, default)
+
+def session_set(name: str, value: Any):
+    """Store a value in the current user's session data"""
+    get_session_store().set(get_session_owner(), name, value)
+
+def session_delete(name: str):
+    """Remove a value from the current user's session data"""
+    get_session_store().delete(get_session_owner(), name)
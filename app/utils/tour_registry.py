@@ -0,0 +1,101 @@
+import streamlit as st
+import hashlib
+import json
+import threading
+import weakref
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+def content_hash(itinerary: Sequence[Dict[str, Any]], include_ids: bool = True) -> str:
+    """
+    Hash of an itinerary's content
+
+    Args:
+        itinerary: Itinerary items
+        include_ids: Whether item ids count (ids are random per upload, so
+            two uploads of the same agenda only match without them)
+
+    Returns:
+        Hex digest identifying the content
+    """
+    if not include_ids:
+        itinerary = [{k: v for k, v in item.items() if k != 'id'} for item in itinerary]
+    data = json.dumps(itinerary, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()[:16]
+
+def _freeze_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    # Lists (e.g. notes) become tuples so they cannot be appended to in place
+    return {k: tuple(v) if isinstance(v, list) else v for k, v in item.items()}
+
+class SharedTour:
+    """
+    An itinerary shared by every session of the same tour group
+
+    ``items`` is a tuple and is never modified after interning; sessions that
+    edit their plan only keep their edits on top of it (see utils.itinerary).
+    Insights and suggestions fetched by one member are kept here for all.
+    """
+    def __init__(self, key: str, itinerary: Sequence[Dict[str, Any]]):
+        self.key = key
+        self.items: Tuple[Dict[str, Any], ...] = tuple(_freeze_item(item) for item in itinerary)
+        self.index: Dict[str, int] = {item['id']: i for i, item in enumerate(self.items)}
+        self.version = content_hash(self.items)
+        # Location key -> AI insights
+        self.insights: Dict[str, Dict[str, Any]] = {}
+        # (item id, category) -> suggestion list; restaurant categories
+        # include the meal type, e.g. 'restaurant:lunch'
+        self.suggestions: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+
+    def get_suggestions(self, item_id: str, category: str) -> Optional[List[Dict[str, Any]]]:
+        """Suggestions already fetched for an item, or None"""
+        return self.suggestions.get((item_id, category))
+
+    def set_suggestions(self, item_id: str, category: str, suggestions: Optional[List[Dict[str, Any]]]):
+        """Store (or with None, drop) the suggestions for an item"""
+        if suggestions is None:
+            self.suggestions.pop((item_id, category), None)
+        else:
+            self.suggestions[(item_id, category)] = suggestions
+
+class TourRegistry:
+    """
+    Process-wide registry of shared itineraries, keyed by content hash
+
+    Tours are held weakly: a tour stays registered while at least one
+    session refers to it, so memory grows with distinct tours rather than
+    with connected users.
+    """
+    def __init__(self):
+        self._tours: "weakref.WeakValueDictionary[str, SharedTour]" = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def intern(self, itinerary: Sequence[Dict[str, Any]]) -> SharedTour:
+        """
+        Get the shared tour with this content, registering it if it is new
+
+        Args:
+            itinerary: Itinerary items, each with an id
+
+        Returns:
+            The SharedTour (whose items keep the ids of the first upload)
+        """
+        key = content_hash(itinerary, include_ids=False)
+        with self._lock:
+            tour = self._tours.get(key)
+            if tour is None:
+                tour = SharedTour(key, itinerary)
+                self._tours[key] = tour
+        return tour
+
+    def get(self, key: str) -> Optional[SharedTour]:
+        """Look up a registered tour by content hash"""
+        return self._tours.get(key)
+
+    def stats(self) -> Dict[str, int]:
+        """Number of registered tours and of the items they hold"""
+        tours = list(self._tours.values())
+        return {'tours': len(tours), 'items': sum(len(tour.items) for tour in tours)}
+
+@st.cache_resource(show_spinner=False)
+def get_tour_registry() -> TourRegistry:
+    """Get the tour registry shared by every session of this process"""
+    return TourRegistry()
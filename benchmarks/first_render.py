@@ -0,0 +1,162 @@
+"""
+Startup and first-render benchmark suite.
+
+Runs app/main.py headless with Streamlit's AppTest, a fixed synthetic
+itinerary and a fake Gemini backend, and times:
+
+- the first script run of a fresh session on every screen (setup, login,
+  dashboard, upload, flow, suggestions),
+- a warm rerun of each screen,
+- navigation paths, i.e. switching pages within one session.
+
+Results are printed as JSON and can be stored as a baseline; comparing
+against a baseline exits with status 1 when any timing regresses by more
+than the threshold.
+
+    python benchmarks/first_render.py --save-baseline benchmarks/baselines/first_render.json
+    python benchmarks/first_render.py --baseline benchmarks/baselines/first_render.json --threshold 0.2
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(ROOT, 'app')
+MAIN = os.path.join(APP_DIR, 'main.py')
+sys.path.insert(0, APP_DIR)
+
+from streamlit.testing.v1 import AppTest
+
+from synthetic import install_fake_ai, synthetic_itinerary
+
+SECRETS = {
+    'GOOGLE_CLIENT_ID': 'bench-client-id',
+    'GOOGLE_CLIENT_SECRET': 'bench-client-secret',
+    'GEMINI_API_KEY': 'bench-gemini-key',
+}
+
+USER = {'email': 'bench@example.com', 'name': 'Bench User'}
+
+# Screen name -> (secrets set, signed in, menu page)
+SCREENS = {
+    'setup': (False, False, None),
+    'login': (True, False, None),
+    'dashboard': (True, True, 'Dashboard'),
+    'upload': (True, True, 'Upload Plan'),
+    'flow': (True, True, 'Tour Flow'),
+    'suggestions': (True, True, 'Suggestions'),
+}
+
+# Page switches timed within one signed-in session
+PATHS = {
+    'dashboard>flow>suggestions': ['Dashboard', 'Tour Flow', 'Suggestions'],
+    'dashboard>upload>flow': ['Dashboard', 'Upload Plan', 'Tour Flow'],
+}
+
+def new_session(screen: str, itinerary) -> AppTest:
+    with_secrets, signed_in, page = SCREENS[screen]
+    at = AppTest.from_file(MAIN, default_timeout=120)
+    if with_secrets:
+        for key, value in SECRETS.items():
+            at.secrets[key] = value
+    if signed_in:
+        at.session_state['logged_in'] = True
+        at.session_state['user_info'] = dict(USER)
+        at.session_state['itinerary'] = [dict(item) for item in itinerary]
+        at.session_state['page'] = page
+    return at
+
+def timed_run(at: AppTest) -> float:
+    started = time.perf_counter()
+    at.run()
+    elapsed = (time.perf_counter() - started) * 1000
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return elapsed
+
+def measure_screen(screen: str, itinerary, runs: int) -> dict:
+    """Median first-run and warm-rerun times (ms) of a screen over fresh sessions"""
+    first, warm = [], []
+    for _ in range(runs):
+        at = new_session(screen, itinerary)
+        first.append(timed_run(at))
+        warm.append(timed_run(at))
+    return {
+        'first_run_ms': round(statistics.median(first), 2),
+        'rerun_ms': round(statistics.median(warm), 2),
+    }
+
+def measure_path(pages, itinerary, runs: int) -> dict:
+    """Median time (ms) of each page switch along a navigation path"""
+    steps = [[] for _ in pages]
+    for _ in range(runs):
+        at = new_session('dashboard', itinerary)
+        for i, page in enumerate(pages):
+            at.session_state['page'] = page
+            steps[i].append(timed_run(at))
+    return {page: round(statistics.median(samples), 2) for page, samples in zip(pages, steps)}
+
+def find_regressions(results: dict, baseline: dict, threshold: float, prefix: str = '') -> list:
+    """Every timing that is more than ``threshold`` slower than in the baseline"""
+    regressions = []
+    for key, value in results.items():
+        before = baseline.get(key) if isinstance(baseline, dict) else None
+        if isinstance(value, dict):
+            regressions.extend(find_regressions(value, before or {}, threshold, f"{prefix}{key}."))
+        elif key.endswith('_ms') or prefix.startswith('paths.'):
+            if isinstance(before, (int, float)) and before > 0 and value > before * (1 + threshold):
+                regressions.append(f"{prefix}{key}: {before} ms -> {value} ms (+{(value / before - 1) * 100:.0f}%)")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=120, help='synthetic itinerary size')
+    parser.add_argument('--runs', type=int, default=5, help='fresh sessions per measurement')
+    parser.add_argument('--baseline', help='compare against this JSON baseline')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown, 0.2 = 20%%')
+    parser.add_argument('--save-baseline', help='write the results to this file')
+    args = parser.parse_args()
+
+    # Isolate the run: temporary databases, no push gateway, no real Gemini calls
+    scratch = tempfile.mkdtemp(prefix='tour_flow_bench_')
+    os.environ.setdefault('NOTIFICATION_DB_FILE', os.path.join(scratch, 'notifications.sqlite3'))
+    os.environ.setdefault('GEOCODE_CACHE_FILE', os.path.join(scratch, 'geocode_cache.sqlite3'))
+    os.environ.setdefault('SESSION_STORE_FILE', os.path.join(scratch, 'sessions.sqlite3'))
+    os.environ.setdefault('PUSH_GATEWAY_ENABLED', '0')
+    install_fake_ai()
+    os.chdir(ROOT)
+
+    itinerary = synthetic_itinerary(args.items)
+    results = {
+        'items': args.items,
+        'runs': args.runs,
+        'python': sys.version.split()[0],
+        'screens': {screen: measure_screen(screen, itinerary, args.runs) for screen in SCREENS},
+        'paths': {name: measure_path(pages, itinerary, args.runs) for name, pages in PATHS.items()},
+    }
+    print(json.dumps(results, indent=2))
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(
+            {'screens': results['screens'], 'paths': results['paths']},
+            {'screens': baseline.get('screens', {}), 'paths': baseline.get('paths', {})},
+            args.threshold,
+        )
+        if regressions:
+            print(f"Regressions beyond {args.threshold:.0%}:\n  " + "\n  ".join(regressions), file=sys.stderr)
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%}", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
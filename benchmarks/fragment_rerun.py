@@ -0,0 +1,200 @@
+"""
+Full-page rerun time versus fragment rerun time.
+
+Runs app/main.py with Streamlit's AppTest against a synthetic itinerary and
+repeats one interaction per page with a widget that lives inside a
+fragment:
+
+- Tour Flow: switching the "Activity Type" filter,
+- Dashboard: paging through the notification inbox,
+- Suggestions: clicking "Find Nearby Attractions" (fake Gemini backend).
+
+Each interaction is timed twice: as a full script rerun (what happens
+without fragments) and as a fragment rerun. AppTest only does full runs,
+so for the latter the benchmark keeps the session's fragments between
+runs and sends the rerun request the browser sends for a widget inside a
+fragment (the fragment's id, scoped to that fragment). Only the fragment
+function runs; the rest of the page stays as it is.
+
+    python benchmarks/fragment_rerun.py --items 300 --runs 20
+"""
+import argparse
+import datetime
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(ROOT, 'app')
+MAIN = os.path.join(APP_DIR, 'main.py')
+sys.path.insert(0, APP_DIR)
+
+from streamlit.runtime.fragment import MemoryFragmentStorage
+from streamlit.runtime.scriptrunner import RerunData
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1 import app_test
+from streamlit.testing.v1.element_tree import parse_tree_from_messages
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner, require_widgets_deltas
+
+from synthetic import install_fake_ai, synthetic_itinerary
+
+SECRETS = {
+    'GOOGLE_CLIENT_ID': 'bench-client-id',
+    'GOOGLE_CLIENT_SECRET': 'bench-client-secret',
+    'GEMINI_API_KEY': 'bench-gemini-key',
+}
+
+USER = {'email': 'bench@example.com', 'name': 'Bench User'}
+
+class _Session:
+    """Fragment state AppTest does not keep between runs"""
+    storage = None
+    fragment_id = None
+    runner = None
+
+_session = _Session()
+
+class FragmentScriptRunner(LocalScriptRunner):
+    """
+    LocalScriptRunner that shares one fragment storage across runs and, when
+    a fragment id is set, reruns only that fragment (as AppSession does for
+    a widget inside a fragment)
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._fragment_storage = _session.storage
+        _session.runner = self
+
+    def run(self, widget_state=None, query_params=None, timeout: float = 3, page_hash: str = ''):
+        if _session.fragment_id is None:
+            return super().run(widget_state, query_params, timeout, page_hash)
+        self.request_rerun(RerunData(
+            widget_states=widget_state,
+            page_script_hash=page_hash,
+            fragment_id=_session.fragment_id,
+            is_fragment_scoped_rerun=True,
+        ))
+        if not self._script_thread:
+            self.start()
+        require_widgets_deltas(self, timeout)
+        return parse_tree_from_messages(self.forward_msgs())
+
+app_test.LocalScriptRunner = FragmentScriptRunner
+
+def fragment_of(widget_id: str) -> str:
+    """Id of the fragment that rendered a widget in the last full run"""
+    for msg in _session.runner.forward_msgs():
+        if msg.WhichOneof('type') != 'delta' or msg.delta.WhichOneof('type') != 'new_element':
+            continue
+        element = msg.delta.new_element
+        proto = getattr(element, element.WhichOneof('type'))
+        if getattr(proto, 'id', None) == widget_id:
+            if not msg.delta.fragment_id:
+                raise RuntimeError(f"Widget {widget_id} is not inside a fragment")
+            return msg.delta.fragment_id
+    raise RuntimeError(f"Widget {widget_id} was not rendered")
+
+def seed_notifications(count: int):
+    """A notification store with ``count`` delivered reminders, so the inbox has several pages"""
+    from utils.notification_store import NotificationStore, new_notification_id
+
+    store = NotificationStore()
+    now = datetime.datetime.now()
+    store.add_many([{
+        'id': new_notification_id(),
+        'title': f"Reminder {i}",
+        'message': f"Activity {i} starts in 15 minutes",
+        'scheduled_time': now - datetime.timedelta(minutes=i),
+        'is_read': False,
+        'created_at': now,
+    } for i in range(count)])
+    return store
+
+def _activity_type(at: AppTest, step: int):
+    widget = next(w for w in at.selectbox if w.label == 'Activity Type')
+    return widget.set_value('meal' if step % 2 == 0 else 'All Types')
+
+def _notification_page(at: AppTest, step: int):
+    return at.button(key='notifications_older' if step % 2 == 0 else 'notifications_newer').click()
+
+def _find_attractions(at: AppTest, step: int):
+    return next(w for w in at.button if w.label == '🔍 Find Nearby Attractions').click()
+
+# (name, menu page, interaction)
+CASES = [
+    ('flow', 'Tour Flow', _activity_type),
+    ('dashboard', 'Dashboard', _notification_page),
+    ('suggestions', 'Suggestions', _find_attractions),
+]
+
+def new_session(page: str, itinerary) -> AppTest:
+    at = AppTest.from_file(MAIN, default_timeout=120)
+    for key, value in SECRETS.items():
+        at.secrets[key] = value
+    at.session_state['logged_in'] = True
+    at.session_state['user_info'] = dict(USER)
+    at.session_state['itinerary'] = [dict(item) for item in itinerary]
+    at.session_state['notification_store'] = seed_notifications(40)
+    at.session_state['page'] = page
+    return at
+
+def timed_run(at: AppTest) -> float:
+    started = time.perf_counter()
+    at.run()
+    elapsed = (time.perf_counter() - started) * 1000
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return elapsed
+
+def measure(page: str, interact, itinerary, runs: int, as_fragment: bool) -> float:
+    """Median time (ms) of repeating an interaction in one session"""
+    _session.storage = MemoryFragmentStorage()
+    _session.fragment_id = None
+    at = new_session(page, itinerary)
+    timed_run(at)
+    # Interact once with a full run first, so both variants start warm
+    interact(at, 1).run()
+
+    samples = []
+    for step in range(runs):
+        widget = interact(at, step)
+        if as_fragment and _session.fragment_id is None:
+            _session.fragment_id = fragment_of(widget.id)
+        # After a fragment run the tree only holds the fragment's elements,
+        # which include the widget, and its widget states are all the
+        # fragment rerun needs (the rest are kept in session state)
+        samples.append(timed_run(at))
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=300, help='itinerary size')
+    parser.add_argument('--runs', type=int, default=20, help='timed interactions per measurement')
+    args = parser.parse_args()
+
+    # Keep the benchmark away from the real databases, push port and Gemini
+    scratch = tempfile.mkdtemp(prefix='tour_flow_bench_')
+    os.environ.setdefault('NOTIFICATION_DB_FILE', os.path.join(scratch, 'notifications.sqlite3'))
+    os.environ.setdefault('GEOCODE_CACHE_FILE', os.path.join(scratch, 'geocode_cache.sqlite3'))
+    os.environ.setdefault('SESSION_STORE_FILE', os.path.join(scratch, 'sessions.sqlite3'))
+    os.environ.setdefault('PUSH_GATEWAY_ENABLED', '0')
+    install_fake_ai()
+    os.chdir(ROOT)
+
+    itinerary = synthetic_itinerary(args.items)
+    results = {'items': args.items, 'runs': args.runs, 'python': sys.version.split()[0], 'pages': {}}
+    for name, page, interact in CASES:
+        full_ms = measure(page, interact, itinerary, args.runs, as_fragment=False)
+        fragment_ms = measure(page, interact, itinerary, args.runs, as_fragment=True)
+        results['pages'][name] = {
+            'full_page_ms': round(full_ms, 2),
+            'fragment_ms': round(fragment_ms, 2),
+            'speedup': round(full_ms / fragment_ms, 1) if fragment_ms else None,
+        }
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
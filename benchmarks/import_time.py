@@ -0,0 +1,142 @@
+"""
+Cold-start import time of the app and of each page.
+
+Imports each target in a fresh interpreter with ``-X importtime`` and
+reports its cumulative import time and the slowest packages it pulled
+in. With Streamlit's AppTest available it also times a cold run
+of main.py up to its first rendered screen.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --save-baseline benchmarks/baselines/import_time.json
+    python benchmarks/import_time.py --baseline benchmarks/baselines/import_time.json
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(ROOT, 'app')
+
+TARGETS = [
+    'main',
+    'pages.setup',
+    'pages.login',
+    'pages.dashboard',
+    'pages.upload',
+    'pages.flow',
+    'pages.suggestions',
+]
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)')
+
+# The app's own packages are not reported as dependencies
+APP_PACKAGES = {'main', 'pages', 'utils', 'components'}
+
+FIRST_PAINT_SCRIPT = """
+import time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({main!r}, default_timeout=120)
+at.run()
+print((time.perf_counter() - started) * 1000)
+"""
+
+def _env():
+    env = dict(os.environ)
+    env['PYTHONPATH'] = APP_DIR + os.pathsep + env.get('PYTHONPATH', '')
+    # Importing main starts no gateway and touches no real database
+    env.setdefault('PUSH_GATEWAY_ENABLED', '0')
+    scratch = tempfile.mkdtemp()
+    env.setdefault('NOTIFICATION_DB_FILE', os.path.join(scratch, 'notifications.sqlite3'))
+    env.setdefault('SESSION_STORE_FILE', os.path.join(scratch, 'sessions.sqlite3'))
+    return env
+
+def import_time(module: str, top: int = 5) -> dict:
+    """Cumulative import time (ms) of a module in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=ROOT, env=_env(), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return {'error': result.stderr.strip().splitlines()[-1]}
+
+    total_us = 0
+    packages = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative = int(match.group(2))
+        name = match.group(3)
+        if name == module:
+            total_us = cumulative
+        # Third-party and stdlib packages, by the time their root import took
+        elif '.' not in name and name not in APP_PACKAGES:
+            packages[name] = max(packages.get(name, 0), cumulative)
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        'import_ms': round(total_us / 1000, 1),
+        'slowest': {name: round(us / 1000, 1) for name, us in slowest},
+    }
+
+def first_paint_ms(runs: int) -> float:
+    """Median time (ms) from a cold interpreter to main.py's first rendered screen"""
+    script = FIRST_PAINT_SCRIPT.format(main=os.path.join(APP_DIR, 'main.py'))
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=_env(),
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            return None
+        samples.append(float(result.stdout.strip().splitlines()[-1]))
+    return round(statistics.median(samples), 1)
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Targets whose import time grew more than ``tolerance`` over the baseline"""
+    regressions = []
+    for module, measured in results['modules'].items():
+        before = baseline.get('modules', {}).get(module, {}).get('import_ms')
+        now = measured.get('import_ms')
+        if before and now and now > before * (1 + tolerance):
+            regressions.append(f"{module}: {before} ms -> {now} ms")
+    before = baseline.get('first_paint_ms')
+    now = results.get('first_paint_ms')
+    if before and now and now > before * (1 + tolerance):
+        regressions.append(f"first paint: {before} ms -> {now} ms")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3, help='cold runs for the first-paint median')
+    parser.add_argument('--no-first-paint', action='store_true', help='only measure imports')
+    parser.add_argument('--baseline', help='fail if slower than this JSON baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown over the baseline')
+    parser.add_argument('--save-baseline', help='write the results to this file')
+    args = parser.parse_args()
+
+    results = {'python': sys.version.split()[0], 'modules': {}}
+    for module in TARGETS:
+        results['modules'][module] = import_time(module)
+    if not args.no_first_paint:
+        results['first_paint_ms'] = first_paint_ms(args.runs)
+    print(json.dumps(results, indent=2))
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("Import time regressions:\n  " + "\n  ".join(regressions), file=sys.stderr)
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
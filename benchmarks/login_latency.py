@@ -0,0 +1,140 @@
+"""
+Sign-in latency benchmark.
+
+Starts the stub OAuth server (see stub_oauth.py) with a configurable
+per-request delay, points utils.auth at it and times, per login:
+
+- the token exchange plus userinfo lookup over a fresh connection each
+  time (how every login used to pay for its requests),
+- the same over the shared, pooled HTTP session,
+- a repeated userinfo lookup for a known token (served from the cache),
+- a token refresh,
+
+and checks that the background refresher renews a short-lived token before
+it expires.
+
+    python benchmarks/login_latency.py --logins 200 --latency 0.02
+"""
+import argparse
+import functools
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'app'))
+
+from stub_oauth import StubOAuthServer
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {
+        'p50_ms': round(statistics.median(samples) * 1000, 3),
+        'p95_ms': round(samples[int(len(samples) * 0.95) - 1] * 1000, 3),
+        'max_ms': round(samples[-1] * 1000, 3),
+    }
+
+def login(session, auth, code):
+    response = session.post(os.environ['GOOGLE_TOKEN_URI'], data={
+        'grant_type': 'authorization_code',
+        'code': code,
+        'client_id': 'bench-client-id',
+        'client_secret': 'bench-client-secret',
+        'redirect_uri': auth.REDIRECT_URI,
+    }, timeout=auth.HTTP_TIMEOUT)
+    response.raise_for_status()
+    token = response.json()
+    return {
+        'token': token['access_token'],
+        'refresh_token': token['refresh_token'],
+        'client_id': 'bench-client-id',
+        'client_secret': 'bench-client-secret',
+        'expiry': time.time() + token['expires_in'],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds the stub adds to every response')
+    args = parser.parse_args()
+
+    server = StubOAuthServer(latency=args.latency).start()
+    os.environ['GOOGLE_TOKEN_URI'] = f"{server.url}/token"
+    os.environ['GOOGLE_USERINFO_URI'] = f"{server.url}/userinfo"
+
+    import requests
+    from utils import auth
+
+    # Outside a Streamlit server st.cache_resource does not cache, so pin the
+    # process-wide HTTP session and userinfo cache the way the server would
+    for name in ('get_http_session', 'get_userinfo_cache'):
+        setattr(auth, name, functools.lru_cache(maxsize=None)(getattr(auth, name).__wrapped__))
+
+    results = {'logins': args.logins, 'stub_latency_ms': args.latency * 1000}
+
+    # Fresh connection per request, no userinfo cache
+    samples = []
+    connections = server.connections
+    for i in range(args.logins):
+        started = time.perf_counter()
+        with requests.Session() as session:
+            credentials = login(session, auth, f"cold{i}")
+            session.get(os.environ['GOOGLE_USERINFO_URI'],
+                        headers={'Authorization': f"Bearer {credentials['token']}"},
+                        timeout=auth.HTTP_TIMEOUT).raise_for_status()
+        samples.append(time.perf_counter() - started)
+    results['unpooled'] = dict(percentiles(samples), connections=server.connections - connections)
+
+    # Shared pool and get_user_info
+    samples = []
+    issued = []
+    connections = server.connections
+    session = auth.get_http_session()
+    for i in range(args.logins):
+        started = time.perf_counter()
+        credentials = login(session, auth, f"warm{i}")
+        auth.get_user_info(credentials)
+        samples.append(time.perf_counter() - started)
+        issued.append(credentials)
+    results['pooled'] = dict(percentiles(samples), connections=server.connections - connections)
+
+    # Known tokens are answered from the cache
+    samples = []
+    lookups = server.requests['userinfo']
+    for credentials in issued:
+        started = time.perf_counter()
+        auth.get_user_info(credentials)
+        samples.append(time.perf_counter() - started)
+    results['userinfo_cached'] = dict(percentiles(samples), requests=server.requests['userinfo'] - lookups)
+
+    samples = []
+    for credentials in issued:
+        started = time.perf_counter()
+        auth.refresh_access_token(credentials)
+        samples.append(time.perf_counter() - started)
+    results['refresh'] = percentiles(samples)
+
+    # A token that expires in 2s with a 1s margin is renewed by the refresher
+    credentials = login(session, auth, 'background')
+    expires_at = time.time() + 2
+    credentials['expiry'] = expires_at
+    old_token = credentials['token']
+    refresher = auth.TokenRefresher(margin=1)
+    refresher.watch('background-session', credentials)
+    while credentials['token'] == old_token and time.time() < expires_at + 3:
+        time.sleep(0.01)
+    refreshed = credentials['token'] != old_token
+    results['background_refresh'] = {
+        'refreshed': refreshed,
+        'seconds_before_expiry': round(expires_at - time.time(), 3) if refreshed else None,
+    }
+    refresher.forget('background-session')
+    refresher.scheduler.stop()
+
+    server.stop()
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
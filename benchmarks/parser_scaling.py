@@ -0,0 +1,138 @@
+"""
+Agenda parser throughput and scaling benchmark.
+
+Parses synthetic agendas (see synthetic.synthetic_agenda) of increasing
+size with utils.parser.parse_tour_agenda and reports, per size:
+
+- the best parse time of a few runs and lines per second,
+- peak memory allocated while parsing (tracemalloc, in a separate run),
+- how time and memory grow relative to the smallest size (1.0 = linear).
+
+Each run also checks that every generated item was parsed, so a change
+that speeds the parser up by dropping items does not pass. Results are
+printed as JSON and can be stored as a baseline; comparing against a
+baseline exits with status 1 when a time or peak memory grows by more than
+the threshold.
+
+    python benchmarks/parser_scaling.py --save-baseline benchmarks/baselines/parser_scaling.json
+    python benchmarks/parser_scaling.py --baseline benchmarks/baselines/parser_scaling.json --threshold 0.2
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+
+from utils.parser import parse_tour_agenda
+
+from synthetic import synthetic_agenda_lines
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+
+# Measurements where lower is better and that are compared with a baseline
+COMPARED = ('seconds', 'peak_bytes')
+
+def measure(text: str, expected_items: int, repeat: int) -> dict:
+    """Time and trace parse_tour_agenda on one agenda"""
+    line_count = text.count('\n')
+    times = []
+    # Small agendas run until they add up to half a second, so their best time is stable
+    while len(times) < repeat or (sum(times) < 0.5 and len(times) < 100):
+        gc.collect()
+        started = time.perf_counter()
+        itinerary = parse_tour_agenda(text)
+        times.append(time.perf_counter() - started)
+        if len(itinerary) != expected_items:
+            raise SystemExit(f"Parsed {len(itinerary)} items, expected {expected_items}")
+        del itinerary
+
+    gc.collect()
+    tracemalloc.start()
+    parse_tour_agenda(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    seconds = min(times)
+    return {
+        'lines': line_count,
+        'items': expected_items,
+        'seconds': round(seconds, 6),
+        'lines_per_second': round(line_count / seconds),
+        'peak_bytes': peak,
+    }
+
+def add_scaling(results: dict):
+    """Time and memory per line relative to the smallest size"""
+    sizes = list(results)
+    first = results[sizes[0]]
+    for size in sizes:
+        row = results[size]
+        ratio = row['lines'] / first['lines']
+        row['time_scaling'] = round(row['seconds'] / first['seconds'] / ratio, 3)
+        row['memory_scaling'] = round(row['peak_bytes'] / first['peak_bytes'] / ratio, 3)
+
+def find_regressions(results: dict, baseline: dict, threshold: float) -> list:
+    """Every time or peak memory that is more than ``threshold`` above the baseline"""
+    regressions = []
+    for size, row in results.items():
+        before = baseline.get(size)
+        if not before:
+            continue
+        for key in COMPARED:
+            if before.get(key) and row[key] > before[key] * (1 + threshold):
+                regressions.append(f"{size} lines {key}: {before[key]} -> {row[key]}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='agenda sizes in lines')
+    parser.add_argument('--items-per-day', type=int, default=6)
+    parser.add_argument('--notes-density', type=float, default=0.6, help='share of items with notes')
+    parser.add_argument('--messiness', type=float, default=0.3, help='share of irregularly formatted lines')
+    parser.add_argument('--repeat', type=int, default=3, help='minimum timed runs per size (the best counts)')
+    parser.add_argument('--baseline', help='compare against this JSON baseline')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed growth, 0.2 = 20%%')
+    parser.add_argument('--save-baseline', help='write the results to this file')
+    args = parser.parse_args()
+
+    results = {}
+    for size in sorted(args.sizes):
+        text = synthetic_agenda_lines(size, args.items_per_day, args.notes_density, args.messiness)
+        # Every day has the same number of items
+        days = text.count('\nDay ') + text.count('\nDAY ')
+        results[str(size)] = measure(text, days * args.items_per_day, args.repeat)
+        del text
+    add_scaling(results)
+
+    report = {
+        'python': sys.version.split()[0],
+        'items_per_day': args.items_per_day,
+        'notes_density': args.notes_density,
+        'messiness': args.messiness,
+        'sizes': results,
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if any(baseline.get(key) != report[key] for key in ('items_per_day', 'notes_density', 'messiness')):
+            print("Baseline was recorded with different agenda settings", file=sys.stderr)
+            sys.exit(2)
+        regressions = find_regressions(results, baseline.get('sizes', {}), args.threshold)
+        if regressions:
+            print(f"Regressions beyond {args.threshold:.0%}:\n  " + "\n  ".join(regressions), file=sys.stderr)
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%}", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
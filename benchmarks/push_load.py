@@ -0,0 +1,130 @@
+"""
+Load generator for the reminder push gateway.
+
+Starts a gateway in-process, opens N concurrent SSE subscribers spread over
+M owners, publishes reminders and reports connection time, delivery
+latency percentiles and how many subscribers received every message.
+
+    python benchmarks/push_load.py --subscribers 10000 --owners 1000
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+
+from utils.push_gateway import PushGateway
+
+def raise_fd_limit(needed: int):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < needed:
+        target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+    return resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+
+async def subscribe(host, port, token):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET /events?token={token} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+    await writer.drain()
+    await reader.readuntil(b"\r\n\r\n")
+    return reader, writer
+
+async def consume(reader, latencies, received):
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            if line.startswith(b"data: "):
+                payload = json.loads(line[6:])
+                latencies.append(time.perf_counter() - float(payload['message']))
+                received[0] += 1
+    except (ConnectionError, asyncio.CancelledError):
+        return
+
+async def run(args):
+    gateway = PushGateway('127.0.0.1', 0)
+    gateway.start()
+
+    owners = [f"user:load{i}@example.com" for i in range(args.owners)]
+    tokens = [gateway.issue_token(owners[i % args.owners]) for i in range(args.subscribers)]
+
+    latencies = []
+    received = [0]
+    started = time.perf_counter()
+    connections = []
+    # Connect in batches so the listen backlog is not overrun
+    for start in range(0, len(tokens), 500):
+        batch = tokens[start:start + 500]
+        connections.extend(await asyncio.gather(*[
+            subscribe('127.0.0.1', gateway.port, token) for token in batch
+        ]))
+    connect_seconds = time.perf_counter() - started
+
+    # Wait until the gateway has registered everyone
+    while gateway.subscriber_count < args.subscribers:
+        await asyncio.sleep(0.01)
+
+    consumers = [asyncio.create_task(consume(reader, latencies, received)) for reader, _ in connections]
+
+    for _ in range(args.messages):
+        sent = time.perf_counter()
+        for owner in owners:
+            # The send time travels in the message body to measure latency
+            gateway.publish(owner, {'id': 'load', 'title': 'Load test', 'message': repr(sent)})
+        await asyncio.sleep(args.interval)
+
+    expected = args.subscribers * args.messages
+    deadline = time.perf_counter() + 10
+    while received[0] < expected and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+
+    for task in consumers:
+        task.cancel()
+    for _, writer in connections:
+        writer.close()
+    gateway.stop()
+
+    latencies.sort()
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else float('nan')
+
+    result = {
+        'subscribers': args.subscribers,
+        'owners': args.owners,
+        'messages': args.messages,
+        'connect_seconds': round(connect_seconds, 3),
+        'delivered': received[0],
+        'expected': expected,
+        'latency_ms_p50': round(percentile(0.50), 2),
+        'latency_ms_p99': round(percentile(0.99), 2),
+        'latency_ms_max': round(latencies[-1] * 1000, 2) if latencies else None,
+    }
+    print(json.dumps(result, indent=2))
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--subscribers', type=int, default=10000)
+    parser.add_argument('--owners', type=int, default=1000)
+    parser.add_argument('--messages', type=int, default=5)
+    parser.add_argument('--interval', type=float, default=0.5, help='Seconds between publish rounds')
+    parser.add_argument('--max-p99-ms', type=float, default=1000.0, help='Fail if p99 latency exceeds this')
+    args = parser.parse_args()
+
+    # Each subscriber needs a client and a server socket in this process
+    limit = raise_fd_limit(args.subscribers * 2 + 256)
+    if limit < args.subscribers * 2 + 256:
+        print(f"File descriptor limit {limit} is too low for {args.subscribers} subscribers", file=sys.stderr)
+        return 2
+
+    result = asyncio.run(run(args))
+    ok = result['delivered'] == result['expected'] and result['latency_ms_p99'] <= args.max_p99_ms
+    return 0 if ok else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
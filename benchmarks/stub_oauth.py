@@ -0,0 +1,140 @@
+"""
+Local stand-in for Google's OAuth token and userinfo endpoints.
+
+Issues opaque access tokens for any authorization code or refresh token and
+answers /userinfo for tokens it issued, optionally after an artificial
+delay, so sign-in can be exercised and timed without network access. Point
+the app at it with:
+
+    GOOGLE_TOKEN_URI=http://127.0.0.1:8765/token
+    GOOGLE_USERINFO_URI=http://127.0.0.1:8765/userinfo
+
+    python benchmarks/stub_oauth.py --port 8765 --latency 0.05
+"""
+import argparse
+import json
+import secrets
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StubOAuthServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0, expires_in: int = 3600):
+        super().__init__((host, port), _Handler)
+        self.latency = latency
+        self.expires_in = expires_in
+        self.tokens = {}
+        self.lock = threading.Lock()
+        self.requests = {'token': 0, 'refresh': 0, 'userinfo': 0}
+        self.connections = 0
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='stub-oauth', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def issue(self, subject: str) -> dict:
+        token = secrets.token_urlsafe(24)
+        with self.lock:
+            self.tokens[token] = subject
+        return {
+            'access_token': token,
+            'expires_in': self.expires_in,
+            'refresh_token': f"refresh-{subject}",
+            'token_type': 'Bearer',
+            'scope': 'openid email profile',
+        }
+
+    def get_request(self):
+        with self.lock:
+            self.connections += 1
+        return super().get_request()
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without this, kept-alive
+    # connections wait on delayed ACKs (~40 ms a request)
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: dict):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get('Content-Length') or 0)
+        form = urllib.parse.parse_qs(self.rfile.read(length).decode('utf-8'))
+        if self.path.split('?')[0] != '/token':
+            return self._send(404, {'error': 'not_found'})
+        if server.latency:
+            time.sleep(server.latency)
+
+        grant = form.get('grant_type', [''])[0]
+        if grant == 'authorization_code' and form.get('code'):
+            server.requests['token'] += 1
+            return self._send(200, server.issue(form['code'][0]))
+        if grant == 'refresh_token' and form.get('refresh_token', [''])[0].startswith('refresh-'):
+            server.requests['refresh'] += 1
+            return self._send(200, server.issue(form['refresh_token'][0][len('refresh-'):]))
+        return self._send(400, {'error': 'invalid_grant'})
+
+    def do_GET(self):
+        server = self.server
+        if self.path.split('?')[0] != '/userinfo':
+            return self._send(404, {'error': 'not_found'})
+        if server.latency:
+            time.sleep(server.latency)
+
+        token = self.headers.get('Authorization', '')[len('Bearer '):]
+        with server.lock:
+            subject = server.tokens.get(token)
+        if subject is None:
+            return self._send(401, {'error': 'invalid_token'})
+        server.requests['userinfo'] += 1
+        return self._send(200, {
+            'id': subject,
+            'email': f"{subject}@example.com",
+            'verified_email': True,
+            'name': subject.title(),
+            'picture': '',
+        })
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--expires-in', type=int, default=3600, help='Access token lifetime in seconds')
+    args = parser.parse_args()
+
+    server = StubOAuthServer(args.host, args.port, args.latency, args.expires_in)
+    print(f"Stub OAuth server on {server.url} (token: {server.url}/token, userinfo: {server.url}/userinfo)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""
+Synthetic, deterministic test data shared by the benchmark scripts.
+"""
+import datetime
+import json
+import os
+import random
+import sys
+import types
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app')
+
+ACTIVITIES = [
+    ("Breakfast at the hotel", "meal"),
+    ("Visit the Museum of Modern Art", "attraction"),
+    ("Walking tour of Central Park", "attraction"),
+    ("Lunch at Chelsea Market", "meal"),
+    ("Train to Brooklyn", "transportation"),
+    ("Check-in at the hotel", "accommodation"),
+]
+
+LOCATIONS = [
+    "11 W 53rd St, New York, NY",
+    "Central Park, New York, NY",
+    "75 9th Ave, New York, NY",
+    "Brooklyn Bridge, New York, NY",
+]
+
+def synthetic_itinerary(count: int, start: datetime.date = None, per_day: int = 8):
+    """
+    Itinerary of ``count`` items, ``per_day`` hourly items a day from 8 AM
+
+    Args:
+        count: Number of items
+        start: First day (defaults to today, so the dashboard has a current item)
+        per_day: Items per day
+
+    Returns:
+        List of itinerary item dictionaries with stable ids
+    """
+    start = start or datetime.date.today()
+    items = []
+    for i in range(count):
+        activity, item_type = ACTIVITIES[i % len(ACTIVITIES)]
+        hour = 8 + i % per_day
+        items.append({
+            'id': f"bench{i:06d}",
+            'date': start + datetime.timedelta(days=i // per_day),
+            'time': f"{(hour - 1) % 12 + 1}:00 {'AM' if hour < 12 else 'PM'}",
+            'activity': f"{activity} #{i}",
+            'location': LOCATIONS[i % len(LOCATIONS)],
+            'duration_minutes': 60,
+            'type': item_type,
+            'notes': ["Bring a camera"],
+        })
+    return items
+
+# Vocabulary for synthetic agendas, in the style of sample_agenda.txt
+AGENDA_ACTIVITIES = [
+    "Check-in at Hotel Belleclaire",
+    "Breakfast at Sarabeth's",
+    "Visit American Museum of Natural History",
+    "Central Park Walking Tour",
+    "Lunch at Shake Shack",
+    "Visit The Metropolitan Museum of Art",
+    "Shopping on 5th Avenue",
+    "Ride the Staten Island Ferry",
+    "Train to Coney Island",
+    "Dinner at Carmine's",
+    "Times Square Exploration",
+    "Check-out and depart for airport",
+]
+
+AGENDA_LOCATIONS = [
+    "250 West 77th Street, Upper West Side",
+    "Central Park West & 79th St",
+    "366 Columbus Ave",
+    "1000 5th Ave",
+    "Whitehall Terminal, Manhattan",
+    "75 9th Ave",
+    "Times Square, Manhattan",
+    "180 Greenwich St",
+]
+
+# Notes never contain a time or the word "at", so each one stays a note
+AGENDA_NOTES = [
+    "Buy tickets online to avoid lines",
+    "Confirmation #12345",
+    "Make reservation",
+    "Cash only",
+    "Free ride with views of the harbor",
+    "Don't miss the dinosaur exhibits",
+    "Bring comfortable shoes",
+    "Meet the guide by the fountain",
+]
+
+AGENDA_DURATIONS = ["1 hour", "2 hours", "3 hours", "45 minutes", "90 min", "2 hrs"]
+
+def synthetic_agenda(days: int, items_per_day: int = 6, notes_density: float = 0.6,
+                     messiness: float = 0.0, start: datetime.date = None, seed: int = 0) -> str:
+    """
+    Raw agenda text with the structure of sample_agenda.txt
+
+    Every item is a time line, an "at" location line, a duration line and,
+    for a share of the items, a notes line. Messy formatting varies case,
+    spacing, separators, date styles and line endings the way pasted
+    agendas do, without changing what the parser should find.
+
+    Args:
+        days: Number of days
+        items_per_day: Items a day, from 8 AM on (at most 15)
+        notes_density: Share of items with a notes line (0-1)
+        messiness: Share of lines given irregular formatting (0-1)
+        start: First day (defaults to 2025-05-20)
+        seed: Random seed; the same arguments always give the same text
+
+    Returns:
+        Agenda text with ``days * items_per_day`` items
+    """
+    rng = random.Random(seed)
+    start = start or datetime.date(2025, 5, 20)
+    messy = lambda: messiness and rng.random() < messiness
+    end = start + datetime.timedelta(days=days - 1)
+
+    lines = ["SYNTHETIC TOUR", f"{start.month}/{start.day}/{start.year} - {end.month}/{end.day}/{end.year}", ""]
+    for d in range(days):
+        day = start + datetime.timedelta(days=d)
+        if messy():
+            lines.append(f"DAY {d + 1}  ({day.month}-{day.day}-{day.year % 100:02d})")
+        else:
+            lines.append(f"Day {d + 1} ({day.month}/{day.day}/{day.year})")
+            lines.append("-" * 16)
+
+        for i in range(items_per_day):
+            hour = 8 + i
+            minute = rng.choice((0, 15, 30, 45))
+            suffix = 'AM' if hour < 12 else 'PM'
+            clock = f"{(hour - 1) % 12 + 1}:{minute:02d}"
+            activity = rng.choice(AGENDA_ACTIVITIES)
+            indent = "         "
+            if messy():
+                # Lower case suffix, no space before it, ":" instead of "-"
+                time_line = f"{clock}{suffix.lower()}: {activity}"
+                indent = rng.choice(("\t", "  ", "            "))
+            else:
+                time_line = f"{clock} {suffix} - {activity}"
+            lines.append(time_line)
+            lines.append(f"{indent}at {rng.choice(AGENDA_LOCATIONS)}")
+
+            duration = rng.choice(AGENDA_DURATIONS)
+            lines.append(f"{indent}{'duration:' if messy() else 'Duration:'} {duration}")
+            if rng.random() < notes_density:
+                notes = ", ".join(rng.sample(AGENDA_NOTES, rng.randint(1, 3)))
+                lines.append(f"{indent}Notes: {notes}" + ("   " if messy() else ""))
+            if not messy():
+                lines.append("")
+
+    newline = "\r\n" if messiness >= 0.5 else "\n"
+    return newline.join(lines) + newline
+
+def synthetic_agenda_lines(line_count: int, items_per_day: int = 6, notes_density: float = 0.6,
+                           messiness: float = 0.0, seed: int = 0) -> str:
+    """Synthetic agenda of about ``line_count`` lines (see synthetic_agenda)"""
+    # A day header, then per item time, location and duration lines, an
+    # optional notes line and a blank one; messy days drop the rule and blanks
+    per_day = (2 - messiness) + items_per_day * (4 + notes_density - messiness)
+    days = max(1, int(line_count / per_day) + 1)
+    return synthetic_agenda(days, items_per_day, notes_density, messiness, seed=seed)
+
+class FakeGenerativeModel:
+    """Stand-in for google.generativeai.GenerativeModel with canned, instant answers"""
+    def __init__(self, model_name, *args, **kwargs):
+        self.model_name = model_name
+
+    def generate_content(self, prompt, *args, **kwargs):
+        if 'array of the place names' in prompt:
+            # Ranking: keep the order the candidates were listed in
+            text = json.dumps([line.strip()[2:].rsplit(' (', 1)[0] for line in prompt.splitlines()
+                               if line.strip().startswith('- ')])
+        elif 'JSON array' in prompt:
+            text = json.dumps([
+                {"name": "Central Park", "type": "Park", "description": "Urban park.", "estimated_time": "2 hours"},
+                {"name": "Top of the Rock", "type": "Observation Deck", "description": "City views.", "estimated_time": "1 hour"},
+            ])
+        else:
+            text = json.dumps({"description": "A well-known place.", "highlights": "Plenty to see.",
+                               "fun_fact": "It is older than it looks."})
+        return types.SimpleNamespace(text=text)
+
+def install_fake_ai():
+    """Replace the Gemini SDK with FakeGenerativeModel so runs need no network or API key"""
+    genai = types.ModuleType('google.generativeai')
+    genai.configure = lambda **kwargs: None
+    genai.GenerativeModel = FakeGenerativeModel
+    sys.modules['google.generativeai'] = genai
+    try:
+        import google
+        google.generativeai = genai
+    except ImportError:
+        pass